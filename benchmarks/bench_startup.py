@@ -0,0 +1,67 @@
+"""
+Startup benchmark of ACT.
+
+Measures the import time of azure_custom_tasks with python -X importtime and
+the wall time of the commands that don't interact with the cloud (-v, -t and
+a local -sT dry run), checking that the Azure SDK is not imported by them.
+
+usage: python3 bench_startup.py [MAX_IMPORT_MS]
+"""
+import os,sys
+import subprocess
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+ACT = os.path.join(SRC, 'azure_custom_tasks.py')
+EXAMPLE = os.path.join(ROOT, 'examples', 'helloworld')
+
+
+def import_times():
+    """
+    Import azure_custom_tasks with -X importtime and parse the report.
+
+    :rtype: dict<str:int>
+    :return: the cumulative import time (us) of each imported module.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'import azure_custom_tasks'],
+                            cwd=SRC, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        (_, cumulative, name) = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def command_time(arguments, repeat=5):
+    """
+    Get the best wall time (ms) of an ACT command.
+    """
+    best = None
+    for _ in range(repeat):
+        init = time.perf_counter()
+        subprocess.run([sys.executable, ACT] + arguments, cwd=EXAMPLE,
+                       capture_output=True, check=True)
+        elapsed = (time.perf_counter() - init) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    max_import_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+    times = import_times()
+    total_ms = times['azure_custom_tasks'] / 1000
+    azure = [name for name in times if name.split('.')[0] == 'azure']
+    print(f'Import time: {total_ms:.1f} ms')
+    for (name, arguments) in [('-v', ['-v']),
+                              ('-t', ['-t']),
+                              ('-sT', ['-i', 'inputs.csv', '-sT'])]:
+        print(f'Command {name}: {command_time(arguments):.1f} ms')
+
+    if azure:
+        raise SystemExit(f'ERROR: Azure SDK imported at startup: {azure}')
+    if total_ms > max_import_ms:
+        raise SystemExit(f'ERROR: import time above {max_import_ms} ms')
@@ -0,0 +1,103 @@
+"""
+Benchmark of the count_resistome.py HMMER table parser.
+
+Generates synthetic hmmscan --tblout files and compares the current parser
+with the original sequential implementation, checking that both produce the
+same CSV output.
+
+usage: python3 bench_count_resistome.py [FILES] [ROWS_PER_FILE]
+"""
+import os,sys
+import random
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+import count_resistome
+
+
+def legacy_parse_hmmer_file(inputpath):
+    """
+    The original parser: reads each whole file and splits all the columns.
+    """
+    filelist = []
+    for (dirpath, dirnames, filenames) in os.walk(inputpath):
+        for file in filenames:
+            if file.endswith("_modelo.txt"):
+                filelist.append(f'{dirpath}/{file}')
+
+    metagenomes = {}
+    for filename in filelist:
+        metagenome_id = filename.split('/')[-1].split('_')[0]
+        if metagenome_id not in metagenomes:
+            metagenomes[metagenome_id] = {}
+        resistome = metagenomes[metagenome_id]
+
+        with open(filename, 'r') as file:
+            for line in file.readlines():
+                line = line.strip()
+                if line.startswith('#'):
+                    continue
+                tokens = line.split(maxsplit=18)
+                accession = tokens[1]
+                if accession in resistome:
+                    resistome[accession] += 1
+                else:
+                    resistome[accession] = 1
+    return metagenomes
+
+
+def create_tblout_files(path, files, rows):
+    """
+    Create synthetic tblout files, a few files for each metagenome.
+    """
+    header = ('#                                                               '
+              '--- full sequence ---- --- best 1 domain ---- --- domain number'
+              ' estimation ----\n'
+              '# target name        accession  query name           accession'
+              '    E-value  score  bias   E-value  score  bias   exp reg clu  '
+              'ov env dom rep inc description of target\n'
+              '#------------------- ---------- -------------------- ----------'
+              ' --------- ------ ----- --------- ------ -----   --- --- --- ---'
+              ' --- --- --- --- ---------------------\n')
+    row = ('{name:<20} RF{acc:04d}     k141_{query}_1 -   1.2e-30  '
+           '104.1   0.1   1.4e-30  103.9   0.1   1.0   1   0   0   1   1   1'
+           '   1 Resistance family description\n')
+    random.seed(0)
+    for idx in range(files):
+        sample = f'{path}/SRR{idx//4:06d}'
+        os.makedirs(sample, exist_ok=True)
+        with open(f'{sample}/SRR{idx//4:06d}_{idx}_modelo.txt', 'w') as file:
+            file.write(header)
+            for query in range(rows):
+                file.write(row.format(name=f'Family{query%50}',
+                                      acc=random.randint(1, 175),
+                                      query=query))
+            file.write('#\n# [ok]\n')
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    with tempfile.TemporaryDirectory() as tmpdir:
+        inputpath = f'{tmpdir}/input'
+        create_tblout_files(inputpath, files, rows)
+        print(f'Created {files} files with {rows} rows each.')
+
+        init = time.perf_counter()
+        legacy = legacy_parse_hmmer_file(inputpath)
+        legacy_time = time.perf_counter() - init
+        count_resistome.print_output(legacy, f'{tmpdir}/legacy.csv')
+
+        init = time.perf_counter()
+        current = count_resistome.parse_hmmer_file(inputpath)
+        current_time = time.perf_counter() - init
+        count_resistome.print_output(current, f'{tmpdir}/current.csv')
+
+        with open(f'{tmpdir}/legacy.csv') as a, open(f'{tmpdir}/current.csv') as b:
+            if a.read() != b.read():
+                raise RuntimeError('ERROR: the parsers output differ!')
+
+    print(f'Legacy parser:  {legacy_time:.3f} s')
+    print(f'Current parser: {current_time:.3f} s')
+    print(f'Speedup: {legacy_time/current_time:.2f}x')
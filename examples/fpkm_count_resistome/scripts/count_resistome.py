@@ -1,5 +1,11 @@
 import os,sys
 import datetime
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Large sequential reads perform much better than line sized reads through the
+# blobfuse mount, so each file is opened with a big buffer.
+READ_BUFFER_SIZE = 8 * 1024 * 1024
 
 def print_output(metagenomes, filename):
     res_profile = ["RF0001","RF0002","RF0003","RF0004","RF0005","RF0006",
@@ -28,11 +34,32 @@ def print_output(metagenomes, filename):
         file.write(f"metagenome_id,{','.join(res_profile)},total\n")
         for (meta_id,res) in metagenomes.items():
             res_str = ','.join([str(res.get(x,0)) for x in res_profile])
-            res_sum = sum([res[x] for x in res])
+            res_sum = sum(res.values())
             file.write(f'{meta_id},{res_str},{res_sum}\n')
 
 
-def parse_hmmer_file(inputpath):
+def read_accessions(file):
+    """
+    Stream the accession (second column) of each HMMER table row, skipping
+    the comment lines. Only the first two fields of each line are tokenized.
+    """
+    for line in file:
+        tokens = line.split(None, 2)
+        if len(tokens) > 1 and not tokens[0].startswith(b'#'):
+            yield tokens[1]
+
+
+def count_hmmer_file(filename):
+    """
+    Count the accessions found in a single HMMER table file.
+    """
+    with open(filename, 'rb', buffering=READ_BUFFER_SIZE) as file:
+        counts = Counter(read_accessions(file))
+    return Counter({accession.decode(): count
+                    for (accession, count) in counts.items()})
+
+
+def parse_hmmer_file(inputpath, workers=None):
     filelist = []
     for (dirpath, dirnames, filenames) in os.walk(inputpath):
         for file in filenames:
@@ -40,25 +67,18 @@ def parse_hmmer_file(inputpath):
                 filelist.append(f'{dirpath}/{file}')
     print(f'Found {len(filelist)} files.')
 
+    # Count the files in parallel, the results are merged in the file list
+    # order so the output is the same of the sequential execution
     metagenomes = {}
-    for filename in filelist:
-        print(f'Processing file: {filename}')
-        metagenome_id = filename.split('/')[-1].split('_')[0]
-        if metagenome_id not in metagenomes:
-            metagenomes[metagenome_id] = {}
-        resistome = metagenomes[metagenome_id]
-
-        with open(filename, 'r') as file:
-            for line in file.readlines():
-                line = line.strip()
-                if line.startswith('#'):
-                    continue
-                tokens = line.split(maxsplit=18)
-                accession = tokens[1]
-                if accession in resistome:
-                    resistome[accession] += 1
-                else:
-                    resistome[accession] = 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(count_hmmer_file, filelist,
+                               chunksize=max(1, len(filelist) // 64))
+        for (filename, counts) in zip(filelist, results):
+            print(f'Processing file: {filename}')
+            metagenome_id = filename.split('/')[-1].split('_')[0]
+            if metagenome_id not in metagenomes:
+                metagenomes[metagenome_id] = Counter()
+            metagenomes[metagenome_id].update(counts)
     return metagenomes
 
 
@@ -0,0 +1,275 @@
+"""
+Author: Pablo Viana
+Version: 1.0
+Created: 2026/10/19
+
+ACT mount I/O benchmark - runs on the Azure Batch compute nodes.
+
+The benchmark is run by the pool start task after the storage containers are
+mounted and measures, on each mount, the write throughput of a test file and
+the sequential and random read throughput of the files already in the
+container (or of the test file, flagged as cached, if the container is empty).
+The test file is only written under the scratch directory of the mount, and
+the read files are a bounded sample of the sample directory (the first files
+found scanning up to MAX_SCANNED_ENTRIES entries), so the benchmark doesn't
+fill or crawl the production containers. The sequential and random reads use
+distinct files of the sample, and their pages are dropped from the page cache
+before each pass, so the random reads don't measure the cached data.
+The report is printed and uploaded as a JSON blob, named with the node id, so
+ACT can compare the mount profiles on real nodes.
+
+Only the Python standard library is used, so it runs on the stock node image.
+
+usage: python3 act_io_benchmark.py --mounts-dir DIR --container NAME=PROFILE
+                                   [--container NAME=PROFILE ...]
+                                   [--size-mb N] [--random-reads N]
+                                   [--block-kb N] [--scratch-dir DIR]
+                                   [--sample-dir DIR] [--max-files N]
+                                   [--report-url URL]
+                                   [--report-prefix PREFIX]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import time
+import urllib.parse
+import urllib.request
+
+# Size of each sequential read or write
+CHUNK_SIZE = 4 * 1024 * 1024
+# Default directory of the test files inside each mount
+TEST_DIR = '.act_benchmark'
+# Maximum number of directory entries scanned to sample the read files
+MAX_SCANNED_ENTRIES = 1000
+
+
+def list_files(path, skip_dir, max_files=16):
+    """
+    Sample the files of the mount directory, breadth first, skipping the
+    scratch directory and stopping after max_files files or
+    MAX_SCANNED_ENTRIES scanned entries (the listings of a mount are remote
+    requests).
+
+    :rtype: list<tuple(str, int)>
+    :return: path and size of each file.
+    """
+    files = []
+    scanned = 0
+    directories = [path]
+    while directories and len(files) < max_files:
+        try:
+            entries = os.scandir(directories.pop(0))
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                scanned += 1
+                if scanned > MAX_SCANNED_ENTRIES or len(files) >= max_files:
+                    return files
+                try:
+                    if entry.is_dir():
+                        if entry.path != skip_dir:
+                            directories.append(entry.path)
+                    elif entry.is_file() and entry.stat().st_size > 0:
+                        files.append((entry.path, entry.stat().st_size))
+                except OSError:
+                    continue
+    return files
+
+
+def drop_cache(files):
+    """
+    Drop the pages of the files from the page cache (if supported), so the
+    next reads go to the mount.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for (path, _) in files:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def split_files(files):
+    """
+    Split the sampled files between the sequential and the random reads, so
+    the random reads don't hit the pages read by the sequential pass (both
+    passes share the file if there is only one).
+
+    :rtype: tuple(list<tuple(str, int)>, list<tuple(str, int)>)
+    :return: the files of the sequential and of the random reads.
+    """
+    if len(files) < 2:
+        return (files, files)
+    return (files[0::2], files[1::2])
+
+
+def write_test_file(path, size):
+    """
+    Write the test file, closing it so the mount uploads it.
+
+    :rtype: float
+    :return: the write throughput in MB/s.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    chunk = os.urandom(CHUNK_SIZE)
+    init = time.perf_counter()
+    with open(path, 'wb') as file:
+        written = 0
+        while written < size:
+            file.write(chunk[:min(CHUNK_SIZE, size - written)])
+            written += CHUNK_SIZE
+        file.flush()
+        os.fsync(file.fileno())
+    return size / 1024**2 / (time.perf_counter() - init)
+
+
+def read_sequential(files, size):
+    """
+    Read the files sequentially, up to the given size.
+
+    :rtype: float
+    :return: the read throughput in MB/s.
+    """
+    total = 0
+    init = time.perf_counter()
+    for (path, _) in files:
+        with open(path, 'rb', buffering=0) as file:
+            while total < size:
+                data = file.read(CHUNK_SIZE)
+                if not data:
+                    break
+                total += len(data)
+        if total >= size:
+            break
+    elapsed = time.perf_counter() - init
+    return total / 1024**2 / elapsed if elapsed else 0
+
+
+def read_random(files, count, block_size):
+    """
+    Read blocks on random offsets of the files.
+
+    :rtype: tuple(float, float)
+    :return: the reads per second and the read throughput in MB/s.
+    """
+    random.seed(0)
+    total = 0
+    init = time.perf_counter()
+    for _ in range(count):
+        (path, size) = random.choice(files)
+        with open(path, 'rb', buffering=0) as file:
+            file.seek(random.randrange(max(1, size - block_size)))
+            total += len(file.read(block_size))
+    elapsed = time.perf_counter() - init
+    if not elapsed:
+        return (0, 0)
+    return (count / elapsed, total / 1024**2 / elapsed)
+
+
+def benchmark_mount(path, profile, args, node_id):
+    """
+    Benchmark a mounted container.
+
+    :rtype: dict
+    :return: the measured throughputs.
+    """
+    result = {'profile':profile}
+    if not os.path.isdir(path):
+        result['error'] = 'not mounted'
+        return result
+    scratch_dir = os.path.normpath(os.path.join(path, args.scratch_dir))
+    test_path = os.path.join(scratch_dir, f'{node_id}.bin')
+    size = args.size_mb * 1024**2
+    try:
+        result['writeMBps'] = round(write_test_file(test_path, size), 2)
+    except OSError as err:
+        # read only mounts (streaming)
+        result['writeError'] = str(err)
+    files = list_files(os.path.join(path, args.sample_dir), scratch_dir,
+                       args.max_files)
+    result['cached'] = not files
+    if not files and os.path.exists(test_path):
+        files = [(test_path, os.path.getsize(test_path))]
+    if files:
+        result['files'] = len(files)
+        (sequential_files, random_files) = split_files(files)
+        drop_cache(sequential_files)
+        result['seqReadMBps'] = round(read_sequential(sequential_files,
+                                                      size), 2)
+        drop_cache(random_files)
+        (iops, mbps) = read_random(random_files, args.random_reads,
+                                   args.block_kb * 1024)
+        result['randomReadIOPS'] = round(iops, 2)
+        result['randomReadMBps'] = round(mbps, 2)
+    try:
+        os.remove(test_path)
+        # remove the scratch directories left empty
+        directory = scratch_dir
+        while directory.startswith(path + os.sep):
+            os.rmdir(directory)
+            directory = os.path.dirname(directory)
+    except OSError:
+        pass
+    return result
+
+
+def upload_report(report, url, prefix):
+    """
+    Upload the report as a block blob in the container with the given SAS
+    URL.
+    """
+    (base, _, sas) = url.partition('?')
+    name = urllib.parse.quote(f"{prefix}{report['node']}.json")
+    request = urllib.request.Request(
+        f"{base.rstrip('/')}/{name}?{sas}",
+        data=json.dumps(report).encode('utf-8'), method='PUT',
+        headers={'x-ms-blob-type':'BlockBlob',
+                 'Content-Type':'application/json'})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+
+if __name__ == '__main__':
+    """
+    Run the benchmark on the mounted containers.
+    """
+    parser = argparse.ArgumentParser(description='ACT mount I/O benchmark')
+    parser.add_argument('--mounts-dir', required=True)
+    parser.add_argument('--container', action='append', required=True,
+                        metavar='NAME=PROFILE')
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--random-reads', type=int, default=256)
+    parser.add_argument('--block-kb', type=int, default=64)
+    parser.add_argument('--scratch-dir', default=TEST_DIR)
+    parser.add_argument('--sample-dir', default='')
+    parser.add_argument('--max-files', type=int, default=16)
+    parser.add_argument('--report-url')
+    parser.add_argument('--report-prefix', default='')
+    args = parser.parse_args()
+
+    node_id = os.environ.get('AZ_BATCH_NODE_ID', socket.gethostname())
+    report = {'node':node_id, 'time':time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                                   time.gmtime()),
+              'containers':{}}
+    for container in args.container:
+        (name, _, profile) = container.partition('=')
+        path = os.path.join(args.mounts_dir, name)
+        try:
+            report['containers'][name] = benchmark_mount(path, profile, args,
+                                                         node_id)
+        except Exception as err:
+            report['containers'][name] = {'profile':profile,
+                                          'error':str(err)}
+    print(json.dumps(report, indent=2))
+    if args.report_url:
+        upload_report(report, args.report_url, args.report_prefix)
@@ -0,0 +1,374 @@
+"""
+Author: Pablo Viana
+Version: 1.0
+Created: 2026/10/19
+
+ACT input prefetch agent - runs on the Azure Batch compute nodes.
+
+The agent is started in background by the pool start task and downloads the
+inputs of the Tasks queued after the last Task started on the node into a
+bounded cache on the node local disk, evicting the least recently used files.
+The Batch Service only assigns a queued Task to a node when it is dispatched,
+so the agent follows the submission order of the inputs manifest uploaded by
+ACT, prefetching the next inputs after the ones being started on its node.
+The manifest has the node assigned to each input (the node affinity of its
+Task), and each agent only prefetches the inputs assigned to its node.
+
+The Tasks call the resolve command to get the path to be used for their input:
+the local cached path if it was already staged, otherwise the original path
+through the storage mount or, if the container is not mounted, the input
+downloaded into the cache, after making room for it. The inputs of the last
+started Tasks are not evicted, so a resolved path is still there when its Task
+opens it.
+
+Only the Python standard library is used, so it runs on the stock node image.
+
+usage: python3 act_prefetch_agent.py agent --manifest-url URL --input-url URL
+                                     --cache DIR [--max-bytes N]
+                                     [--lookahead N] [--interval S]
+                                     [--node-id ID] [--protect-started N]
+       python3 act_prefetch_agent.py resolve --cache DIR [--fallback PREFIX]
+                                     INPUT
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+# Size of each read from the storage when downloading the inputs
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Number of loops between each manifest refresh
+MANIFEST_REFRESH_LOOPS = 30
+# File of the cache with the agent settings (input container URL, cache size
+# and protected inputs), for the downloads of the resolve command on a miss
+SETTINGS_FILE = 'settings.json'
+
+
+class PrefetchCache:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Bounded cache of input files on the node local disk. The files keep the
+    input blob name as their path inside the cache directory. Complete files
+    are renamed into place, so a file in the cache is always fully staged.
+    The inputs of the last started Tasks are never evicted.
+    """
+    def __init__(self, path, max_bytes=0, protect_started=1):
+        """
+        Prefetch cache constructor.
+
+        :params str path: directory of the cache.
+        :params int max_bytes: maximum size of the cached files (0 = no limit).
+        :params int protect_started: number of the last started inputs that
+        can't be evicted (the Tasks running on the node).
+        """
+        self.path = path
+        self.files_path = os.path.join(path, 'files')
+        self.started_path = os.path.join(path, 'started')
+        self.settings_path = os.path.join(path, SETTINGS_FILE)
+        self.max_bytes = max_bytes
+        self.protect_started = protect_started
+
+
+    def get_file_path(self, name):
+        """
+        Get the path of the given input in the cache.
+        """
+        return os.path.join(self.files_path, name.lstrip('/'))
+
+
+    def resolve(self, name, fallback=''):
+        """
+        Get the path to be used by a Task for the given input, registering the
+        input as started on this node. A hit refreshes the file usage time. On
+        a miss without fallback (the container is not mounted) the input is
+        downloaded into the cache.
+
+        :params str name: the input blob name.
+        :params str fallback: prefix of the original path, used if the input
+        is not staged.
+        :rtype: str
+        :return: the cached path or the original path.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.started_path, 'a') as file:
+            file.write(name + '\n')
+        path = self.get_file_path(name)
+        try:
+            os.utime(path)
+            return path
+        except OSError:
+            pass
+        if fallback:
+            return f'{fallback}{name}'
+        with open(self.settings_path, 'r') as file:
+            settings = json.load(file)
+        self.max_bytes = settings['maxBytes']
+        self.protect_started = settings['protectStarted']
+        self.download(name, get_blob_url(settings['inputUrl'], name),
+                      reserve=True)
+        return path
+
+
+    def save_settings(self, input_url):
+        """
+        Save the input container URL and the cache settings for the downloads
+        of the resolve command.
+        """
+        partial = f'{self.settings_path}.{os.getpid()}'
+        with open(partial, 'w') as file:
+            json.dump({'inputUrl':input_url, 'maxBytes':self.max_bytes,
+                       'protectStarted':self.protect_started}, file)
+        os.chmod(partial, 0o644)
+        os.replace(partial, self.settings_path)
+
+
+    def get_started(self):
+        """
+        Get the last inputs started on this node, in start order.
+
+        :rtype: list<str>
+        """
+        try:
+            with open(self.started_path, 'rb') as file:
+                file.seek(0, os.SEEK_END)
+                file.seek(max(0, file.tell() - 4096))
+                return file.read().decode('utf-8', 'replace').splitlines()
+        except OSError:
+            return []
+
+
+    def get_last_started(self, names):
+        """
+        Get the last input started on this node among the given inputs (the
+        Task affinity is a hint, so other inputs may be started on the node).
+
+        :params names: the inputs assigned to this node.
+        :type names: dict<str:int>
+        """
+        for line in reversed(self.get_started()):
+            if line in names:
+                return line
+        return None
+
+
+    def get_started_paths(self):
+        """
+        Get the cached paths of the last started inputs (protect_started), as
+        the inputs just resolved by their Tasks.
+
+        :rtype: set<str>
+        """
+        paths = set()
+        for line in reversed(self.get_started()):
+            if len(paths) >= self.protect_started:
+                break
+            paths.add(self.get_file_path(line))
+        return paths
+
+
+    def list_files(self):
+        """
+        List the cached files.
+
+        :rtype: list<tuple(float, int, str)>
+        :return: usage time, size and path of each cached file.
+        """
+        files = []
+        for (dirpath, dirnames, filenames) in os.walk(self.files_path):
+            for filename in filenames:
+                if filename.endswith('.part'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+
+    def reserve(self, size, protected):
+        """
+        Evict the least recently used files until there is room for a new
+        file with the given size. The inputs of the last started Tasks are
+        not evicted.
+
+        :params int size: size of the file to be included.
+        :params protected: paths that can't be evicted (the lookahead window).
+        :type protected: set<str>
+        :rtype: bool
+        :return: True if there is room for the file.
+        """
+        if not self.max_bytes:
+            return True
+        if size > self.max_bytes:
+            return False
+        protected = protected | self.get_started_paths()
+        files = sorted(self.list_files())
+        used = sum([file[1] for file in files])
+        for (mtime, file_size, path) in files:
+            if used + size <= self.max_bytes:
+                break
+            if path in protected:
+                continue
+            try:
+                os.remove(path)
+                used -= file_size
+                # the resolve command prints only the path on stdout
+                print(f'Evicted: {path}', file=sys.stderr)
+            except OSError:
+                pass
+        return used + size <= self.max_bytes
+
+
+    def download(self, name, url, reserve=False):
+        """
+        Download the input from the given URL into the cache.
+
+        :params str name: the input blob name.
+        :params str url: the input blob URL (with SAS token).
+        :params bool reserve: make room for the input first, with the size
+        reported by the storage. Without room, the input is still downloaded
+        (the Task can't run without it).
+        """
+        path = self.get_file_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # the agent and a resolve on a miss may download the same input
+        partial = f'{path}.{os.getpid()}.part'
+        with urllib.request.urlopen(url) as response:
+            if reserve:
+                size = int(response.headers.get('Content-Length') or 0)
+                if not self.reserve(size, set()):
+                    print(f'No room to stage: {name} ({size} bytes)',
+                          file=sys.stderr)
+            with open(partial, 'wb') as file:
+                while True:
+                    chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    file.write(chunk)
+        os.replace(partial, path)
+
+
+def get_blob_url(container_url, name):
+    """
+    Get the URL of a blob in the container with the given SAS URL.
+    """
+    (base, _, sas) = container_url.partition('?')
+    return f"{base.rstrip('/')}/{urllib.parse.quote(name)}?{sas}"
+
+
+def read_manifest(url, node_id):
+    """
+    Read the inputs manifest, one input per line with its name, size and
+    assigned node id (empty if not assigned) separated by tab, keeping the
+    inputs assigned to the given node.
+
+    :params str node_id: the id of this node.
+    :rtype: list<tuple(str, int)>
+    :return: the inputs of the node in submission order.
+    """
+    inputs = []
+    with urllib.request.urlopen(url) as response:
+        for line in response.read().decode('utf-8').splitlines():
+            if not line:
+                continue
+            (name, size, node) = (line.split('\t') + [''])[:3]
+            if node == node_id:
+                inputs.append((name, int(size or 0)))
+    return inputs
+
+
+def stage_inputs(cache, window, input_url, attempted):
+    """
+    Stage the inputs of the lookahead window not staged yet. The inputs
+    without room or failed are tried again on the following loops.
+
+    :params cache: the prefetch cache.
+    :type cache: `PrefetchCache`
+    :params window: the inputs after the last one started on this node.
+    :type window: list<tuple(str, int)>
+    :params str input_url: the input container URL (with SAS token).
+    :params attempted: the inputs already staged, updated with the new ones.
+    :type attempted: set<str>
+    """
+    protected = set([cache.get_file_path(name) for (name, _) in window])
+    for (name, size) in window:
+        # inputs already staged (even if consumed by a Task) are skipped
+        if name in attempted:
+            continue
+        if not cache.reserve(size, protected):
+            print(f'No room to stage: {name} ({size} bytes)')
+            continue
+        try:
+            init = time.time()
+            cache.download(name, get_blob_url(input_url, name))
+            attempted.add(name)
+            print(f'Staged: {name} ({size} bytes) in '\
+                  f'{time.time()-init:.3f} s')
+        except Exception as err:
+            print(f'Failed to stage {name}: {err}')
+
+
+def run_agent(args):
+    """
+    Prefetch loop: stage the inputs after the last one started on this node.
+    """
+    # the staged files are used (and removed) by the Tasks users
+    os.umask(0)
+    cache = PrefetchCache(args.cache, args.max_bytes, args.protect_started)
+    os.makedirs(cache.files_path, exist_ok=True)
+    cache.save_settings(args.input_url)
+    inputs, positions = [], {}
+    attempted = set()
+    loop = 0
+    while True:
+        if loop % MANIFEST_REFRESH_LOOPS == 0:
+            try:
+                inputs = read_manifest(args.manifest_url, args.node_id)
+                positions = {name:idx for (idx, (name, _)) in enumerate(inputs)}
+            except Exception as err:
+                print(f'Failed to read manifest: {err}')
+        loop += 1
+
+        last = cache.get_last_started(positions)
+        start = positions[last] + 1 if last in positions else 0
+        window = inputs[start:start + args.lookahead]
+        stage_inputs(cache, window, args.input_url, attempted)
+        sys.stdout.flush()
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    """
+    Redirects the main execution to the agent or resolve command.
+    """
+    parser = argparse.ArgumentParser(description='ACT input prefetch agent')
+    commands = parser.add_subparsers(dest='command', required=True)
+    agent = commands.add_parser('agent', help='run the prefetch loop.')
+    agent.add_argument('--manifest-url', required=True)
+    agent.add_argument('--input-url', required=True)
+    agent.add_argument('--cache', required=True)
+    agent.add_argument('--max-bytes', type=int, default=0)
+    agent.add_argument('--lookahead', type=int, default=8)
+    agent.add_argument('--interval', type=float, default=2)
+    agent.add_argument('--node-id',
+                       default=os.environ.get('AZ_BATCH_NODE_ID', ''))
+    agent.add_argument('--protect-started', type=int, default=1)
+    resolve = commands.add_parser('resolve', help='print the path to use'\
+                                  ' for the input.')
+    resolve.add_argument('--cache', required=True)
+    resolve.add_argument('--fallback', default='')
+    resolve.add_argument('input')
+    args = parser.parse_args()
+
+    if args.command == 'agent':
+        run_agent(args)
+    else:
+        print(PrefetchCache(args.cache).resolve(args.input, args.fallback))
@@ -5,7 +5,9 @@ Created: 2021/11/15
 
 Azure custom tasks - Act v1.0
 
-usage: python3 azure_custom_tasks.py  [-j JSON] [-i INPUT] [-xslcedrwfyvh] [-sI] [-sO] [-sS] [-sT] [-dI]
+usage: python3 azure_custom_tasks.py  [-j JSON] [-i INPUT] [-xstlcedrmakwfyuvh] [-sI] [-sO] [-sS] [-sT] [-dI] [-aR] [-oI FILE] [--sync]
+       [-lS STATE] [-lJ PREFIX] [-lT PREFIX] [-lF FORMAT] [-lO FILE] [-lN N] [-bR]
+       [-gL FILE] [-gT PREFIX] [--watch] [--log-level LEVEL] [--detail FILE]
 
 Azure Custom Tasks - ACT v1.0 - Uses Azure Batch Account to execute Batch Tasks
 based on customized parameters contained in the configurations file. This file
@@ -14,6 +16,10 @@ preffix of the blobs to be used as inputs and many other parameters. These
 parameters are used to create the Batch Pool, Job and Tasks to run
 asynchronously on the Microsoft Azure cloud environment.
 
+The same operations are available to other Python programs through the
+ActSession class, which returns structured results instead of printing them
+and reuses the Batch and storage clients across the sessions of a process.
+
 options:
   -h, --help            show this help message and exit
   -j JSON, --json JSON  use the specified JSON file as the configuration file.
@@ -35,16 +41,54 @@ options:
                         the input string itself, (2) the input size, and (3) the
                         required computing slots for this input, only the first
                         parameter is required, the other parameters are optional
-                        with default value 0 and 1, respectively.
+                        with default value 0 and 1, respectively. Files with
+                        .tsv extension are tab separated, .gz and .zst files
+                        are decompressed, and .parquet, .arrow or .feather
+                        files have these three columns.
+  -oI FILE, --save-inputs FILE
+                        save the input list (input string, size and required
+                        slots) on FILE, in the format given by its extension,
+                        to be used again with -i.
   -s, --show            show the debug information about the current execution:
                         inputs, outputs, scripts and Tasks' commands.
   -sI, --show-inputs    show the corresponding blobs from the configured input.
   -sO, --show-outputs   show the corresponding blobs from the configured output.
   -sS, --show-scripts   show the corresponding blobs from the configured scripts.
   -sT, --show-tasks     show the Tasks' commandLine for each Task.
+  -u, --upload          upload the local scripts and inputs directories to the
+                        configured containers, skipping the unchanged files.
+                        With -x, the upload runs while the Pool is created.
   -dI, --delete-inputs  delete the corresponding blobs from configured input.
+  -t, --check           check the configuration file, loading and validating
+                        it, and exit.
   -l, --list            list Tasks by their states.
+  -lS STATE, --list-state STATE
+                        list only the Tasks on STATE.
+  -lJ PREFIX, --list-job-prefix PREFIX
+                        list only the Jobs with id starting with PREFIX.
+  -lT PREFIX, --list-task-prefix PREFIX
+                        list only the Tasks with id starting with PREFIX.
+  -lF FORMAT, --list-format FORMAT
+                        list in the FORMAT: table (default), jsonl or csv.
+  -lO FILE, --list-output FILE
+                        write the list on FILE.
+  -lN N, --list-limit N
+                        list at most N Tasks.
+  -gL FILE, --harvest-logs FILE
+                        download the uploaded Tasks logs concurrently, extract
+                        their phase timings with the configured extractors
+                        into FILE (JSON lines, or a table if FILE ends with
+                        .csv) and summarize where the Tasks time goes.
+  -gT PREFIX, --harvest-task-prefix PREFIX
+                        harvest only the logs of the Tasks with id starting
+                        with PREFIX.
+  --watch               watch the input container, submitting a Task for each
+                        new input blob to the configured Job in micro-batches,
+                        until interrupted. The watermark is persisted, so the
+                        watch can be restarted.
   -c, --count           count Tasks by their states.
+  --sync                refresh the local mirror of the configured Job Tasks
+                        with the Tasks changed since the last sync.
   -d, --disable         disable the current Job and all associated Tasks,
                         returning the Tasks that are running to the end of the
                         execution queue. Cannot add new Tasks while the Job is
@@ -53,12 +97,33 @@ options:
                         restarting the Task's allocation to the execution queue
                         and the execution of the Tasks in the queue.
   -r, --reactivate      reactivate all failed Tasks to re-queue them.
+  -m, --monitor         monitor the allocation of the Pool nodes, reporting the
+                        time to the first idle node and to the full capacity,
+                        and handling the nodes with failed start task.
+  -a, --advise          run the inputs sample on trial Pools of the advisor
+                        candidates vmSize and taskSlotsPerNode, recording the
+                        Tasks runtime and peak memory on the advisor trace
+                        file, and rank the configurations.
+  -aR, --advise-rank    rank the advisor configurations from the recorded
+                        trace file, without running trials.
+  -bR, --benchmark-report
+                        show the mount I/O benchmark reports of the configured
+                        Pool nodes.
+  -k, --calibrate       calibrate the Tasks required slots from the resource
+                        usage of the running and completed Tasks, replacing the
+                        active Tasks with corrected required slots.
   -w, --wait            wait all tasks to complete while showing the current
                         progress.
   -f, --free            terminate the batch and free its resources (deleting all
                         Pools, Jobs and Tasks from the Batch Account)
   -y, --yes             include this to --free command to confirm deletion
                         without requiring user confirmation.
+  --log-level LEVEL     report the per item messages (inputs, outputs, Tasks
+                        commands, skipped items) from LEVEL: debug (all the
+                        items), info (a sample of each category, the
+                        default), warning or error.
+  --detail FILE         write all the per item messages on FILE, as JSON
+                        lines (compressed if FILE ends with .gz or .zst).
   -v, --version         show ACT version number and exit.
 
 """
@@ -74,919 +139,6121 @@ options:
 
 import argparse
 
+import atexit
+import builtins
+import collections
+import concurrent.futures
 import copy
+import csv
+import gzip
+import hashlib
+import importlib
+import io
+import itertools
 import json
+import math
+import os
+import queue
 import random
+import re
+import shlex
+import sqlite3
+import sys
+import threading
+from array import array
 from types import SimpleNamespace
-import azure.storage.blob as blobstorage
 
 import time
 import datetime
-import azure.batch.models as batchmodels
-from azure.batch import BatchServiceClient
-from azure.batch.batch_auth import SharedKeyCredentials
-from azure.batch.models import (
-    OutputFileUploadCondition,
-    AzureBlobFileSystemConfiguration as BlobFileSysConfig
-    )
+import email.utils
 
 
-class AzureBatchUtils:
+class LazyModule:
     """
     Author: Pablo Viana
     Version: 1.0
-    Created: 2021/12/13
+    Created: 2026/10/19
 
-    Utility class to create Azure Batch pool, jobs and tasks.
+    Module imported on the first access to one of its attributes. The Azure
+    SDK modules are only imported when a command uses them, so the commands
+    that don't interact with the cloud (-h, -v, dry runs) start fast.
     """
-    def __init__(self, config):
+    def __init__(self, name):
         """
-        Azure Batch constructor.
+        Lazy module constructor.
+
+        :params str name: the full module name.
         """
-        self.config = config
-        # Create a Batch service client. We'll now be interacting with
-        # the Batch service
-        batch_credentials = SharedKeyCredentials(self.config.batch.accountName,
-                                                 self.config.batch.accountKey)
-        batch_client = BatchServiceClient(credentials=batch_credentials,
-                                          batch_url=self.config.batch.accountUrl)
-        self.batch_service_client = batch_client
+        self._name = name
+        self._module = None
 
 
-    def get_config_pool(self):
+    def is_loaded(self):
         """
-        Check if exists a pool with the configured id.
-        :rtype: `azure.batch.models.CloudPool`
-        :return: The configured Pool object or None if it doesn't exist.
+        Check if the module was already imported.
         """
-        for pool in self.batch_service_client.pool.list():
-            if (pool.id == self.config.pool.id):
-                return pool
-        return None
+        return self._module is not None
 
 
-    def create_pool(self):
+    def __getattr__(self, attribute):
         """
-        Create a pool of compute nodes with the specified configuration options.
+        Import the module (once) and get the attribute from it.
         """
-        # Check if already exists a pool with the configured id, exits if True
-        if self.get_config_pool():
-            print(f'Pool [{self.config.pool.id}] already exists...')
-            print()
-            return
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
 
-        print(f'Creating pool [{self.config.pool.id}]...')
-        # Create a new pool of Linux compute nodes using an Azure Virtual
-        # Machines Marketplace image. For more information about creating pools
-        # of Linux nodes, see:
-        # https://azure.microsoft.com/documentation/articles/batch-linux-nodes/
-        new_pool = batchmodels.PoolAddParameter(
-            id=self.config.pool.id,
-            vm_size=self.config.pool.vmSize,
-            target_dedicated_nodes=self.config.pool.dedicatedNodeCount,
-            target_low_priority_nodes=self.config.pool.lowPriorityNodeCount,
-            task_slots_per_node=self.config.pool.taskSlotsPerNode
-            )
-        # Set the Virtual Machine Configuration for the pool nodes
-        vmConfiguration = self.config.pool.vmConfiguration
-        virtual_machine_configuration=batchmodels.VirtualMachineConfiguration(
-            image_reference=batchmodels.ImageReference(
-                publisher=vmConfiguration.imageReference.publisher,
-                offer=vmConfiguration.imageReference.offer,
-                sku=vmConfiguration.imageReference.sku,
-                version=vmConfiguration.imageReference.version,
-                ),
-            node_agent_sku_id=vmConfiguration.nodeAgentSKUId
-            )
-        # If configured to use Ephemeral OS Disk set it on the VM configuration
-        if self.config.pool.useEphemeralOSDisk:
-            virtual_machine_configuration.os_disk=batchmodels.OSDisk(
-                ephemeral_os_disk_settings=batchmodels.DiffDiskSettings(
-                    placement=batchmodels.DiffDiskPlacement.cache_disk
-                    )
-                )
-        # Add the Virtual Machine Configuration to the pool
-        new_pool.virtual_machine_configuration = virtual_machine_configuration
 
-        # Set node auto scale parameters
-        nodeAutoScale = self.config.pool.nodeAutoScale
-        if nodeAutoScale.include:
-            new_pool.enable_auto_scale = nodeAutoScale.include
-            new_pool.auto_scale_formula = ";".join(nodeAutoScale.formula)
-            interval = datetime.timedelta(
-                minutes=nodeAutoScale.evaluationIntervalInMinutes
-                )
-            new_pool.auto_scale_evaluation_interval = interval
+blobstorage = LazyModule('azure.storage.blob')
+batchmodels = LazyModule('azure.batch.models')
+batch = LazyModule('azure.batch')
+batch_auth = LazyModule('azure.batch.batch_auth')
 
-        # Configure the storage mount for the pool
-        nodeStorage = self.config.pool.nodeStorageContainers
-        if nodeStorage.mount:
-            mount_configurations = []
-            for node_container in nodeStorage.containers:
-                mount_configurations.append(batchmodels.MountConfiguration(
-                    azure_blob_file_system_configuration = BlobFileSysConfig(
-                        account_name = self.config.storage.accountName,
-                        sas_key = self.config.storage.accountSASToken,
-                        container_name = node_container.name,
-                        relative_mount_path = node_container.name,
-                        blobfuse_options = node_container.blobfuseOptions
-                        )
-                    )
-                )
-            new_pool.mount_configuration = mount_configurations
-        # Add Applications
-        if self.config.pool.applications.include:
-            applications = []
-            for config_application in self.config.pool.applications.references:
-                applications.append(batchmodels.ApplicationPackageReference(
-                    application_id = config_application.id,
-                    version = config_application.version
-                    )
-                )
-            new_pool.application_package_references = applications
-        # Configure the start task for the pool
-        if self.config.pool.startupTask.include:
-            new_pool.start_task=batchmodels.StartTask(
-                command_line=f'/bin/bash -c "'\
-                             f'{self.config.pool.startupTask.command}"',
-                wait_for_success=True,
-                user_identity=batchmodels.UserIdentity(
-                    auto_user=batchmodels.AutoUserSpecification(
-                        scope=batchmodels.AutoUserScope.pool,
-                        elevation_level=batchmodels.ElevationLevel.admin
-                        )
-                    )
-                )
-        # Add the pool on the Batch Account
-        self.batch_service_client.pool.add(new_pool)
-        print('Pool created!')
-        print()
+class SessionOutput:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
 
+    Output of the operations of a session (config.output): the messages are
+    printed on the terminal, pausing between the steps (the command line),
+    or sent to the log function, without pauses (the ActSession
+    operations). The copies of the configuration share it, so the
+    operations and their worker threads write on their own session output.
+    """
+    def __init__(self, log=None, pauses=True):
+        """
+        Session output constructor.
 
-    def get_config_job(self):
+        :params log: function receiving each message (printed on the
+        terminal if None).
+        :params bool pauses: pause between the steps.
         """
-        Check if exists a job with the configured id.
-        :rtype: `azure.batch.models.CloudJob`
-        :return: The configured Job object or None if it doesn't exist.
+        self.log = log
+        self.pauses = pauses
+
+
+    def __deepcopy__(self, memo):
         """
-        for job in self.batch_service_client.job.list():
-            if (job.id == self.config.job.id):
-                return job
-        return None
+        The copies of the configuration share the output.
+        """
+        return self
 
 
-    def create_job(self):
+    def print(self, *args, sep=' ', end='\n', flush=False):
         """
-        Create a job with the configured id and associate with configured pool.
+        Print the message on the session output.
         """
-        # Check if already exists a job with the configured id, exits if True
-        if self.get_config_job():
-            print(f'Job [{self.config.job.id}] already exists...')
-            print()
+        if self.log is None:
+            builtins.print(*args, sep=sep, end=end, flush=flush)
             return
-
-        print(f'Creating job [{self.config.job.id}]...')
-        # Create the job associating it with the configured pool
-        job = batchmodels.JobAddParameter(
-            id=self.config.job.id,
-            pool_info=batchmodels.PoolInformation(pool_id=self.config.pool.id)
-            )
-        # Add the job on the Batch Account
-        self.batch_service_client.job.add(job)
-        print('Job created!')
-        print()
+        message = sep.join([str(arg) for arg in args])
+        if message:
+            self.log(message)
 
 
-    def enable_job_tasks(self):
+    def pause(self, seconds):
         """
-        Enable the job with configured id to receive new Tasks and starts
-        execution.
+        Pause between the steps, so the terminal output can be followed.
         """
-        if not self.get_config_job():
-            print(f"Job [{self.config.job.id}] doesn't exists...")
-            print()
-            return
-        # Enable the job on the Batch Account
-        self.batch_service_client.job.enable(job_id=self.config.job.id)
+        if self.pauses:
+            time.sleep(seconds)
 
 
-    def disable_job_tasks(self):
+class ContainerClients:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Storage container clients shared by the process, one for each container
+    SAS URL (and client options), so the commands and the sessions of the
+    same process reuse their connections.
+    """
+    _clients = {}
+    _clients_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, container_url, **kwargs):
         """
-        Disable the job with configured id, halting the Tasks execution,
-        requeueing them and stoping it from receiving new Tasks.
+        Get the client of the container with the given SAS URL.
+
+        :params str container_url: the container SAS URL.
+        :rtype: `azure.storage.blob.ContainerClient`
         """
-        if not self.get_config_job():
-            print(f"Job [{self.config.job.id}] doesn't exists...")
-            print()
-            return
-        # Disable the job on the Batch Account
-        self.batch_service_client.job.disable(
-            job_id=self.config.job.id,
-            disable_tasks=batchmodels.DisableJobOption.requeue)
+        key = (container_url, tuple(sorted(kwargs.items())))
+        with cls._clients_lock:
+            if key not in cls._clients:
+                cls._clients[key] = \
+                    blobstorage.ContainerClient.from_container_url(
+                        container_url=container_url, **kwargs)
+            return cls._clients[key]
+
+# File name suffix of each output packing compression
+PACKING_SUFFIX = {'gzip':'.gz', 'zstd':'.zst'}
+# Name of the bundle with the packed outputs in the Task working directory
+PACKING_BUNDLE = 'act_outputs'
+
+# Python wrapper that runs a command and prints its peak memory on stderr
+PEAK_MEMORY_MARKER = 'ACT_PEAK_RSS_KB'
+PEAK_MEMORY_WRAPPER = 'import resource,subprocess,sys;'\
+                      'rc=subprocess.call(sys.argv[1:]);'\
+                      f'print("{PEAK_MEMORY_MARKER}",resource.getrusage('\
+                      'resource.RUSAGE_CHILDREN).ru_maxrss,file=sys.stderr);'\
+                      'sys.exit(rc)'
+
+# File written by the Tasks with their incremental stamp, uploaded on success
+STAMP_FILE = 'act_stamp.json'
+
+# Maximum number of Tasks on each add collection request of the Batch Service
+MAX_TASKS_PER_COLLECTION = 100
+# Delay, in seconds, of the job Task counts after a submission: a job without
+# Tasks is only considered completed after it
+TASK_COUNTS_DELAY = 30
+
+# Blobfuse mount profiles: the default settings of each profile, which can be
+# overridden on each node storage container
+BLOBFUSE_PROFILES = {
+    'streaming-read':{'cacheSizeInMB':4096, 'blockSizeInMB':16,
+                      'maxBlocksPerFile':64, 'maxConcurrency':32,
+                      'attrTimeoutInSeconds':240},
+    'random-read':{'cacheSizeInMB':0, 'cacheTimeoutInSeconds':7200,
+                   'maxConcurrency':32, 'attrTimeoutInSeconds':240},
+    'write-heavy':{'cacheSizeInMB':0, 'cacheTimeoutInSeconds':0,
+                   'maxConcurrency':64, 'attrTimeoutInSeconds':0}}
+# Blobfuse cache directory on the node resource (ephemeral) disk
+BLOBFUSE_CACHE_PATH = '/mnt/act_blobfuse'
+# Mount I/O benchmark script, run by the pool start task
+IO_BENCHMARK_SCRIPT = 'act_io_benchmark.py'
+
+# Input prefetch agent script and its location on the compute nodes
+PREFETCH_AGENT_SCRIPT = 'act_prefetch_agent.py'
+PREFETCH_AGENT_DIR = '$AZ_BATCH_NODE_SHARED_DIR/act'
+
+
+class Reporter:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Reports the per item messages of the input and submission loops (the
+    showed inputs, outputs and Tasks commands, and the skipped or failed
+    items). The items are counted by category and only a sample of each
+    category is printed: the first samplesPerCategory items and then at
+    most one every sampleIntervalInSeconds. The counters are summarized at
+    the end of each phase. With the debug level all the items are printed,
+    and the items below the configured level are only counted. All the
+    items can be written to the detailPath file, as JSON lines, compressed
+    if the file name ends with .gz or .zst.
+    """
+    LEVELS = {'debug':10, 'info':20, 'warning':30, 'error':40}
 
+    def __init__(self, reporting, output):
+        """
+        Reporter constructor.
 
-    def reactivate_job_failed_tasks(self):
+        :params reporting: the reporting configuration.
+        :type reporting: `types.SimpleNamespace`
+        :params output: the output of the session.
+        :type output: `SessionOutput`
         """
-        Reactivate the failed tasks on the job with configured id,
-        requeueing them.
+        self.output = output
+        self.level = self.LEVELS[reporting.level]
+        self.samples = reporting.samplesPerCategory
+        self.interval = reporting.sampleIntervalInSeconds
+        self.detail_path = reporting.detailPath
+        self._detail = None
+        self._lock = threading.Lock()
+        # count, printed count and last print time of each category
+        self.counters = {}
+
+
+    def __deepcopy__(self, memo):
         """
-        if not self.get_config_job():
-            print(f"Job [{self.config.job.id}] doesn't exists...")
-            print()
-            return
-        # Set filter option to failed Tasks (ne -> not equals)
-        count_reactivated_tasks = 0
-        filter_option = "executionInfo/exitCode ne 0"
-        options = batchmodels.TaskListOptions(filter=filter_option)
-        batch_tasks = self.batch_service_client.task
-        for task in batch_tasks.list(job_id=self.config.job.id,
-                                     task_list_options=options):
-            count_reactivated_tasks += 1
-            print(f"{task.id}: {task.command_line}")
-            self.batch_service_client.task.reactivate(job_id=self.config.job.id,
-                                                      task_id=task.id)
-        return count_reactivated_tasks
+        The copies of the configuration (the accounts and the dedicated
+        capacity) share the reporter.
+        """
+        return self
 
 
-    def get_job_task_counts(self):
+    def item(self, category, message, level='info'):
         """
-        Count the Tasks on the job with configured id.
-        :rtype: `azure.batch.models.TaskCounts`
-        :return: The TaskCounts object from the configured job
+        Report an item, printing it if it is sampled.
+
+        :params str category: the item category.
+        :params str message: the item message.
+        :params str level: the item level.
         """
-        if self.get_config_job():
-            count = self.batch_service_client.job.get_task_counts(
-                job_id=self.config.job.id).task_counts
-        else:
-            count = batchmodels.TaskCounts(active=0, running=0, completed=0,
-                                           succeeded=0, failed=0)
-        count.total = count.active + count.running + count.completed
-        return count
+        now = time.time()
+        with self._lock:
+            counter = self.counters.setdefault(category, [0, 0, 0])
+            counter[0] += 1
+            show = self.LEVELS[level] >= self.level and (
+                self.level <= self.LEVELS['debug'] or
+                counter[1] < self.samples or
+                now - counter[2] >= self.interval)
+            if show:
+                counter[1] += 1
+                counter[2] = now
+            if self.detail_path:
+                self.write_detail({'time':now, 'level':level,
+                                   'category':category, 'message':message})
+        if show:
+            self.output.print(message)
+
+
+    def write_detail(self, record):
+        """
+        Write the item on the detail file, opened on the first item.
+        """
+        if self._detail is None:
+            (_, compression) = InputManifest.get_format(self.detail_path)
+            self._detail = InputManifest.open_text(self.detail_path, 'w',
+                                                   compression)
+            # the compressed files are only valid after closed
+            atexit.register(self.close)
+        self._detail.write(json.dumps(record) + '\n')
 
 
-    def count_job_tasks(self):
+    def summary(self, phase):
         """
-        Get count information about tasks on the configured Job.
+        Print the counters of the reported items and reset them.
 
-        :rtype: (int, int)
-        :return: total task count and completed task count.
+        :params str phase: the name of the finished phase.
         """
-        # Get the tasks count on the configured JOB_ID
-        task_counts = self.get_job_task_counts()
-        return (task_counts.total, task_counts.completed)
+        with self._lock:
+            (counters, self.counters) = (self.counters, {})
+            if self._detail:
+                self._detail.flush()
+        if not counters or self.level > self.LEVELS['warning']:
+            return
+        self.output.print(f'{phase} summary:')
+        for (category, (count, shown, _)) in counters.items():
+            hidden = f' ({count-shown} not shown)' if count > shown else ''
+            self.output.print(f'  {category}: {count}{hidden}')
+        if self.detail_path:
+            self.output.print(f'  All the items on {self.detail_path}')
+        self.output.print()
 
 
-    def filter_input_list_by_existing_tasks(self, input_list):
+    def close(self):
         """
-        Filter the input list, removing the inputs that are already set on an
-        existing Task.
-        :params input_list: the original input list
-        :type input_list: list<tuple(str, int, int)>
-        :rtype: list<tuple(str, int, int)>
-        :return: The filtered input list.
+        Close the detail file.
         """
-        all_tasks_command = {}
-        cfg_job = self.get_config_job()
-        # Set all_tasks_command with commands of all tasks on the configured job
-        if cfg_job:
-            for task in self.batch_service_client.task.list(job_id=cfg_job.id):
-                all_tasks_command[task.command_line] = task.id
+        with self._lock:
+            if self._detail:
+                self._detail.close()
+                self._detail = None
 
-        # Creates a filtered input list removing the inputs that already have a
-        # task running the associated command
-        filtered_input_list = []
-        for input in input_list:
-            cmd = f'/bin/bash -c "{self.config.tasks.command} \'{input[0]}\'"'
-            if cmd in all_tasks_command:
-                print(f'* Already exists in {all_tasks_command[cmd]} the '\
-                      f'command: {cmd}')
-            else:
-                filtered_input_list.append(input)
-        print()
-        time.sleep(5)
-        # returns the filtered list
-        return filtered_input_list
 
+class InputManifest:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Input manifest, the input items with their optional size and required
+    slots. The manifest files are read as streams: CSV (default) or TSV text
+    with proper quoting, optionally compressed with gzip (.gz) or zstd (.zst),
+    and Parquet (.parquet) or memory-mapped Arrow (.arrow, .feather) files.
+    Each row (or record) has the input string, the input size and the
+    required slots, only the input string is required.
+    The items are stored compactly, the names in a list and the sizes and
+    slots in typed arrays, with an index to find the items by name.
+    """
+    # Size of the buffer used to read the text manifests
+    READ_BUFFER_SIZE = 8 * 1024 * 1024
+    # Number of records read at once from the Parquet files
+    BATCH_SIZE = 65536
+    # Columns of the Parquet and Arrow files
+    COLUMNS = ['name', 'size', 'slots']
 
-    def create_task_output_file(self, file_pattern, destination_path,
-                                upload_condition):
+    def __init__(self):
         """
-        Create an OutputFile to retrieve files from computing nodes after
-        Task execution.
-
-        :params str file_pattern: pattern to match the files to retrieve.
-        :params str destination_path: path on configured output container to
-        place the files.
-        :params upload_condition: condition to upload the output file,
-        must be task_completion, task_success or task_failure.
-        :type upload_condition: `azure.batch.models.OutputFileUploadCondition`
-        :rtype: `azure.batch.models.OutputFile`
-        :return: the OutputFile to include in Tasks for retrieval.
+        Input manifest constructor, creating an empty manifest.
         """
-        return batchmodels.OutputFile(
-            file_pattern=file_pattern,
-            destination=batchmodels.OutputFileDestination(
-                container=batchmodels.OutputFileBlobContainerDestination(
-                    container_url=self.config.output_container_url,
-                    path=destination_path
-                    )
-                ),
-            upload_options=batchmodels.OutputFileUploadOptions(
-                upload_condition=upload_condition
-                )
-            )
+        self.index = {}
+        self.names = []
+        self.sizes = array('q')
+        # -1 when the required slots are not informed
+        self.slots = array('l')
 
 
-    def create_task_collection(self, input_list, ini_id, end_id, execute_tasks):
+    def __len__(self):
+        return len(self.names)
+
+
+    def __contains__(self, name):
+        return name in self.index
+
+
+    def add(self, name, size=None, slots=None):
         """
-        Create Tasks with specified command.
-        Add them to the Batch Service to be queued for execution.
-        Cannot include too many Tasks at once because of resources limitation.
+        Add an item to the manifest. A repeated item replaces the size and
+        slots of the previous one, keeping its position.
 
-        :params int ini_id: initial index on input list to create and add Task.
-        :params int end_id: final index on input list to create and add Task.
-        :param bool execute_tasks: if True include tasks to be executed,
-        otherwise just create the task list to be showed.
+        :params str name: the input string.
+        :params int size: the input size (default 0).
+        :params int slots: the input required slots (default not informed).
         """
-        # Add one task for each given input file
-        task_list = list()
-        for idx in range(ini_id, end_id):
-            input_file = input_list[idx][0]
-            input_slots = input_list[idx][2]
-            taskId = f'Task{idx+self.start_id:0{self.tasks_id_len}}'
-            command = f"{self.config.tasks.command} '{input_file}' "\
-                      f"{self.config.tasks.commandSuffix}"
-            if self.config.argument.showTasks:
-                print(f'{taskId} command: {command}')
-
-            resource_files=[]
-            if self.config.tasks.resources.automaticScriptsUpload:
-                resource_files.append(
-                    batchmodels.ResourceFile(
-                        blob_prefix=self.config.storage.scripts.blobPrefix,
-                        storage_container_url=self.config.scripts_container_url
+        size = 0 if size is None else int(size)
+        slots = -1 if slots is None else int(slots)
+        if name in self.index:
+            idx = self.index[name]
+            self.sizes[idx] = size
+            self.slots[idx] = slots
+            return
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.slots.append(slots)
+
+
+    def records(self):
+        """
+        Iterate over the manifest items.
+
+        :rtype: iterator<tuple(str, int, int)>
+        :return: the input string, size and slots (None if not informed).
+        """
+        for (idx, name) in enumerate(self.names):
+            slots = self.slots[idx]
+            yield (name, self.sizes[idx], None if slots < 0 else slots)
+
+
+    @staticmethod
+    def import_optional(name, path):
+        """
+        Import the optional module required by the manifest file format.
+        """
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            package = name.split('.')[0]
+            raise RuntimeError(f'ERROR: the file {path} requires the '\
+                               f'{package} package (pip3 install {package}).')
+
+
+    @staticmethod
+    def get_format(path):
+        """
+        Get the manifest file format from its extension.
+
+        :params str path: the manifest file path.
+        :rtype: tuple(str, str)
+        :return: the format ('csv', 'tsv', 'parquet' or 'arrow') and the
+        compression ('gzip', 'zstd' or None).
+        """
+        name = path.lower()
+        compression = None
+        if name.endswith('.gz'):
+            (name, compression) = (name[:-3], 'gzip')
+        elif name.endswith('.zst'):
+            (name, compression) = (name[:-4], 'zstd')
+        for (extension, file_format) in [('.tsv', 'tsv'),
+                                         ('.parquet', 'parquet'),
+                                         ('.arrow', 'arrow'),
+                                         ('.feather', 'arrow')]:
+            if name.endswith(extension):
+                return (file_format, compression)
+        return ('csv', compression)
+
+
+    @classmethod
+    def open_text(cls, path, mode, compression):
+        """
+        Open a text manifest file, compressed or not.
+        """
+        if compression == 'gzip':
+            return gzip.open(path, f'{mode}t', newline='')
+        if compression == 'zstd':
+            zstandard = cls.import_optional('zstandard', path)
+            return zstandard.open(path, f'{mode}t', newline='')
+        return open(path, mode, newline='', buffering=cls.READ_BUFFER_SIZE)
+
+
+    @classmethod
+    def iter_records(cls, path):
+        """
+        Stream the records of a manifest file, skipping the empty records and
+        the ones whose input string starts with '#'.
+
+        :params str path: the manifest file path.
+        :rtype: iterator<tuple(str, str, str)>
+        :return: the input string, size and slots (None if not informed).
+        """
+        (file_format, compression) = cls.get_format(path)
+        if file_format in ('csv', 'tsv'):
+            delimiter = '\t' if file_format == 'tsv' else ','
+            with cls.open_text(path, 'r', compression) as file:
+                for row in csv.reader(file, delimiter=delimiter):
+                    row = [field.strip() for field in row[:3]]
+                    if not row or not row[0] or row[0].startswith('#'):
+                        continue
+                    row = row + [None] * (3 - len(row))
+                    yield tuple([field if field != '' else None
+                                 for field in row])
+            return
+
+        pyarrow = cls.import_optional('pyarrow', path)
+        if file_format == 'parquet':
+            parquet = cls.import_optional('pyarrow.parquet', path)
+            batches = parquet.ParquetFile(path).iter_batches(
+                batch_size=cls.BATCH_SIZE)
+        else:
+            reader = pyarrow.ipc.open_file(pyarrow.memory_map(path))
+            batches = (reader.get_batch(idx)
+                       for idx in range(reader.num_record_batches))
+        for batch in batches:
+            columns = [batch.column(idx).to_pylist()
+                       for idx in range(min(3, batch.num_columns))]
+            columns += [[None] * batch.num_rows] * (3 - len(columns))
+            for (name, size, slots) in zip(*columns):
+                if name and not str(name).startswith('#'):
+                    yield (str(name), size, slots)
+
+
+    @classmethod
+    def read(cls, path):
+        """
+        Read a manifest file.
+
+        :params str path: the manifest file path.
+        :rtype: `InputManifest`
+        :return: the manifest with the file items.
+        """
+        manifest = cls()
+        for (name, size, slots) in cls.iter_records(path):
+            manifest.add(name, size, slots)
+        return manifest
+
+
+    @classmethod
+    def write(cls, path, input_list):
+        """
+        Write the input list as a manifest file, in the format given by the
+        file extension, so it can be used again as input.
+
+        :params str path: the manifest file path.
+        :params input_list: the input items.
+        :type input_list: list<tuple(str, int, int)>
+        """
+        (file_format, compression) = cls.get_format(path)
+        if file_format in ('csv', 'tsv'):
+            delimiter = '\t' if file_format == 'tsv' else ','
+            with cls.open_text(path, 'w', compression) as file:
+                writer = csv.writer(file, delimiter=delimiter,
+                                    lineterminator='\n')
+                writer.writerows([input[:3] for input in input_list])
+            return
+
+        pyarrow = cls.import_optional('pyarrow', path)
+        table = pyarrow.table({
+            column:[input[idx] for input in input_list]
+            for (idx, column) in enumerate(cls.COLUMNS)})
+        if file_format == 'parquet':
+            parquet = cls.import_optional('pyarrow.parquet', path)
+            parquet.write_table(table, path)
+        else:
+            with pyarrow.ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+
+
+class SubmissionJournal:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Local write-ahead journal of the Task collections submitted to a Job.
+    Each chunk is recorded before being sent to the Batch Service and
+    acknowledged after the service accepts it, so a restarted submission can
+    skip the acknowledged Tasks without listing the Job.
+    """
+    def __init__(self, path, job_id):
+        """
+        Submission journal constructor.
+
+        :params str path: path of the journal file (JSON lines).
+        :params str job_id: id of the Job receiving the Tasks.
+        """
+        self.path = path
+        self.job_id = job_id
+
+
+    def get_acknowledged_task_ids(self):
+        """
+        Read the journal and get the ids of the Tasks already acknowledged
+        by the Batch Service for the configured Job.
+
+        :rtype: set<str>
+        :return: the acknowledged Task ids.
+        """
+        acknowledged = set()
+        if not os.path.exists(self.path):
+            return acknowledged
+        with open(self.path, 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a partially written line from an interrupted execution
+                    continue
+                if (record.get('job') == self.job_id and
+                    record.get('state') == 'acknowledged'):
+                    acknowledged.update(record['tasks'])
+        return acknowledged
+
+
+    def write(self, state, chunk_id, task_ids):
+        """
+        Append a chunk record to the journal, flushing it to disk.
+
+        :params str state: 'submitted' or 'acknowledged'.
+        :params str chunk_id: identifier of the Task collection chunk.
+        :params task_ids: ids of the Tasks in the chunk.
+        :type task_ids: list<str>
+        """
+        record = {'job':self.job_id, 'chunk':chunk_id, 'state':state,
+                  'time':datetime.datetime.now().isoformat(),
+                  'tasks':task_ids}
+        with open(self.path, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+
+    def begin(self, chunk_id, task_ids):
+        """
+        Record a chunk before submitting it.
+        """
+        self.write('submitted', chunk_id, task_ids)
+
+
+    def acknowledge(self, chunk_id, task_ids):
+        """
+        Record the Tasks of a chunk accepted by the Batch Service.
+        """
+        self.write('acknowledged', chunk_id, task_ids)
+
+
+class TaskMirror:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Local SQLite mirror of the Tasks of the configured job. Each sync only
+    lists the Tasks whose state changed since the last synced state
+    transition time (the watermark), projecting the mirrored properties, so
+    the listing, counting, failure and dedup queries read the mirror instead
+    of scanning the whole job. The deleted Tasks (by the slot calibration
+    and the speculation) don't change state, so every reconcile interval
+    the Task ids of the job are listed and the missing ones are removed. A
+    job recreated with the same id (different creation time) resets the
+    mirror.
+    """
+    SELECT = 'id,state,commandLine,stateTransitionTime,executionInfo,nodeInfo'
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS tasks (job_id TEXT, id TEXT, state TEXT,'\
+        ' command_line TEXT, exit_code INTEGER, node_id TEXT,'\
+        ' state_transition_time TEXT, PRIMARY KEY (job_id, id))',
+        'CREATE INDEX IF NOT EXISTS tasks_state ON tasks (job_id, state)',
+        'CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY,'\
+        ' creation_time TEXT, watermark TEXT, synced_at TEXT)',
+        'CREATE TABLE IF NOT EXISTS reconciliations (job_id TEXT PRIMARY KEY,'\
+        ' reconciled_at REAL)']
+
+    def __init__(self, path, job_id, reconcile_interval=600):
+        """
+        Task mirror constructor, creating the database if needed.
+
+        :params str path: path of the SQLite database file.
+        :params str job_id: id of the mirrored job.
+        :params float reconcile_interval: seconds between the removals of
+        the deleted Tasks.
+        """
+        self.path = path
+        self.job_id = job_id
+        self.reconcile_interval = reconcile_interval
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+
+
+    @staticmethod
+    def format_time(value):
+        """
+        Format a datetime as an OData UTC timestamp.
+        """
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        return value.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+    def get_job_state(self):
+        """
+        Get the mirrored job creation time and watermark.
+
+        :rtype: tuple(str, str)
+        """
+        row = self.connection.execute(
+            'SELECT creation_time, watermark FROM jobs WHERE job_id = ?',
+            (self.job_id,)).fetchone()
+        return row if row else (None, None)
+
+
+    def reset(self):
+        """
+        Remove the mirrored Tasks of the job.
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM tasks WHERE job_id = ?',
+                                    (self.job_id,))
+            self.connection.execute('DELETE FROM jobs WHERE job_id = ?',
+                                    (self.job_id,))
+            self.connection.execute(
+                'DELETE FROM reconciliations WHERE job_id = ?', (self.job_id,))
+
+
+    def sync(self, client, job):
+        """
+        Update the mirror with the Tasks changed since the last sync.
+
+        :params client: the Batch service client.
+        :type client: `azure.batch.BatchServiceClient`
+        :params job: the mirrored job (None if it doesn't exist).
+        :type job: `azure.batch.models.CloudJob`
+        :rtype: int
+        :return: the number of updated Tasks.
+        """
+        if job is None:
+            self.reset()
+            return 0
+        creation_time = self.format_time(job.creation_time)
+        (mirrored_creation_time, watermark) = self.get_job_state()
+        if mirrored_creation_time != creation_time:
+            self.reset()
+            watermark = None
+
+        filter_option = None
+        if watermark:
+            # 'ge' relists the Tasks on the watermark, the upsert is idempotent
+            filter_option = f"stateTransitionTime ge datetime'{watermark}'"
+        options = batchmodels.TaskListOptions(filter=filter_option,
+                                              select=self.SELECT)
+        rows = []
+        for task in client.task.list(job_id=self.job_id,
+                                     task_list_options=options):
+            transition_time = self.format_time(task.state_transition_time)
+            watermark = max(watermark or transition_time, transition_time)
+            exit_code = None
+            if task.execution_info:
+                exit_code = task.execution_info.exit_code
+            node_id = task.node_info.node_id if task.node_info else None
+            state = getattr(task.state, 'value', task.state)
+            rows.append((self.job_id, task.id, state, task.command_line,
+                         exit_code, node_id, transition_time))
+
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)',
+                (self.job_id, creation_time, watermark,
+                 datetime.datetime.now().isoformat()))
+            if filter_option is None:
+                # a full listing has no deleted Tasks to remove
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO reconciliations VALUES (?, ?)',
+                    (self.job_id, time.time()))
+        self.reconcile(client)
+        return len(rows)
+
+
+    def reconcile(self, client, force=False):
+        """
+        Remove the mirrored Tasks deleted from the job, listing its Task ids,
+        if the reconcile interval elapsed since the last reconciliation.
+
+        :params client: the Batch service client.
+        :type client: `azure.batch.BatchServiceClient`
+        :params bool force: reconcile even if the interval didn't elapse.
+        :rtype: int
+        :return: the number of removed Tasks.
+        """
+        row = self.connection.execute(
+            'SELECT reconciled_at FROM reconciliations WHERE job_id = ?',
+            (self.job_id,)).fetchone()
+        now = time.time()
+        if not force and row and now - row[0] < self.reconcile_interval:
+            return 0
+        # the Tasks mirrored before the listing and missing on it were deleted
+        options = batchmodels.TaskListOptions(select='id')
+        task_ids = set([task.id for task in client.task.list(
+            job_id=self.job_id, task_list_options=options)])
+        removed = [(self.job_id, task_id) for (task_id,) in
+                   self.connection.execute(
+                       'SELECT id FROM tasks WHERE job_id = ?',
+                       (self.job_id,)).fetchall()
+                   if task_id not in task_ids]
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM tasks WHERE job_id = ? AND id = ?', removed)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO reconciliations VALUES (?, ?)',
+                (self.job_id, now))
+        return len(removed)
+
+
+    def list_tasks(self, state=None, id_prefix=None):
+        """
+        List the mirrored Tasks, optionally filtered by state and id prefix.
+
+        :params str state: the Task state.
+        :params str id_prefix: the Task id prefix.
+        :rtype: iterator<tuple(str, str, str, str, int)>
+        :return: id, state, command line, node id and exit code of each Task.
+        """
+        query = 'SELECT id, state, command_line, node_id, exit_code FROM'\
+                ' tasks WHERE job_id = ?'
+        parameters = [self.job_id]
+        if state:
+            query += ' AND state = ?'
+            parameters.append(state)
+        if id_prefix:
+            query += ' AND substr(id, 1, ?) = ?'
+            parameters += [len(id_prefix), id_prefix]
+        return self.connection.execute(query + ' ORDER BY id', parameters)
+
+
+    def list_failed_tasks(self):
+        """
+        List the mirrored Tasks that finished with a non-zero exit code, or
+        completed without one (failed before running the command). The
+        Tasks terminated because their speculative clone succeeded and the
+        clones kept on the straggler node are not failures.
+
+        :rtype: list<tuple(str, str)>
+        :return: id and command line of each failed Task.
+        """
+        return self.connection.execute(
+            'SELECT id, command_line FROM tasks AS task WHERE job_id = ? AND'\
+            ' (exit_code != 0 OR (state = \'completed\' AND exit_code IS'\
+            ' NULL)) AND NOT EXISTS (SELECT 1 FROM tasks AS clone WHERE'\
+            ' clone.job_id = task.job_id AND clone.id = task.id || ? AND'\
+            ' clone.exit_code = 0) AND NOT (task.id LIKE ? AND'\
+            ' task.exit_code = ?) ORDER BY id',
+            (self.job_id, StragglerDetector.SUFFIX,
+             f'%{StragglerDetector.SUFFIX}',
+             StragglerDetector.SPECULATIVE_SAME_NODE_EXIT)).fetchall()
+
+
+    def get_commands(self):
+        """
+        Get the command lines of the mirrored Tasks.
+
+        :rtype: dict<str:str>
+        :return: the Task id of each command line.
+        """
+        return {command_line:task_id for (task_id, command_line) in
+                self.connection.execute(
+                    'SELECT id, command_line FROM tasks WHERE job_id = ?',
+                    (self.job_id,))}
+
+
+    def count_tasks(self):
+        """
+        Count the mirrored Tasks by state, as the job task counts. The Tasks
+        completed without an exit code (failed before running the command)
+        are counted as failed.
+
+        :rtype: `types.SimpleNamespace`
+        :return: active, running, completed, succeeded, failed and total.
+        """
+        counts = SimpleNamespace(active=0, running=0, completed=0,
+                                 succeeded=0, failed=0)
+        for (state, exit_code, count) in self.connection.execute(
+                'SELECT state, COALESCE(exit_code != 0, 1) AS failed,'\
+                ' COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state, failed',
+                (self.job_id,)):
+            # preparing tasks are counted as running, like the Batch Service
+            state = 'running' if state == 'preparing' else state
+            setattr(counts, state, getattr(counts, state) + count)
+            if state == 'completed':
+                if exit_code:
+                    counts.failed += count
+                else:
+                    counts.succeeded += count
+        counts.total = counts.active + counts.running + counts.completed
+        return counts
+
+
+class ResourceLister:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Lists the Pools, Jobs and Tasks of the Batch Account. The state and id
+    filters are pushed to the Batch Service ($filter) and only the listed
+    properties are requested ($select). The Tasks of the Jobs are listed
+    concurrently, page by page, and the rows are written as they arrive, as
+    an aligned table, JSON lines or CSV, followed by a summary of the Tasks
+    by Job and state. The configured Job Tasks are read from the local Task
+    mirror, if configured.
+    """
+    COLUMNS = ['type', 'job', 'id', 'state', 'node', 'exitCode', 'commandLine']
+    TABLE_FORMAT = '{type:<5} {job:<24} {id:<40} {state:<10} {node:<32} '\
+                   '{exitCode:>8} {commandLine}'
+    TASK_SELECT = 'id,state,commandLine,nodeInfo,executionInfo'
+    # Maximum number of items on each listing page
+    PAGE_SIZE = 1000
+    # Number of Jobs listed concurrently
+    WORKERS = 8
+
+    def __init__(self, azure_batch, state=None, job_prefix=None,
+                 task_prefix=None):
+        """
+        Resource lister constructor.
+
+        :params azure_batch: the Batch utility of the configured job.
+        :type azure_batch: `AzureBatchUtils`
+        :params str state: the Task state.
+        :params str job_prefix: the Job id prefix.
+        :params str task_prefix: the Task id prefix.
+        """
+        self.azure_batch = azure_batch
+        self.output = azure_batch.config.output
+        self.client = azure_batch.batch_service_client
+        self.state = state
+        self.job_prefix = job_prefix
+        self.task_prefix = task_prefix
+
+
+    @staticmethod
+    def get_filter(state=None, id_prefix=None):
+        """
+        Get the OData filter of the given state and id prefix.
+
+        :rtype: str
+        :return: the filter expression, or None if there is no filter.
+        """
+        clauses = []
+        if state:
+            clauses.append(f"state eq '{state}'")
+        if id_prefix:
+            id_prefix = id_prefix.replace("'", "''")
+            clauses.append(f"startswith(id, '{id_prefix}')")
+        return ' and '.join(clauses) if clauses else None
+
+
+    @staticmethod
+    def get_value(value):
+        """
+        Get the value of an enumeration (the states) or the value itself.
+        """
+        return getattr(value, 'value', value)
+
+
+    def list_pools(self):
+        """
+        List the Pools.
+
+        :rtype: iterator<dict>
+        """
+        options = batchmodels.PoolListOptions(
+            select='id,allocationState,currentDedicatedNodes,'\
+                   'currentLowPriorityNodes',
+            max_results=self.PAGE_SIZE)
+        for pool in self.client.pool.list(pool_list_options=options):
+            nodes = ((pool.current_dedicated_nodes or 0) +
+                     (pool.current_low_priority_nodes or 0))
+            yield {'type':'pool', 'job':'', 'id':pool.id,
+                   'state':self.get_value(pool.allocation_state),
+                   'node':f'{nodes} nodes', 'exitCode':'', 'commandLine':''}
+
+
+    def list_jobs(self):
+        """
+        List the Jobs with the configured id prefix.
+
+        :rtype: list<dict>
+        """
+        options = batchmodels.JobListOptions(
+            filter=self.get_filter(id_prefix=self.job_prefix),
+            select='id,state,poolInfo', max_results=self.PAGE_SIZE)
+        return [{'type':'job', 'job':job.id, 'id':job.id,
+                 'state':self.get_value(job.state),
+                 'node':job.pool_info.pool_id if job.pool_info else '',
+                 'exitCode':'', 'commandLine':''}
+                for job in self.client.job.list(job_list_options=options)]
+
+
+    def list_job_tasks(self, job_id):
+        """
+        List the Tasks of a Job from the Batch Service.
+
+        :rtype: iterator<dict>
+        """
+        options = batchmodels.TaskListOptions(
+            filter=self.get_filter(self.state, self.task_prefix),
+            select=self.TASK_SELECT, max_results=self.PAGE_SIZE)
+        for task in self.client.task.list(job_id=job_id,
+                                          task_list_options=options):
+            exit_code = None
+            if task.execution_info:
+                exit_code = task.execution_info.exit_code
+            yield {'type':'task', 'job':job_id, 'id':task.id,
+                   'state':self.get_value(task.state),
+                   'node':task.node_info.node_id if task.node_info else '',
+                   'exitCode':'' if exit_code is None else exit_code,
+                   'commandLine':task.command_line}
+
+
+    def list_mirror_tasks(self, mirror):
+        """
+        List the Tasks of the configured Job from the local Task mirror.
+
+        :rtype: iterator<dict>
+        """
+        for (task_id, state, command_line, node_id, exit_code) in \
+                mirror.list_tasks(self.state, self.task_prefix):
+            yield {'type':'task', 'job':mirror.job_id, 'id':task_id,
+                   'state':state, 'node':node_id or '',
+                   'exitCode':'' if exit_code is None else exit_code,
+                   'commandLine':command_line}
+
+
+    def list_tasks(self, job_ids):
+        """
+        List the Tasks of the Jobs concurrently, yielding the rows as they
+        are listed.
+
+        :params job_ids: ids of the Jobs.
+        :type job_ids: list<str>
+        :rtype: iterator<dict>
+        """
+        rows = queue.Queue(maxsize=self.PAGE_SIZE * self.WORKERS)
+        done = object()
+        stop = threading.Event()
+
+        def list_job(job_id):
+            try:
+                for row in self.list_job_tasks(job_id):
+                    if stop.is_set():
+                        break
+                    rows.put(row)
+            finally:
+                rows.put(done)
+
+        with concurrent.futures.ThreadPoolExecutor(self.WORKERS) as executor:
+            futures = [executor.submit(list_job, job_id) for job_id in job_ids]
+            pending = len(futures)
+            try:
+                while pending:
+                    row = rows.get()
+                    if row is done:
+                        pending -= 1
+                    else:
+                        yield row
+            finally:
+                # stop the listing if the consumer stopped (the limit)
+                stop.set()
+                for future in futures:
+                    # the cancelled listings never run to post their sentinel
+                    if future.cancel():
+                        pending -= 1
+                while pending:
+                    if rows.get() is done:
+                        pending -= 1
+            # raise the errors of the listing
+            for future in futures:
+                if not future.cancelled():
+                    future.result()
+
+
+    def write_row(self, file, writer, output_format, row):
+        """
+        Write a row on the listing output.
+        """
+        if output_format == 'jsonl':
+            file.write(json.dumps(row) + '\n')
+        elif output_format == 'csv':
+            writer.writerow([row[column] for column in self.COLUMNS])
+        else:
+            file.write(self.TABLE_FORMAT.format(**{key:str(value) for
+                                                   (key, value) in
+                                                   row.items()}) + '\n')
+
+
+    def run(self, output_format='table', output=None, limit=None):
+        """
+        List the resources, writing the rows and the summary.
+
+        :params str output_format: 'table', 'jsonl' or 'csv'.
+        :params str output: file to write the listing (default stdout).
+        :params int limit: maximum number of listed Tasks.
+        """
+        output_format = output_format or 'table'
+        file = open(output, 'w', newline='') if output else sys.stdout
+        writer = csv.writer(file, lineterminator='\n')
+        summary = {}
+        count = 0
+        try:
+            if output_format == 'csv':
+                writer.writerow(self.COLUMNS)
+            elif output_format == 'table':
+                file.write(self.TABLE_FORMAT.format(
+                    **{column:column for column in self.COLUMNS}) + '\n')
+            for row in self.list_pools():
+                self.write_row(file, writer, output_format, row)
+            jobs = self.list_jobs()
+            for row in jobs:
+                self.write_row(file, writer, output_format, row)
+
+            job_ids = [job['id'] for job in jobs]
+            # the configured Job Tasks are read from the mirror
+            mirror = None
+            if self.azure_batch.config.job.id in job_ids:
+                mirror = self.azure_batch.get_task_mirror()
+            tasks = iter([])
+            if mirror:
+                job_ids.remove(mirror.job_id)
+                tasks = self.list_mirror_tasks(mirror)
+            for row in itertools.chain(tasks, self.list_tasks(job_ids)):
+                if limit is not None and count >= limit:
+                    break
+                count += 1
+                self.write_row(file, writer, output_format, row)
+                job_summary = summary.setdefault(row['job'], {})
+                job_summary[row['state']] = job_summary.get(row['state'], 0)+1
+        finally:
+            if output:
+                file.close()
+            else:
+                file.flush()
+
+        self.output.print()
+        if output:
+            self.output.print(f'Listing saved on {output}')
+        self.output.print(
+            f'Listed {count} Tasks' +
+            (f' (limited to {limit})' if limit is not None else ''))
+        for (job_id, states) in sorted(summary.items()):
+            counts = ', '.join([f'{state}: {states[state]}'
+                                for state in sorted(states)])
+            self.output.print(f'  Job {job_id}: {counts}')
+
+
+class RequestGovernor:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Governs the requests to a Batch account, shared by all the users of the
+    account (one governor per account URL). Each operation class (submit,
+    list, read and update) has a token bucket limiting its request rate and
+    a limit of requests in flight controlled by AIMD: the limit grows by one
+    after a limit's worth of successful requests and is halved when the
+    service throttles (429 or 503). Throttled requests are retried after the
+    Retry-After time, or a jittered exponential backoff, pausing the whole
+    operation class meanwhile.
+    """
+    THROTTLED_STATUS = (429, 503)
+    DEFAULTS = {'submit':{'rate':5, 'burst':10, 'maxInFlight':8},
+                'list':{'rate':20, 'burst':40, 'maxInFlight':16},
+                'read':{'rate':20, 'burst':40, 'maxInFlight':16},
+                'update':{'rate':20, 'burst':40, 'maxInFlight':16}}
+    _governors = {}
+    _governors_lock = threading.Lock()
+
+    def __init__(self, settings):
+        """
+        Request governor constructor.
+
+        :params settings: the governor configuration (batch.governor).
+        :type settings: `types.SimpleNamespace`
+        """
+        self.settings = settings
+        self.condition = threading.Condition()
+        self.classes = {}
+        for (name, defaults) in self.DEFAULTS.items():
+            values = dict(defaults)
+            values.update(vars(getattr(settings, name, SimpleNamespace())))
+            self.classes[name] = SimpleNamespace(
+                rate=values['rate'], burst=values['burst'],
+                max_in_flight=values['maxInFlight'],
+                tokens=values['burst'], updated=time.monotonic(),
+                limit=max(1, values['maxInFlight'] / 2), in_flight=0,
+                paused_until=0, throttled=0)
+
+
+    @classmethod
+    def get(cls, config):
+        """
+        Get the governor of the configured Batch account.
+
+        :params config: the configuration object.
+        :rtype: `RequestGovernor`
+        """
+        with cls._governors_lock:
+            if config.batch.accountUrl not in cls._governors:
+                cls._governors[config.batch.accountUrl] = cls(
+                    config.batch.governor)
+            return cls._governors[config.batch.accountUrl]
+
+
+    @staticmethod
+    def get_operation_class(method):
+        """
+        Get the operation class of a Batch client method.
+        """
+        if method in ('add', 'add_collection'):
+            return 'submit'
+        if method.startswith('list'):
+            return 'list'
+        if method.startswith('get'):
+            return 'read'
+        return 'update'
+
+
+    @staticmethod
+    def get_retry_after(error):
+        """
+        Get the time to wait before retrying a throttled request.
+
+        :params error: the error raised by the request.
+        :rtype: float
+        :return: the Retry-After time in seconds (0 if not informed), or None
+        if the request was not throttled.
+        """
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code',
+                         getattr(error, 'status_code', None))
+        if status not in RequestGovernor.THROTTLED_STATUS:
+            return None
+        headers = getattr(response, 'headers', None) or {}
+        retry_after = headers.get('Retry-After') or headers.get('retry-after')
+        if not retry_after:
+            return 0
+        try:
+            return max(0, float(retry_after))
+        except ValueError:
+            # HTTP date
+            date = email.utils.parsedate_to_datetime(retry_after)
+            return max(0, (date - datetime.datetime.now(date.tzinfo))
+                       .total_seconds())
+
+
+    def acquire(self, operation):
+        """
+        Wait for a token and a free in-flight slot of the operation class.
+        """
+        state = self.classes[operation]
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                state.tokens = min(state.burst, state.tokens +
+                                   (now - state.updated) * state.rate)
+                state.updated = now
+                if now < state.paused_until:
+                    wait = state.paused_until - now
+                elif state.in_flight >= int(state.limit):
+                    wait = None
+                elif state.tokens < 1:
+                    wait = (1 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                self.condition.wait(wait)
+
+
+    def release(self, operation, retry_after=None):
+        """
+        Release the in-flight slot, adjusting the limit with the outcome.
+
+        :params str operation: the operation class.
+        :params float retry_after: the wait time if the request was
+        throttled, None if it succeeded.
+        """
+        state = self.classes[operation]
+        with self.condition:
+            state.in_flight -= 1
+            if retry_after is None:
+                state.limit = min(state.max_in_flight,
+                                  state.limit + 1 / state.limit)
+            else:
+                state.limit = max(1, state.limit / 2)
+                state.throttled += 1
+                state.paused_until = max(state.paused_until,
+                                         time.monotonic() + retry_after)
+            self.condition.notify_all()
+
+
+    def get_backoff(self, attempt, retry_after):
+        """
+        Get the wait before a retry: the Retry-After time or the exponential
+        backoff with full jitter.
+        """
+        if retry_after:
+            return retry_after
+        ceiling = min(self.settings.maxDelayInSeconds,
+                      self.settings.baseDelayInSeconds * 2 ** attempt)
+        return random.uniform(self.settings.baseDelayInSeconds / 2, ceiling)
+
+
+    def call(self, operation, function, *args, output=None, **kwargs):
+        """
+        Call the function as a request of the operation class, retrying it
+        while throttled.
+
+        :params str operation: the operation class.
+        :params function: the request function.
+        :params output: the output of the session making the request (the
+        terminal if None).
+        :type output: `SessionOutput`
+        :return: the function result.
+        """
+        attempt = 0
+        while True:
+            self.acquire(operation)
+            try:
+                result = function(*args, **kwargs)
+            except Exception as err:
+                retry_after = self.get_retry_after(err)
+                if retry_after is None:
+                    self.release(operation)
+                    raise
+                wait = self.get_backoff(attempt, retry_after)
+                self.release(operation, wait)
+                attempt += 1
+                if attempt > self.settings.maxRetries:
+                    raise
+                (output or SessionOutput()).print(
+                    f'* Throttled ({operation}), retrying in {wait:.1f} s')
+                continue
+            self.release(operation)
+            return result
+
+
+    def govern_pages(self, operation, paged, output=None):
+        """
+        Make the page requests of a paged listing (msrest Paged, which
+        requests each page on advance_page) through the governor, taking a
+        token for each page, not for each item. A failed page request leaves
+        the listing on the same next link, so the retry resumes it.
+
+        :params str operation: the operation class.
+        :params paged: the paged listing.
+        :params output: the output of the session making the requests.
+        :type output: `SessionOutput`
+        :return: the paged listing.
+        """
+        advance_page = getattr(paged, 'advance_page', None)
+        if advance_page is not None:
+            paged.advance_page = lambda: self.call(operation, advance_page,
+                                                   output=output)
+        return paged
+
+
+class GovernedClient:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Batch service client whose operation methods are called through the
+    account request governor.
+    """
+    def __init__(self, client, governor, output=None, group=None):
+        """
+        Governed client constructor.
+
+        :params client: the Batch service client (or one of its operation
+        groups).
+        :params governor: the account request governor.
+        :type governor: `RequestGovernor`
+        :params output: the output of the session using the client.
+        :type output: `SessionOutput`
+        :params str group: the operation group name (None for the client).
+        """
+        self._client = client
+        self._governor = governor
+        self._output = output
+        self._group = group
+
+
+    def __getattr__(self, name):
+        """
+        Get the operation group, or the governed operation method.
+        """
+        attribute = getattr(self._client, name)
+        if self._group is None:
+            if callable(attribute):
+                return attribute
+            return GovernedClient(attribute, self._governor, self._output,
+                                  name)
+        if not callable(attribute):
+            return attribute
+        operation = RequestGovernor.get_operation_class(name)
+        (governor, output) = (self._governor, self._output)
+
+        def governed(*args, **kwargs):
+            result = governor.call(operation, attribute, *args, output=output,
+                                   **kwargs)
+            if operation == 'list':
+                # the page requests are made while iterating
+                return governor.govern_pages(operation, result, output)
+            return result
+        return governed
+
+
+class LocalityPlanner:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Places the inputs sharing a name key (e.g. the sample prefix of the
+    input files) on the same node, so they reuse the node caches (as the
+    blobfuse cache) instead of reading the same data remotely on many nodes.
+    The key is the first group (or the whole match) of the configured
+    keyPattern regex on the input name. The groups are kept together in the
+    submission order and each group gets the affinity of one node, balancing
+    the groups sizes across the nodes.
+    """
+    def __init__(self, config):
+        """
+        Locality planner constructor.
+
+        :params config: the configuration object.
+        """
+        self.locality = config.tasks.inputs.locality
+        self.output = config.output
+        self.pattern = re.compile(self.locality.keyPattern)
+
+
+    def get_key(self, name):
+        """
+        Get the locality key of the input name (the name, if not matched).
+        """
+        match = self.pattern.search(name)
+        if not match:
+            return name
+        return match.group(1) if match.groups() else match.group(0)
+
+
+    def group_inputs(self, input_list):
+        """
+        Reorder the inputs keeping each group together, in the position of
+        its first input and preserving the order inside the groups.
+
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :rtype: list<tuple(str, int, int)>
+        :return: the grouped input list.
+        """
+        groups = {}
+        for input in input_list:
+            groups.setdefault(self.get_key(input[0]), []).append(input)
+        return [input for group in groups.values() for input in group]
+
+
+    def assign_nodes(self, input_list, affinity_ids, assigned=None):
+        """
+        Assign each group of inputs to a node, the largest groups first to
+        the least loaded node. The groups already assigned (the inputs
+        submitted incrementally) keep their node.
+
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :params affinity_ids: the affinity ids of the pool nodes.
+        :type affinity_ids: list<str>
+        :params assigned: the node affinity id of the groups already
+        assigned.
+        :type assigned: dict<str:str>
+        :rtype: dict<str:str>
+        :return: the node affinity id of each group key.
+        """
+        assignment = dict(assigned or {})
+        loads = {}
+        for input in input_list:
+            key = self.get_key(input[0])
+            # the slots weight the inputs without size
+            loads[key] = loads.get(key, 0) + max(input[1], 1) * input[2]
+        node_loads = {affinity_id:0 for affinity_id in affinity_ids}
+        for (key, load) in loads.items():
+            if assignment.get(key) in node_loads:
+                node_loads[assignment[key]] += load
+        node_loads = [(load, affinity_id) for (affinity_id, load) in
+                      sorted(node_loads.items())]
+        for (key, load) in sorted(loads.items(), key=lambda x:(-x[1], x[0])):
+            if key in assignment or not node_loads:
+                continue
+            node_loads.sort()
+            (node_load, affinity_id) = node_loads[0]
+            assignment[key] = affinity_id
+            node_loads[0] = (node_load + load, affinity_id)
+        return assignment
+
+
+    def report(self, tasks):
+        """
+        Print the locality report of the Tasks: the affinity hits (Tasks run
+        on the node of their group) and the nodes used by each group.
+
+        :params tasks: the Tasks with environmentSettings, nodeInfo and
+        affinityInfo.
+        :type tasks: list<`azure.batch.models.CloudTask`>
+        """
+        group_nodes = {}
+        hinted, hits = 0, 0
+        for task in tasks:
+            environment = {setting.name:setting.value for setting in
+                           (task.environment_settings or [])}
+            if 'ACT_INPUT' not in environment or not task.node_info:
+                continue
+            key = self.get_key(environment['ACT_INPUT'])
+            group_nodes.setdefault(key, set()).add(task.node_info.node_id)
+            if task.affinity_info:
+                hinted += 1
+                if task.affinity_info.affinity_id == task.node_info.affinity_id:
+                    hits += 1
+        if not group_nodes:
+            self.output.print('Locality report: no Tasks executed')
+            return
+        nodes = [len(group) for group in group_nodes.values()]
+        single = len([count for count in nodes if count == 1])
+        self.output.print('Locality report:')
+        self.output.print(
+            f'  Groups: {len(group_nodes)}, on a single node: {single} '\
+            f'({100*single/len(nodes):.1f}%)')
+        self.output.print(
+            f'  Nodes per group: mean {sum(nodes)/len(nodes):.2f}, '\
+            f'max {max(nodes)}')
+        if hinted:
+            self.output.print(
+                f'  Affinity hits: {hits}/{hinted} ({100*hits/hinted:.1f}%)')
+
+
+class StorageSync:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Mirrors the local scripts and inputs directories to the configured
+    storage containers: the files of storage.scripts.localPath are uploaded
+    under the scripts blobPrefix and the files of storage.input.localPath
+    under the input path. A file is skipped when the blob with the same name
+    has the same size and MD5. The files are uploaded concurrently, each
+    one in blocks uploaded concurrently, with their MD5 set on the blob so
+    the next syncs can compare them. Blobs without a local file are kept.
+    """
+    # Number of files uploaded concurrently
+    WORKERS = 8
+    # Number of blocks of each file uploaded concurrently
+    FILE_CONCURRENCY = 4
+    BLOCK_SIZE = 8 * 1024 * 1024
+    READ_BUFFER_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, config):
+        """
+        Storage sync constructor.
+
+        :params config: the configuration object.
+        """
+        self.config = config
+
+
+    def get_targets(self):
+        """
+        Get the local directories to be synced and their destinations.
+
+        :rtype: list<tuple(str, str, str)>
+        :return: the local directory, the container SAS URL and the blob
+        prefix of each target.
+        """
+        storage = self.config.storage
+        targets = [(storage.scripts.localPath, self.config.scripts_container_url,
+                    storage.scripts.blobPrefix),
+                   (storage.input.localPath, self.config.input_container_url,
+                    storage.input.path)]
+        return [target for target in targets
+                if target[0] and os.path.isdir(target[0])]
+
+
+    @staticmethod
+    def get_md5(path):
+        """
+        Get the MD5 digest of a local file.
+
+        :rtype: bytes
+        """
+        digest = hashlib.md5()
+        with open(path, 'rb') as file:
+            for data in iter(lambda: file.read(StorageSync.READ_BUFFER_SIZE),
+                             b''):
+                digest.update(data)
+        return digest.digest()
+
+
+    def list_remote(self, container, prefix):
+        """
+        List the blobs under the prefix.
+
+        :rtype: dict<str:tuple(int, bytes)>
+        :return: the size and MD5 (None if not set) of each blob.
+        """
+        remote = {}
+        for blob in container.list_blobs(name_starts_with=prefix):
+            md5 = blob.content_settings.content_md5
+            remote[blob.name] = (blob.size, bytes(md5) if md5 else None)
+        return remote
+
+
+    def check_file(self, path, name, remote):
+        """
+        Check if the local file changed from its blob.
+
+        :rtype: bytes
+        :return: the file MD5 if it must be uploaded, None otherwise.
+        """
+        (remote_size, remote_md5) = remote.get(name, (None, None))
+        # the MD5 is set on the uploaded blob, so it is always computed
+        md5 = self.get_md5(path)
+        if remote_size == os.path.getsize(path) and md5 == remote_md5:
+            return None
+        return md5
+
+
+    def upload_file(self, container, path, name, md5):
+        """
+        Upload the local file as a block blob with its MD5.
+
+        :rtype: int
+        :return: the uploaded size.
+        """
+        with open(path, 'rb') as data:
+            container.upload_blob(
+                name, data, overwrite=True,
+                max_concurrency=self.FILE_CONCURRENCY,
+                content_settings=blobstorage.ContentSettings(content_md5=md5))
+        return os.path.getsize(path)
+
+
+    def sync_target(self, local_path, container_url, prefix, executor):
+        """
+        Sync a local directory to the blobs under the prefix.
+
+        :rtype: tuple(int, int, int)
+        :return: the number of uploaded files, their size and the number of
+        unchanged files.
+        """
+        container = ContainerClients.get(
+            container_url=container_url, max_block_size=self.BLOCK_SIZE,
+            max_single_put_size=self.BLOCK_SIZE)
+        remote = self.list_remote(container, prefix)
+        files = []
+        for (dirpath, dirnames, filenames) in os.walk(local_path):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                relative = os.path.relpath(path, local_path)
+                files.append((path, prefix + relative.replace(os.sep, '/')))
+
+        def sync_file(path, name):
+            md5 = self.check_file(path, name, remote)
+            if md5 is None:
+                return None
+            size = self.upload_file(container, path, name, md5)
+            self.config.output.print(f'Uploaded: {name} ({size} bytes)')
+            return size
+
+        futures = [executor.submit(sync_file, *file) for file in files]
+        sizes = [future.result() for future in futures]
+        uploaded = [size for size in sizes if size is not None]
+        return (len(uploaded), sum(uploaded), len(sizes) - len(uploaded))
+
+
+    def run(self):
+        """
+        Sync all the local directories, printing the summary.
+        """
+        targets = self.get_targets()
+        if not targets:
+            self.config.output.print(
+                'No local scripts or inputs directory to upload.')
+            return
+        init = time.time()
+        with concurrent.futures.ThreadPoolExecutor(self.WORKERS) as executor:
+            for (local_path, container_url, prefix) in targets:
+                (count, size, unchanged) = self.sync_target(
+                    local_path, container_url, prefix, executor)
+                self.config.output.print(
+                    f'Synced {local_path} to {prefix}: {count} files '\
+                    f'uploaded ({size} bytes), {unchanged} unchanged')
+        self.config.output.print(
+            f'Upload finished in {time.time()-init:.1f} s')
+        self.config.output.print()
+
+
+class LogHarvester:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Harvests the Tasks logs uploaded to tasks.logs.destinationPath<TaskId>/
+    and extracts the phase timings printed by the Tasks scripts. The log
+    blobs are listed page by page and downloaded concurrently, with a
+    bounded number of Tasks in flight, and each Task row is written to the
+    output as soon as it is parsed, so the memory doesn't grow with the job.
+
+    Each extractor of tasks.logs.harvest.extractors is a regex with a value
+    group and an optional unit group (h, min, s for times, converted to
+    seconds, and KB, MB, GB for sizes, converted to MB with the decimal
+    units the example scripts print). A match after a line matching the
+    phasePattern, up to the phase timing, is named after the phase (for
+    example hmmscan.runtime and azcopy.runtime) and the matches of the same
+    metric are summed. The time of the totalMetric (or the span of the
+    timestamped lines) not covered by the other times is reported as the
+    setup and staging time of the Task.
+    """
+    # Number of log blobs downloaded concurrently
+    WORKERS = 16
+    # Number of Tasks downloaded or parsed ahead of the written rows
+    MAX_PENDING = 256
+    TIME_UNITS = {'h':3600, 'min':60, 's':1}
+    # Decimal units, the scripts compute the sizes as bytes/1000
+    SIZE_UNITS = {'KB':1/1000, 'MB':1, 'GB':1000}
+    # Prefix added to the log lines by the example scripts
+    TIMESTAMP = re.compile(r'^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d[+-]\d{4}): ')
+    SPAN_METRIC = 'span'
+    OTHER_METRIC = 'other'
+
+    def __init__(self, config):
+        """
+        Log harvester constructor.
+
+        :params config: the configuration object.
+        """
+        self.config = config
+        self.harvest = config.tasks.logs.harvest
+        self.phase_pattern = re.compile(self.harvest.phasePattern)
+        self.extractors = [(name, re.compile(pattern)) for (name, pattern)
+                           in vars(self.harvest.extractors).items()]
+        # count, sum and max of each metric
+        self.summary = {}
+        self.time_metrics = set([self.SPAN_METRIC, self.OTHER_METRIC])
+
+
+    def iter_lines(self, container, name):
+        """
+        Iterate the lines of the log blob, downloading it in chunks.
+
+        :rtype: iterator<str>
+        """
+        rest = b''
+        for chunk in container.download_blob(name).chunks():
+            lines = (rest + chunk).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                yield line.decode('utf-8', 'replace')
+        if rest:
+            yield rest.decode('utf-8', 'replace')
+
+
+    def get_value(self, match):
+        """
+        Get the extracted value, converted to seconds or MB by its unit.
+
+        :rtype: tuple(float, bool)
+        :return: the value and if it is a time.
+        """
+        value = float(match.group('value'))
+        unit = match.groupdict().get('unit')
+        if unit in self.TIME_UNITS:
+            return (value * self.TIME_UNITS[unit], True)
+        return (value * self.SIZE_UNITS.get(unit, 1), False)
+
+
+    def parse_lines(self, lines):
+        """
+        Extract the metrics of the log lines of a Task.
+
+        :rtype: tuple(dict<str:float>, set<str>)
+        :return: the metrics and the names of the time metrics.
+        """
+        row, times = {}, set()
+        phase = None
+        first = last = None
+        for line in lines:
+            timestamp = self.TIMESTAMP.match(line)
+            if timestamp:
+                last = timestamp.group(1)
+                first = first or last
+            match = self.phase_pattern.search(line)
+            if match:
+                phase = match.group('phase')
+                continue
+            for (name, pattern) in self.extractors:
+                match = pattern.search(line)
+                if not match:
+                    continue
+                (value, is_time) = self.get_value(match)
+                metric = f'{phase}.{name}' if phase else name
+                row[metric] = round(row.get(metric, 0) + value, 3)
+                if is_time:
+                    times.add(metric)
+                    # the phase ends with its timing
+                    phase = None
+                break
+        if first:
+            time_format = '%Y-%m-%dT%H:%M:%S%z'
+            row[self.SPAN_METRIC] = (
+                datetime.datetime.strptime(last, time_format) -
+                datetime.datetime.strptime(first, time_format)).total_seconds()
+        total = row.get(self.harvest.totalMetric, row.get(self.SPAN_METRIC))
+        covered = [row[metric] for metric in times
+                   if metric != self.harvest.totalMetric]
+        if total is not None and covered:
+            row[self.OTHER_METRIC] = round(max(0, total - sum(covered)), 3)
+        return (row, times)
+
+
+    def harvest_task(self, container, task_id, names):
+        """
+        Download and parse the log blobs of a Task.
+
+        :rtype: tuple(dict, set<str>)
+        :return: the Task row and the names of its time metrics.
+        """
+        lines = itertools.chain.from_iterable(
+            [self.iter_lines(container, name) for name in names])
+        (row, times) = self.parse_lines(lines)
+        return (dict(task_id=task_id, **row), times)
+
+
+    def iter_tasks(self, container, prefix):
+        """
+        List the log blobs grouped by Task (the blobs are listed by name, so
+        the blobs of a Task are contiguous).
+
+        :rtype: iterator<tuple(str, list<str>)>
+        :return: the Task id and the names of its log blobs.
+        """
+        blobs = container.list_blobs(name_starts_with=prefix,
+                                     results_per_page=5000)
+        names = (blob.name for blob in blobs)
+        destination = self.config.tasks.logs.destinationPath
+        get_task_id = lambda name: name[len(destination):].split('/')[0]
+        for (task_id, names) in itertools.groupby(names, key=get_task_id):
+            yield (task_id, list(names))
+
+
+    def iter_rows(self, task_prefix=None):
+        """
+        Harvest the Tasks logs concurrently, keeping the listing order.
+
+        :params str task_prefix: harvest only the Tasks with id starting with
+        this prefix.
+        :rtype: iterator<dict>
+        :return: the row of each Task.
+        """
+        destination = self.config.tasks.logs.destinationPath
+        container = ContainerClients.get(
+            container_url=self.config.output_container_url)
+        pending = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(self.WORKERS) as executor:
+            for (task_id, names) in self.iter_tasks(
+                container, f'{destination}{task_prefix or ""}'):
+                pending.append(executor.submit(self.harvest_task, container,
+                                               task_id, names))
+                if len(pending) >= self.MAX_PENDING:
+                    yield self.add_row(*pending.popleft().result())
+            while pending:
+                yield self.add_row(*pending.popleft().result())
+
+
+    def add_row(self, row, times):
+        """
+        Add the Task row to the summary.
+
+        :rtype: dict
+        :return: the row.
+        """
+        self.time_metrics.update(times)
+        for (metric, value) in row.items():
+            if metric == 'task_id':
+                continue
+            (count, total, maximum) = self.summary.get(metric, (0, 0, value))
+            self.summary[metric] = (count + 1, total + value,
+                                    max(maximum, value))
+        return row
+
+
+    def write_rows(self, rows, output):
+        """
+        Write the rows on the output file, as JSON lines or, for a .csv file,
+        as a table with a column for each metric. The CSV rows are spooled
+        as JSON lines, as the metrics are only known after all the Tasks.
+
+        :rtype: int
+        :return: the number of rows.
+        """
+        is_csv = output.endswith('.csv')
+        spool = f'{output}.part' if is_csv else output
+        count = 0
+        with open(spool, 'w') as file:
+            for row in rows:
+                file.write(json.dumps(row) + '\n')
+                count += 1
+        if is_csv:
+            columns = ['task_id'] + sorted(self.summary)
+            with open(spool) as lines, open(output, 'w', newline='') as file:
+                writer = csv.DictWriter(file, columns, restval='')
+                writer.writeheader()
+                for line in lines:
+                    writer.writerow(json.loads(line))
+            os.remove(spool)
+        return count
+
+
+    def print_summary(self):
+        """
+        Print the harvested metrics, the times with their share of the
+        total time of the Tasks.
+        """
+        total = self.summary.get(self.harvest.totalMetric,
+                                 self.summary.get(self.SPAN_METRIC))
+        total_time = total[1] if total else 0
+        row = '{:<32} {:>8} {:>12} {:>12} {:>12} {:>8}'
+        self.config.output.print(
+            row.format('time metric', 'tasks', 'total (h)', 'mean (s)',
+                       'max (s)', 'share'))
+        for metric in sorted(self.summary):
+            if metric not in self.time_metrics:
+                continue
+            (count, value, maximum) = self.summary[metric]
+            share = f'{100*value/total_time:.1f}%' if total_time else '-'
+            self.config.output.print(
+                row.format(metric, count, f'{value/3600:.2f}',
+                           f'{value/count:.1f}', f'{maximum:.1f}', share))
+        self.config.output.print()
+        sizes = [metric for metric in sorted(self.summary)
+                 if metric not in self.time_metrics]
+        if sizes:
+            self.config.output.print(
+                row.format('metric', 'tasks', 'total', 'mean', 'max', ''))
+            for metric in sizes:
+                (count, value, maximum) = self.summary[metric]
+                self.config.output.print(
+                    row.format(metric, count, f'{value:.2f}',
+                               f'{value/count:.2f}', f'{maximum:.2f}', ''))
+            self.config.output.print()
+
+
+    def run(self, output, task_prefix=None):
+        """
+        Harvest the Tasks logs into the output file and print the summary.
+
+        :params str output: the JSON lines or CSV file of the Tasks rows.
+        :params str task_prefix: harvest only the Tasks with id starting with
+        this prefix.
+        """
+        if not self.config.tasks.logs.destinationPath:
+            raise ValueError("Harvesting the logs requires the tasks logs "\
+                             "destinationPath!")
+        init = time.time()
+        count = self.write_rows(self.iter_rows(task_prefix), output)
+        self.config.output.print(
+            f'Harvested the logs of {count} Tasks on {output} in '\
+            f'{time.time()-init:.1f} s')
+        self.config.output.print()
+        self.print_summary()
+
+
+class AzureBatchUtils:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2021/12/13
+
+    Utility class to create Azure Batch pool, jobs and tasks.
+    """
+    # Batch service clients shared by the process, one for each account
+    _batch_clients = {}
+    _batch_clients_lock = threading.Lock()
+
+    def __init__(self, config):
+        """
+        Azure Batch constructor.
+        """
+        self.config = config
+        self._batch_service_client = None
+        # Create the submission journal, if configured
+        self.journal = None
+        journal = self.config.tasks.journal
+        if journal.include:
+            self.journal = SubmissionJournal(journal.path, self.config.job.id)
+        self._task_mirror = None
+        # Node affinity of each input group, set when the Tasks are created,
+        # and the node id of each affinity
+        self.locality_affinity = {}
+        self.node_ids = {}
+        self.locality = None
+        if self.config.tasks.inputs.locality.include:
+            self.locality = LocalityPlanner(self.config)
+
+
+    def get_task_mirror(self):
+        """
+        Get the local mirror of the configured job Tasks, synced with the
+        Tasks changed since the last sync.
+
+        :rtype: `TaskMirror`
+        :return: the synced mirror, or None if the mirror is not configured.
+        """
+        mirror = self.config.tasks.mirror
+        if not mirror.include:
+            return None
+        if self._task_mirror is None:
+            self._task_mirror = TaskMirror(mirror.path, self.config.job.id,
+                                           mirror.reconcileIntervalInSeconds)
+        self._task_mirror.sync(self.batch_service_client,
+                               self.get_config_job())
+        return self._task_mirror
+
+
+    def sync_task_mirror(self):
+        """
+        Refresh the local mirror of the configured job Tasks.
+        """
+        mirror = self.config.tasks.mirror
+        if self._task_mirror is None:
+            self._task_mirror = TaskMirror(mirror.path, self.config.job.id,
+                                           mirror.reconcileIntervalInSeconds)
+        init = time.time()
+        job = self.get_config_job()
+        count = self._task_mirror.sync(self.batch_service_client, job)
+        # an explicit sync also removes the deleted Tasks
+        removed = 0
+        if job:
+            removed = self._task_mirror.reconcile(self.batch_service_client,
+                                                  force=True)
+        self.config.output.print(
+            f'Synced {count} Tasks of Job [{self.config.job.id}] on '\
+            f'{mirror.path} in {time.time()-init:.1f} s ({removed} deleted '\
+            f'Tasks removed)')
+
+
+    @property
+    def batch_service_client(self):
+        """
+        The Batch service client, created on the first use so the commands
+        that don't interact with the Batch service don't pay its creation.
+
+        :rtype: `azure.batch.BatchServiceClient`
+        """
+        if self._batch_service_client is None:
+            account = self.config.batch
+            key = (account.accountUrl, account.accountName, account.accountKey)
+            with self._batch_clients_lock:
+                if key not in self._batch_clients:
+                    # Create a Batch service client. We'll now be interacting
+                    # with the Batch service
+                    batch_credentials = batch_auth.SharedKeyCredentials(
+                        account.accountName, account.accountKey)
+                    self._batch_clients[key] = batch.BatchServiceClient(
+                        credentials=batch_credentials,
+                        batch_url=account.accountUrl)
+                client = self._batch_clients[key]
+            # The requests go through the account request governor
+            self._batch_service_client = GovernedClient(
+                client, RequestGovernor.get(self.config), self.config.output)
+        return self._batch_service_client
+
+
+    def get_config_pool(self):
+        """
+        Check if exists a pool with the configured id.
+        :rtype: `azure.batch.models.CloudPool`
+        :return: The configured Pool object or None if it doesn't exist.
+        """
+        for pool in self.batch_service_client.pool.list():
+            if (pool.id == self.config.pool.id):
+                return pool
+        return None
+
+
+    def create_pool(self):
+        """
+        Create a pool of compute nodes with the specified configuration options.
+        """
+        # Check if already exists a pool with the configured id, exits if True
+        if self.get_config_pool():
+            self.config.output.print(
+                f'Pool [{self.config.pool.id}] already exists...')
+            self.config.output.print()
+            return
+
+        self.config.output.print(f'Creating pool [{self.config.pool.id}]...')
+        # Create a new pool of Linux compute nodes using an Azure Virtual
+        # Machines Marketplace image. For more information about creating pools
+        # of Linux nodes, see:
+        # https://azure.microsoft.com/documentation/articles/batch-linux-nodes/
+        new_pool = batchmodels.PoolAddParameter(
+            id=self.config.pool.id,
+            vm_size=self.config.pool.vmSize,
+            target_dedicated_nodes=self.config.pool.dedicatedNodeCount,
+            target_low_priority_nodes=self.config.pool.lowPriorityNodeCount,
+            task_slots_per_node=self.config.pool.taskSlotsPerNode
+            )
+        # Set the Virtual Machine Configuration for the pool nodes
+        vmConfiguration = self.config.pool.vmConfiguration
+        virtual_machine_configuration=batchmodels.VirtualMachineConfiguration(
+            image_reference=batchmodels.ImageReference(
+                publisher=vmConfiguration.imageReference.publisher,
+                offer=vmConfiguration.imageReference.offer,
+                sku=vmConfiguration.imageReference.sku,
+                version=vmConfiguration.imageReference.version,
+                ),
+            node_agent_sku_id=vmConfiguration.nodeAgentSKUId
+            )
+        # If configured to use Ephemeral OS Disk set it on the VM configuration
+        if self.config.pool.useEphemeralOSDisk:
+            virtual_machine_configuration.os_disk=batchmodels.OSDisk(
+                ephemeral_os_disk_settings=batchmodels.DiffDiskSettings(
+                    placement=batchmodels.DiffDiskPlacement.cache_disk
+                    )
+                )
+        # Add the Virtual Machine Configuration to the pool
+        new_pool.virtual_machine_configuration = virtual_machine_configuration
+
+        # Set node auto scale parameters
+        nodeAutoScale = self.config.pool.nodeAutoScale
+        if nodeAutoScale.include:
+            new_pool.enable_auto_scale = nodeAutoScale.include
+            new_pool.auto_scale_formula = ";".join(nodeAutoScale.formula)
+            interval = datetime.timedelta(
+                minutes=nodeAutoScale.evaluationIntervalInMinutes
+                )
+            new_pool.auto_scale_evaluation_interval = interval
+
+        # Configure the storage mount for the pool
+        nodeStorage = self.config.pool.nodeStorageContainers
+        if nodeStorage.mount:
+            BlobFileSysConfig = batchmodels.AzureBlobFileSystemConfiguration
+            mount_configurations = []
+            for node_container in nodeStorage.containers:
+                mount_configurations.append(batchmodels.MountConfiguration(
+                    azure_blob_file_system_configuration = BlobFileSysConfig(
+                        account_name = self.config.storage.accountName,
+                        sas_key = self.config.storage.accountSASToken,
+                        container_name = node_container.name,
+                        relative_mount_path = node_container.name,
+                        blobfuse_options = self.get_blobfuse_options(
+                            node_container)
                         )
                     )
-            if self.config.tasks.resources.automaticInputsUpload:
-                resource_files.append(
-                    batchmodels.ResourceFile(
-                        blob_prefix=input_file,
-                        storage_container_url=self.config.input_container_url
+                )
+            new_pool.mount_configuration = mount_configurations
+        # Add Applications
+        if self.config.pool.applications.include:
+            applications = []
+            for config_application in self.config.pool.applications.references:
+                applications.append(batchmodels.ApplicationPackageReference(
+                    application_id = config_application.id,
+                    version = config_application.version
+                    )
+                )
+            new_pool.application_package_references = applications
+        # Configure the start task for the pool
+        start_commands = []
+        start_resource_files = []
+        if self.config.pool.startupTask.include:
+            start_commands.append(self.config.pool.startupTask.command)
+        # Benchmark the mounts I/O on each node
+        if nodeStorage.mount and nodeStorage.benchmark.include:
+            self.upload_io_benchmark()
+            start_resource_files.append(batchmodels.ResourceFile(
+                http_url=self.config.io_benchmark_url,
+                file_path=IO_BENCHMARK_SCRIPT
+                )
+            )
+            start_commands.append(self.get_io_benchmark_command())
+        # Start the input prefetch agent in background on each node
+        if self.config.tasks.inputs.prefetch.include:
+            self.upload_prefetch_agent()
+            start_resource_files.append(batchmodels.ResourceFile(
+                http_url=self.config.prefetch_agent_url,
+                file_path=PREFETCH_AGENT_SCRIPT
+                )
+            )
+            start_commands.append(self.get_prefetch_agent_command())
+        if start_commands:
+            new_pool.start_task=batchmodels.StartTask(
+                command_line=f'/bin/bash -c "'\
+                             f'{" && ".join(start_commands)}"',
+                resource_files=start_resource_files,
+                wait_for_success=True,
+                user_identity=batchmodels.UserIdentity(
+                    auto_user=batchmodels.AutoUserSpecification(
+                        scope=batchmodels.AutoUserScope.pool,
+                        elevation_level=batchmodels.ElevationLevel.admin
                         )
                     )
-            output_files=[]
-            if self.config.tasks.logs.automaticUpload:
-                logUpload = self.config.tasks.logs
-                output_files.append(self.create_task_output_file(
-                    file_pattern=logUpload.pattern,
-                    destination_path=f'{logUpload.destinationPath}{taskId}',
-                    upload_condition=OutputFileUploadCondition.task_completion
+                )
+        # Add the pool on the Batch Account
+        self.batch_service_client.pool.add(new_pool)
+        self.config.output.print('Pool created!')
+        self.config.output.print()
+
+
+    def monitor_pool_allocation(self):
+        """
+        Monitor the allocation of the configured pool nodes, reporting the
+        time to the first idle node and to the full capacity (measured from
+        the pool creation), and handling the nodes whose start task failed or
+        became unusable accordingly with the configured failedNodePolicy:
+        'reboot' (up to maxRebootAttempts, then remove), 'remove' or 'report'
+        (the monitor stops once the other nodes are ready).
+
+        :rtype: `types.SimpleNamespace`
+        :return: the allocation report (times in seconds and failed nodes).
+        """
+        monitor = self.config.pool.monitor
+        pool_id = self.config.pool.id
+        failed_states = [batchmodels.ComputeNodeState.start_task_failed,
+                         batchmodels.ComputeNodeState.unusable]
+        usable_states = [batchmodels.ComputeNodeState.idle,
+                         batchmodels.ComputeNodeState.running]
+        report = SimpleNamespace(first_idle=None, full_capacity=None,
+                                 failed_nodes={}, rebooted=0, removed=0)
+        reboot_attempts = {}
+        removing = set()
+
+        self.config.output.print(f'Monitoring pool [{pool_id}] allocation...')
+        start = time.time()
+        timeout = monitor.timeoutInMinutes * 60
+        while (time.time() - start < timeout):
+            pool = self.batch_service_client.pool.get(pool_id)
+            target = (pool.target_dedicated_nodes or 0) + \
+                     (pool.target_low_priority_nodes or 0)
+            nodes = list(self.batch_service_client.compute_node.list(pool_id))
+            elapsed = time.time() - start
+            if pool.creation_time:
+                elapsed = (datetime.datetime.now(datetime.timezone.utc) -
+                           pool.creation_time).total_seconds()
+            states = {}
+            failed = []
+            for node in nodes:
+                states[node.state] = states.get(node.state, 0) + 1
+                if node.state in failed_states and node.id not in removing:
+                    failed.append(node)
+                    report.failed_nodes[node.id] = node.state
+            usable = sum([states.get(state, 0) for state in usable_states])
+
+            if report.first_idle is None and usable > 0:
+                report.first_idle = elapsed
+                self.config.output.print(
+                    f'First node ready after {elapsed:.0f} s')
+            if (report.full_capacity is None and target > 0 and
+                usable >= target):
+                report.full_capacity = elapsed
+                self.config.output.print(
+                    f'Full capacity ({target} nodes) after {elapsed:.0f} s')
+
+            # Handle the failed nodes with the configured policy
+            for node in failed:
+                attempts = reboot_attempts.get(node.id, 0)
+                try:
+                    if (monitor.failedNodePolicy == 'reboot' and
+                        attempts < monitor.maxRebootAttempts):
+                        self.config.output.print(
+                            f'Rebooting node {node.id} ({node.state})')
+                        self.batch_service_client.compute_node.reboot(
+                            pool_id, node.id)
+                        reboot_attempts[node.id] = attempts + 1
+                        report.rebooted += 1
+                    elif monitor.failedNodePolicy in ('reboot', 'remove'):
+                        self.config.output.print(
+                            f'Removing node {node.id} ({node.state})')
+                        self.batch_service_client.pool.remove_nodes(
+                            pool_id, batchmodels.NodeRemoveParameter(
+                                node_list=[node.id]))
+                        removing.add(node.id)
+                        report.removed += 1
+                except batchmodels.BatchErrorException as err:
+                    # the pool may not be steady yet, try again later
+                    self.print_batch_exception(err)
+
+            if report.full_capacity is not None and not failed:
+                break
+            # the reported failed nodes stay on the pool
+            if (monitor.failedNodePolicy == 'report' and target > 0 and
+                len(nodes) >= target and usable + len(failed) == len(nodes)):
+                break
+            if (target == 0 and
+                pool.allocation_state == batchmodels.AllocationState.steady):
+                break
+            self.config.output.print(
+                f'Nodes {usable:03d}/{target:03d} ready - ' \
+                f'{", ".join([f"{k}: {v}" for (k, v) in states.items()])}',
+                end='\r')
+            time.sleep(monitor.pollIntervalInSeconds)
+        self.config.output.print()
+
+        self.config.output.print(f'Pool [{pool_id}] allocation report:')
+        self.config.output.print(
+            f'  Time to first idle node: {report.first_idle} s')
+        self.config.output.print(
+            f'  Time to full capacity:   {report.full_capacity} s')
+        self.config.output.print(
+            f'  Failed nodes: {len(report.failed_nodes)} '\
+            f'(rebooted {report.rebooted}, removed {report.removed})')
+        for (node_id, state) in report.failed_nodes.items():
+            self.config.output.print(f'    {node_id}: {state}')
+        self.config.output.print()
+        return report
+
+
+    @staticmethod
+    def get_blobfuse_options(node_container):
+        """
+        Get the blobfuse options of a node storage container: the options
+        generated by its mount profile (if any) followed by the configured
+        blobfuseOptions, which take precedence.
+
+        Profiles:
+        streaming-read: read-only streaming of blocks, for large sequential
+        reads, with a block cache in memory.
+        random-read: whole file cache on the resource disk, kept for
+        cacheTimeoutInSeconds, for files read many times or randomly.
+        write-heavy: file cache on the resource disk released after upload,
+        with more concurrent uploads.
+
+        :params node_container: the node storage container configuration.
+        :type node_container: `types.SimpleNamespace`
+        :rtype: str
+        :return: the blobfuse options.
+        """
+        extra = getattr(node_container, 'blobfuseOptions', '')
+        profile = getattr(node_container, 'profile', None)
+        if not profile:
+            return extra
+        settings = dict(BLOBFUSE_PROFILES[profile])
+        for key in list(settings) + ['cachePath']:
+            if hasattr(node_container, key):
+                settings[key] = getattr(node_container, key)
+        cache_path = settings.get('cachePath', BLOBFUSE_CACHE_PATH)
+        options = ['-o allow_other',
+                   f"-o attr_timeout={settings['attrTimeoutInSeconds']}",
+                   f"-o entry_timeout={settings['attrTimeoutInSeconds']}",
+                   '-o negative_timeout=120',
+                   f"--max-concurrency={settings['maxConcurrency']}"]
+        if settings['attrTimeoutInSeconds']:
+            options.append('--use-attr-cache=true')
+        if profile == 'streaming-read':
+            options += ['-o ro', '--streaming=true',
+                        f"--stream-cache-mb={settings['cacheSizeInMB']}",
+                        f"--block-size-mb={settings['blockSizeInMB']}",
+                        f"--max-blocks-per-file={settings['maxBlocksPerFile']}"]
+        else:
+            options += [f'--tmp-path={cache_path}/{node_container.name}',
+                        '--file-cache-timeout-in-seconds='\
+                        f"{settings['cacheTimeoutInSeconds']}"]
+            # 0 keeps the blobfuse default (80% of the disk)
+            if settings['cacheSizeInMB']:
+                options.append(f"--cache-size-mb={settings['cacheSizeInMB']}")
+            if profile == 'random-read':
+                options.append('-o kernel_cache')
+        return ' '.join(options + ([extra] if extra else []))
+
+
+    def upload_io_benchmark(self):
+        """
+        Upload the mount I/O benchmark script to the configured scripts
+        container, to be downloaded by the pool start task.
+        """
+        benchmark = self.config.pool.nodeStorageContainers.benchmark
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   IO_BENCHMARK_SCRIPT)
+        container = ContainerClients.get(
+            container_url=self.config.scripts_container_url)
+        with open(script_path, 'rb') as data:
+            container.upload_blob(f'{benchmark.blobPath}{IO_BENCHMARK_SCRIPT}',
+                                  data, overwrite=True)
+
+
+    def get_io_benchmark_command(self):
+        """
+        Get the start task command to benchmark the mounts I/O, reporting
+        to the scripts container. The test file is written under the
+        scratchPath of each mount and the reads sample up to maxSampleFiles
+        files of its samplePath. A failed benchmark doesn't fail the node.
+
+        :rtype: str
+        :return: the command to run the benchmark.
+        """
+        nodeStorage = self.config.pool.nodeStorageContainers
+        benchmark = nodeStorage.benchmark
+        containers = ' '.join([
+            f"--container {node_container.name}="\
+            f"{getattr(node_container, 'profile', 'custom')}"
+            for node_container in nodeStorage.containers])
+        return f'(python3 {IO_BENCHMARK_SCRIPT} '\
+               f'--mounts-dir $AZ_BATCH_NODE_MOUNTS_DIR {containers} '\
+               f'--size-mb {benchmark.sizeInMB} '\
+               f'--random-reads {benchmark.randomReads} '\
+               f'--scratch-dir {shlex.quote(benchmark.scratchPath)} '\
+               f'--sample-dir {shlex.quote(benchmark.samplePath)} '\
+               f'--max-files {benchmark.maxSampleFiles} '\
+               f"--report-url '{self.config.scripts_container_url}' "\
+               f'--report-prefix {benchmark.blobPath}{self.config.pool.id}/ '\
+               f'> {IO_BENCHMARK_SCRIPT}.log 2>&1 || true)'
+
+
+    def report_io_benchmark(self):
+        """
+        Print the mount I/O benchmark reports of the configured pool nodes,
+        and the mean of each container (and profile).
+        """
+        benchmark = self.config.pool.nodeStorageContainers.benchmark
+        prefix = f'{benchmark.blobPath}{self.config.pool.id}/'
+        container = ContainerClients.get(
+            container_url=self.config.scripts_container_url)
+        metrics = ['writeMBps', 'seqReadMBps', 'randomReadIOPS',
+                   'randomReadMBps']
+        row = '{:<24} {:<24} {:<16} {:>10} {:>12} {:>15} {:>15}'
+        self.config.output.print(
+            row.format('node', 'container', 'profile', *metrics))
+        means = {}
+        for blob in container.list_blobs(name_starts_with=prefix):
+            if not blob.name.endswith('.json'):
+                continue
+            report = json.loads(container.download_blob(blob.name).readall())
+            for (name, result) in sorted(report['containers'].items()):
+                key = (name, result.get('profile', ''))
+                self.config.output.print(
+                    row.format(report['node'], name, key[1],
+                               *[result.get(metric, '-')
+                                 for metric in metrics]))
+                for metric in metrics:
+                    if metric in result:
+                        means.setdefault(key, {}).setdefault(
+                            metric, []).append(result[metric])
+        self.config.output.print()
+        for ((name, profile), values) in sorted(means.items()):
+            self.config.output.print(
+                row.format('mean', name, profile,
+                           *[round(sum(values[metric])/len(values[metric]),
+                                   2) if metric in values else '-'
+                             for metric in metrics]))
+        self.config.output.print()
+
+
+    def upload_prefetch_agent(self):
+        """
+        Upload the input prefetch agent script to the configured scripts
+        container, to be downloaded by the pool start task.
+        """
+        prefetch = self.config.tasks.inputs.prefetch
+        agent_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  PREFETCH_AGENT_SCRIPT)
+        container = ContainerClients.get(
+            container_url=self.config.scripts_container_url)
+        with open(agent_path, 'rb') as data:
+            container.upload_blob(f'{prefetch.blobPath}{PREFETCH_AGENT_SCRIPT}',
+                                  data, overwrite=True)
+
+
+    def upload_prefetch_manifest(self, input_list, append=False):
+        """
+        Upload the manifest with the inputs in submission order and the node
+        assigned to each one, followed by the prefetch agent of that node.
+        The manifest is an append blob, so the inputs submitted later (the
+        watch mode) are appended to it.
+
+        :params input_list: the inputs to be submitted.
+        :type input_list: list<tuple(str, int, int)>
+        :params bool append: append the inputs to the uploaded manifest.
+        """
+        lines = []
+        for input in input_list:
+            affinity = self.get_locality_affinity(input[0])
+            node_id = self.node_ids.get(affinity.affinity_id, '') \
+                if affinity else ''
+            lines.append(f'{input[0]}\t{input[1]}\t{node_id}\n')
+        manifest = ''.join(lines).encode('utf-8')
+        container = ContainerClients.get(
+            container_url=self.config.scripts_container_url)
+        blob = container.get_blob_client(self.config.prefetch_manifest_name)
+        if append and blob.exists():
+            if manifest:
+                blob.append_block(manifest)
+        else:
+            blob.upload_blob(manifest, overwrite=True,
+                             blob_type=blobstorage.BlobType.AppendBlob)
+        self.config.output.print(
+            f'Prefetch manifest uploaded ({len(input_list)} inputs)')
+
+
+    def get_prefetch_agent_command(self):
+        """
+        Get the start task command to launch the input prefetch agent as a
+        background process detached from the start task.
+
+        :rtype: str
+        :return: the command to start the agent.
+        """
+        prefetch = self.config.tasks.inputs.prefetch
+        max_bytes = int(prefetch.cacheSizeInGB * 1024**3)
+        return f'mkdir -p {PREFETCH_AGENT_DIR} {prefetch.cachePath} && '\
+               f'chmod 777 {prefetch.cachePath} && '\
+               f'cp {PREFETCH_AGENT_SCRIPT} {PREFETCH_AGENT_DIR}/ && '\
+               f'(setsid nohup python3 '\
+               f'{PREFETCH_AGENT_DIR}/{PREFETCH_AGENT_SCRIPT} agent '\
+               f"--manifest-url '{self.config.prefetch_manifest_url}' "\
+               f"--input-url '{self.config.input_container_url}' "\
+               f'--cache {prefetch.cachePath} --max-bytes {max_bytes} '\
+               f'--lookahead {prefetch.lookahead} '\
+               f'--protect-started {self.config.pool.taskSlotsPerNode} '\
+               f'> {PREFETCH_AGENT_DIR}/prefetch.log 2>&1 < /dev/null &)'
+
+
+    def get_prefetch_input_argument(self, input_file):
+        """
+        Get the Task command argument that resolves the input to its staged
+        path on the node local disk, falling back to the original path
+        through the storage mount, if the input container is mounted, or
+        else to the input downloaded by the resolve command (the input
+        resource file is not added to the prefetched Tasks).
+
+        :params str input_file: the input string.
+        :rtype: str
+        :return: the shell argument to use in the Task command.
+        """
+        prefetch = self.config.tasks.inputs.prefetch
+        fallback = ''
+        nodeStorage = self.config.pool.nodeStorageContainers
+        if nodeStorage.mount:
+            container = self.config.storage.input.container
+            if container in [c.name for c in nodeStorage.containers]:
+                fallback = f'$AZ_BATCH_NODE_MOUNTS_DIR/{container}/'
+        return f'"$(python3 {PREFETCH_AGENT_DIR}/{PREFETCH_AGENT_SCRIPT} '\
+               f'resolve --cache {prefetch.cachePath} '\
+               f'--fallback "{fallback}" \'{input_file}\')"'
+
+
+    def get_config_job(self):
+        """
+        Check if exists a job with the configured id.
+        :rtype: `azure.batch.models.CloudJob`
+        :return: The configured Job object or None if it doesn't exist.
+        """
+        for job in self.batch_service_client.job.list():
+            if (job.id == self.config.job.id):
+                return job
+        return None
+
+
+    def create_job(self):
+        """
+        Create a job with the configured id and associate with configured pool.
+        """
+        # Check if already exists a job with the configured id, exits if True
+        if self.get_config_job():
+            self.config.output.print(
+                f'Job [{self.config.job.id}] already exists...')
+            self.config.output.print()
+            return
+
+        self.config.output.print(f'Creating job [{self.config.job.id}]...')
+        # Create the job associating it with the configured pool
+        job = batchmodels.JobAddParameter(
+            id=self.config.job.id,
+            pool_info=batchmodels.PoolInformation(pool_id=self.config.pool.id)
+            )
+        # Stage the scripts once per node with a Job Preparation Task
+        resources = self.config.tasks.resources
+        if (resources.automaticScriptsUpload and
+            resources.scriptsUploadMode == 'node'):
+            job.job_preparation_task = batchmodels.JobPreparationTask(
+                command_line="/bin/bash -c 'echo Staged scripts: && ls -lR'",
+                resource_files=[self.create_scripts_resource_file()],
+                wait_for_success=True,
+                rerun_on_node_reboot_after_success=True
+                )
+            # Remove the staged scripts from the node when the job ends
+            if resources.releaseStagedScripts:
+                job.job_release_task = batchmodels.JobReleaseTask(
+                    command_line='/bin/bash -c '\
+                                 '\'rm -rf "$AZ_BATCH_JOB_PREP_WORKING_DIR"\''
+                    )
+        # Add the job on the Batch Account
+        self.batch_service_client.job.add(job)
+        self.config.output.print('Job created!')
+        self.config.output.print()
+
+
+    def enable_job_tasks(self):
+        """
+        Enable the job with configured id to receive new Tasks and starts
+        execution.
+        """
+        if not self.get_config_job():
+            self.config.output.print(
+                f"Job [{self.config.job.id}] doesn't exists...")
+            self.config.output.print()
+            return
+        # Enable the job on the Batch Account
+        self.batch_service_client.job.enable(job_id=self.config.job.id)
+
+
+    def disable_job_tasks(self):
+        """
+        Disable the job with configured id, halting the Tasks execution,
+        requeueing them and stoping it from receiving new Tasks.
+        """
+        if not self.get_config_job():
+            self.config.output.print(
+                f"Job [{self.config.job.id}] doesn't exists...")
+            self.config.output.print()
+            return
+        # Disable the job on the Batch Account
+        self.batch_service_client.job.disable(
+            job_id=self.config.job.id,
+            disable_tasks=batchmodels.DisableJobOption.requeue)
+
+
+    def reactivate_job_failed_tasks(self):
+        """
+        Reactivate the failed tasks on the job with configured id,
+        requeueing them.
+        """
+        if not self.get_config_job():
+            self.config.output.print(
+                f"Job [{self.config.job.id}] doesn't exists...")
+            self.config.output.print()
+            return 0
+        count_reactivated_tasks = 0
+        mirror = self.get_task_mirror()
+        if mirror:
+            failed_tasks = mirror.list_failed_tasks()
+        else:
+            # Set filter option to failed Tasks (ne -> not equals)
+            filter_option = "executionInfo/exitCode ne 0"
+            options = batchmodels.TaskListOptions(
+                filter=filter_option, select='id,commandLine,executionInfo')
+            batch_tasks = self.batch_service_client.task
+            failed_tasks = batch_tasks.list(job_id=self.config.job.id,
+                                            task_list_options=options)
+            if self.config.tasks.speculation.include:
+                # the Tasks terminated by a winning clone and the clones kept
+                # on the straggler node didn't fail
+                detector = StragglerDetector(self)
+                failed_tasks = [task for task in failed_tasks
+                                if not detector.is_guarded_clone(task) and
+                                not detector.is_won_by_clone(task.id)]
+            failed_tasks = [(task.id, task.command_line)
+                            for task in failed_tasks]
+        for (task_id, command_line) in failed_tasks:
+            count_reactivated_tasks += 1
+            self.config.output.print(f"{task_id}: {command_line}")
+            self.batch_service_client.task.reactivate(job_id=self.config.job.id,
+                                                      task_id=task_id)
+        return count_reactivated_tasks
+
+
+    def get_job_task_counts(self, use_mirror=False):
+        """
+        Count the Tasks on the job with configured id.
+        :params bool use_mirror: count from the local Task mirror, if
+        configured.
+        :rtype: `azure.batch.models.TaskCounts`
+        :return: The TaskCounts object from the configured job
+        """
+        mirror = self.get_task_mirror() if use_mirror else None
+        if mirror:
+            return mirror.count_tasks()
+        if self.get_config_job():
+            count = self.batch_service_client.job.get_task_counts(
+                job_id=self.config.job.id).task_counts
+        else:
+            count = batchmodels.TaskCounts(active=0, running=0, completed=0,
+                                           succeeded=0, failed=0)
+        count.total = count.active + count.running + count.completed
+        return count
+
+
+    def count_job_tasks(self):
+        """
+        Get count information about tasks on the configured Job.
+
+        :rtype: (int, int)
+        :return: total task count and completed task count.
+        """
+        # Get the tasks count on the configured JOB_ID
+        task_counts = self.get_job_task_counts()
+        return (task_counts.total, task_counts.completed)
+
+
+    def filter_input_list_by_existing_tasks(self, input_list):
+        """
+        Filter the input list, removing the inputs that are already set on an
+        existing Task.
+        :params input_list: the original input list
+        :type input_list: list<tuple(str, int, int)>
+        :rtype: list<tuple(str, int, int)>
+        :return: The filtered input list.
+        """
+        all_tasks_command = {}
+        mirror = self.get_task_mirror()
+        if mirror:
+            all_tasks_command = mirror.get_commands()
+        else:
+            cfg_job = self.get_config_job()
+            # Set all_tasks_command with commands of all tasks on the
+            # configured job
+            if cfg_job:
+                options = batchmodels.TaskListOptions(select='id,commandLine')
+                for task in self.batch_service_client.task.list(
+                        job_id=cfg_job.id, task_list_options=options):
+                    all_tasks_command[task.command_line] = task.id
+
+        # Creates a filtered input list removing the inputs that already have a
+        # task running the associated command
+        filtered_input_list = []
+        for input in input_list:
+            cmd = self.get_task_command(input[0])
+            if cmd in all_tasks_command:
+                self.config.reporter.item(
+                    'existing task', f'* Already exists in '\
+                    f'{all_tasks_command[cmd]} the command: {cmd}')
+            else:
+                filtered_input_list.append(input)
+        self.config.output.print()
+        self.config.output.pause(5)
+        # returns the filtered list
+        return filtered_input_list
+
+
+    def create_task_output_file(self, file_pattern, destination_path,
+                                upload_condition):
+        """
+        Create an OutputFile to retrieve files from computing nodes after
+        Task execution.
+
+        :params str file_pattern: pattern to match the files to retrieve.
+        :params str destination_path: path on configured output container to
+        place the files.
+        :params upload_condition: condition to upload the output file,
+        must be task_completion, task_success or task_failure.
+        :type upload_condition: `azure.batch.models.OutputFileUploadCondition`
+        :rtype: `azure.batch.models.OutputFile`
+        :return: the OutputFile to include in Tasks for retrieval.
+        """
+        return batchmodels.OutputFile(
+            file_pattern=file_pattern,
+            destination=batchmodels.OutputFileDestination(
+                container=batchmodels.OutputFileBlobContainerDestination(
+                    container_url=self.config.output_container_url,
+                    path=destination_path
                     )
+                ),
+            upload_options=batchmodels.OutputFileUploadOptions(
+                upload_condition=upload_condition
+                )
+            )
+
+
+    def create_scripts_resource_file(self):
+        """
+        Create the ResourceFile to download the configured scripts.
+
+        :rtype: `azure.batch.models.ResourceFile`
+        :return: the ResourceFile with the configured scripts blob prefix.
+        """
+        return batchmodels.ResourceFile(
+            blob_prefix=self.config.storage.scripts.blobPrefix,
+            storage_container_url=self.config.scripts_container_url
+            )
+
+
+    def get_task_command(self, input_file):
+        """
+        Get the Task commandLine to process the given input.
+        If the scripts are staged per node, the command first links the
+        staged scripts into the Task working directory, so the configured
+        command can reference them with the same relative paths. The scripts
+        are linked file by file, removing them doesn't affect the staged
+        copy used by the other Tasks on the node.
+
+        :params str input_file: the input string.
+        :rtype: str
+        :return: the Task commandLine.
+        """
+        input_argument = f"'{input_file}'"
+        use_shell = False
+        # Use the input staged by the prefetch agent, when available
+        if self.config.tasks.inputs.prefetch.include:
+            input_argument = self.get_prefetch_input_argument(input_file)
+            use_shell = True
+        command = f"{self.config.tasks.command} {input_argument} "\
+                  f"{self.config.tasks.commandSuffix}"
+        resources = self.config.tasks.resources
+        if (resources.automaticScriptsUpload and
+            resources.scriptsUploadMode == 'node'):
+            link = 'cp -rs "$AZ_BATCH_JOB_PREP_WORKING_DIR/." . && '
+            command = link + command
+            use_shell = True
+        # Write the input stamp after a successful execution
+        stamp = self.config.input_stamps.get(input_file)
+        if stamp:
+            content = json.dumps({'input':input_file, 'stamp':stamp})
+            command = f"{command} && printf '%s\\n' "\
+                      f"{shlex.quote(content)} > {STAMP_FILE}"
+            use_shell = True
+        # Pack the outputs after a successful execution, before the upload
+        outputs = self.config.tasks.outputs
+        if outputs.automaticUpload and outputs.packing.include:
+            command = f'{command}; act_rc=$?; if [ $act_rc -eq 0 ]; then '\
+                      f'{self.get_output_packing_command()} || act_rc=$?; '\
+                      f'fi; exit $act_rc'
+            use_shell = True
+        if use_shell:
+            command = f'/bin/bash -c {shlex.quote(command)}'
+        # Report the peak memory of the command on the Task stderr
+        if self.config.tasks.measurePeakMemory:
+            if not use_shell:
+                command = f'/bin/bash -c {shlex.quote(command)}'
+            command = f'python3 -c {shlex.quote(PEAK_MEMORY_WRAPPER)} {command}'
+        return command
+
+
+    def get_output_packing_command(self):
+        """
+        Get the shell command to compress the files matching the configured
+        outputs pattern (gzip or zstd), each file individually or bundled
+        into a single tar file per Task.
+
+        :rtype: str
+        :return: the shell command to pack the outputs.
+        """
+        outputs = self.config.tasks.outputs
+        packing = outputs.packing
+        compress = 'gzip -c' if packing.compression == 'gzip' else 'zstd -q -c'
+        suffix = PACKING_SUFFIX[packing.compression]
+        glob = 'shopt -s globstar nullglob'
+        if packing.bundle:
+            return f'({glob}; tar -cf - {outputs.pattern} | '\
+                   f'{compress} > {PACKING_BUNDLE}.tar{suffix})'
+        return f'({glob}; for act_file in {outputs.pattern}; do '\
+               f'{compress} "$act_file" > "$act_file{suffix}" && '\
+               f'rm "$act_file" || exit 1; done)'
+
+
+    def get_output_name(self, input_file):
+        """
+        Get the output name of an input blob: its name without the input path
+        and the input extension.
+        """
+        input_path_len = len(self.config.storage.input.path)
+        input_extension_len = len(self.config.tasks.inputs.inputFileExtension)
+        return input_file[input_path_len:len(input_file)-input_extension_len]
+
+
+    def create_stamp_output_file(self, input_file, stamp):
+        """
+        Create the OutputFile to upload the stamp of a successful Task, named
+        after the output name and the stamp, so the up to date outputs are
+        found by listing the stamps path.
+
+        :params str input_file: the input string.
+        :params str stamp: the input stamp.
+        :rtype: `azure.batch.models.OutputFile`
+        :return: the OutputFile to include in the Task.
+        """
+        stamp_path = self.config.tasks.inputs.incremental.stampPath
+        return self.create_task_output_file(
+            file_pattern=STAMP_FILE,
+            destination_path=f'{stamp_path}{self.get_output_name(input_file)}'\
+                             f'.{stamp}.json',
+            upload_condition=batchmodels.OutputFileUploadCondition.task_success
+            )
+
+
+    def create_packed_output_file(self, input_file, task_id):
+        """
+        Create the OutputFile to upload the packed outputs of a Task. The
+        bundle blob is named after the input (without its extension) followed
+        by the configured outputFileExtension, so it is still recognized by
+        filterOutExistingBlobInOutputStorage, or after the Task id if the
+        inputs are not storage blobs.
+
+        :params str input_file: the input string.
+        :params str task_id: the Task id.
+        :rtype: `azure.batch.models.OutputFile`
+        :return: the OutputFile to include in the Task.
+        """
+        OutputFileUploadCondition = batchmodels.OutputFileUploadCondition
+        outputs = self.config.tasks.outputs
+        suffix = PACKING_SUFFIX[outputs.packing.compression]
+        if not outputs.packing.bundle:
+            return self.create_task_output_file(
+                file_pattern=f'{outputs.pattern}{suffix}',
+                destination_path=f'{outputs.destinationPath}',
+                upload_condition=OutputFileUploadCondition.task_success
                 )
-            if self.config.tasks.outputs.automaticUpload:
-                outputUpload = self.config.tasks.output
-                output_files.append(self.create_task_output_file(
-                    file_pattern=outputUpload.pattern,
-                    destination_path=f'{outputUpload.destinationPath}',
-                    upload_condition=OutputFileUploadCondition.task_success
+        if self.config.tasks.inputs.areBlobsInInputStorage:
+            name = self.get_output_name(input_file)
+            name = f'{name}{self.config.tasks.inputs.outputFileExtension}'
+        else:
+            name = task_id
+        return self.create_task_output_file(
+            file_pattern=f'{PACKING_BUNDLE}.tar{suffix}',
+            destination_path=f'{outputs.destinationPath}{name}.tar{suffix}',
+            upload_condition=OutputFileUploadCondition.task_success
+            )
+
+
+    def get_task_id(self, idx, command):
+        """
+        Get the id of a Task. If deterministicTaskIds is configured the id is
+        derived from a hash of the Task command (which includes the input),
+        otherwise it is the sequential index of the Task in the Job.
+
+        :params int idx: index of the input on the input list.
+        :params str command: the Task commandLine.
+        :rtype: str
+        :return: the Task id.
+        """
+        if self.config.tasks.deterministicTaskIds:
+            digest = hashlib.sha256(command.encode('utf-8')).hexdigest()
+            return f'Task{digest[:40]}'
+        return f'Task{idx+self.start_id:0{self.tasks_id_len}}'
+
+
+    def submit_task_collection(self, task_list):
+        """
+        Add the Tasks to be executed on the Batch Account, recording them in
+        the submission journal (if configured). With deterministic Task ids
+        a 'TaskExists' error means the Task was already submitted, so it is
+        considered a success.
+
+        :params task_list: the Tasks to add.
+        :type task_list: list<`azure.batch.models.TaskAddParameter`>
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service.
+        """
+        task_ids = [task.id for task in task_list]
+        chunk_id = hashlib.sha256(
+            ','.join(task_ids).encode('utf-8')).hexdigest()[:16]
+        if self.journal:
+            self.journal.begin(chunk_id, task_ids)
+
+        result = self.batch_service_client.task.add_collection(
+            self.config.job.id, task_list)
+
+        accepted = []
+        for task_result in result.value:
+            if task_result.status == batchmodels.TaskAddStatus.success:
+                accepted.append(task_result.task_id)
+            elif (self.config.tasks.deterministicTaskIds and
+                  task_result.error and
+                  task_result.error.code == 'TaskExists'):
+                accepted.append(task_result.task_id)
+            else:
+                message = task_result.error.message.value \
+                          if task_result.error and task_result.error.message \
+                          else task_result.status
+                self.config.reporter.item(
+                    'failed task', f'* Failed to add {task_result.task_id}: '\
+                    f'{message}', 'error')
+
+        if self.journal:
+            self.journal.acknowledge(chunk_id, accepted)
+        return len(accepted)
+
+
+    def create_task(self, task_id, command, input_file, input_size,
+                    input_slots, stamp=None):
+        """
+        Create the Task to process the given input, with the configured
+        resource files, output files and constraints. The input name, size
+        and stamp are set on the Task environment (ACT_INPUT, ACT_INPUT_SIZE
+        and ACT_STAMP), so the Task can be recreated from the job.
+
+        :params str task_id: the Task id.
+        :params str command: the Task commandLine.
+        :params str input_file: the input string.
+        :params int input_size: the input size.
+        :params int input_slots: the required slots of the Task.
+        :params str stamp: the input stamp (default: the one read from the
+        input container).
+        :rtype: `azure.batch.models.TaskAddParameter`
+        :return: the Task to be added to the configured job.
+        """
+        resource_files=[]
+        resources = self.config.tasks.resources
+        if (resources.automaticScriptsUpload and
+            resources.scriptsUploadMode == 'task'):
+            resource_files.append(self.create_scripts_resource_file())
+        # With prefetch the inputs are staged by the node agent instead
+        if (self.config.tasks.resources.automaticInputsUpload and
+            not self.config.tasks.inputs.prefetch.include):
+            resource_files.append(
+                batchmodels.ResourceFile(
+                    blob_prefix=input_file,
+                    storage_container_url=self.config.input_container_url
                     )
                 )
+        OutputFileUploadCondition = batchmodels.OutputFileUploadCondition
+        output_files=[]
+        if self.config.tasks.logs.automaticUpload:
+            logUpload = self.config.tasks.logs
+            output_files.append(self.create_task_output_file(
+                file_pattern=logUpload.pattern,
+                destination_path=f'{logUpload.destinationPath}{task_id}',
+                upload_condition=OutputFileUploadCondition.task_completion
+                )
+            )
+        if (self.config.tasks.outputs.automaticUpload and
+            self.config.tasks.outputs.packing.include):
+            output_files.append(
+                self.create_packed_output_file(input_file, task_id))
+        elif self.config.tasks.outputs.automaticUpload:
+            outputUpload = self.config.tasks.outputs
+            output_files.append(self.create_task_output_file(
+                file_pattern=outputUpload.pattern,
+                destination_path=f'{outputUpload.destinationPath}',
+                upload_condition=OutputFileUploadCondition.task_success
+                )
+            )
+
+        environment_settings=[
+            batchmodels.EnvironmentSetting(name='ACT_INPUT', value=input_file),
+            batchmodels.EnvironmentSetting(name='ACT_INPUT_SIZE',
+                                           value=str(input_size))
+            ]
+        if stamp is None:
+            stamp = self.config.input_stamps.get(input_file)
+        if stamp:
+            output_files.append(self.create_stamp_output_file(input_file,
+                                                              stamp))
+            environment_settings.append(
+                batchmodels.EnvironmentSetting(name='ACT_STAMP', value=stamp))
+
+        # Create the Task with specified id, command,
+        # resource files (inputs) and output files
+        return batchmodels.TaskAddParameter(
+            id=task_id,
+            command_line=command,
+            required_slots=input_slots,
+            environment_settings=environment_settings,
+            constraints=batchmodels.TaskConstraints(
+                retention_time=datetime.timedelta(
+                    minutes=self.config.tasks.retentionTimeInMinutes
+                    ),
+                max_task_retry_count=self.config.tasks.retryCount,
+                ),
+            resource_files=resource_files,
+            output_files=output_files,
+            affinity_info=self.get_locality_affinity(input_file)
+            )
+
+
+    def get_locality_affinity(self, input_file):
+        """
+        Get the affinity of the node assigned to the input group.
+
+        :params str input_file: the input string.
+        :rtype: `azure.batch.models.AffinityInformation`
+        :return: the node affinity, or None if the input has no node.
+        """
+        if not self.locality:
+            return None
+        affinity_id = self.locality_affinity.get(
+            self.locality.get_key(input_file))
+        if not affinity_id:
+            return None
+        return batchmodels.AffinityInformation(affinity_id=affinity_id)
+
+
+    def get_node_affinity_ids(self):
+        """
+        Get the affinity ids of the usable (or starting) configured pool nodes.
+
+        :rtype: dict<str:str>
+        :return: the node id of each affinity id.
+        """
+        failed_states = ['unusable', 'starttaskfailed', 'leavingpool',
+                         'offline']
+        options = batchmodels.ComputeNodeListOptions(select='id,state,'\
+                                                     'affinityId')
+        return {node.affinity_id:node.id for node in
+                self.batch_service_client.compute_node.list(
+                    self.config.pool.id, compute_node_list_options=options)
+                if getattr(node.state, 'value', node.state) not in failed_states}
+
+
+    def wait_node_affinity_ids(self):
+        """
+        Get the affinity ids of the configured pool nodes, waiting up to
+        locality.nodeWaitInSeconds for the nodes of a pool being resized
+        (as a pool just created): the nodes are listed while they are
+        allocated, so it waits until the pool has its target nodes or its
+        allocation is steady.
+
+        :rtype: dict<str:str>
+        :return: the node id of each affinity id.
+        """
+        deadline = time.time() + \
+            self.config.tasks.inputs.locality.nodeWaitInSeconds
+        waited = False
+        while True:
+            affinity_ids = self.get_node_affinity_ids()
+            pool = self.get_config_pool()
+            if pool is None:
+                return affinity_ids
+            target = (pool.target_dedicated_nodes or 0) + \
+                     (pool.target_low_priority_nodes or 0)
+            state = getattr(pool.allocation_state, 'value',
+                            pool.allocation_state)
+            if (len(affinity_ids) >= target or state == 'steady' or
+                time.time() > deadline):
+                if waited:
+                    self.config.output.print()
+                return affinity_ids
+            self.config.output.print(
+                f'Locality: waiting for the pool nodes '\
+                f'({len(affinity_ids)}/{target})', end='\r')
+            waited = True
+            time.sleep(10)
+
+
+    def report_locality(self):
+        """
+        Print the locality report of the configured job Tasks.
+        """
+        options = batchmodels.TaskListOptions(
+            filter="state eq 'completed'",
+            select='id,environmentSettings,nodeInfo,affinityInfo')
+        self.locality.report(self.batch_service_client.task.list(
+            job_id=self.config.job.id, task_list_options=options))
+
+
+    def create_task_collection(self, input_list, ini_id, end_id, execute_tasks):
+        """
+        Create Tasks with specified command.
+        Add them to the Batch Service to be queued for execution.
+        Cannot include too many Tasks at once because of resources limitation.
+
+        :params int ini_id: initial index on input list to create and add Task.
+        :params int end_id: final index on input list to create and add Task.
+        :param bool execute_tasks: if True include tasks to be executed,
+        otherwise just create the task list to be showed.
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service (or
+        showed).
+        """
+        # Add one task for each given input file
+        task_list = list()
+        for idx in range(ini_id, end_id):
+            (input_file, input_size, input_slots) = input_list[idx][:3]
+            command = self.get_task_command(input_file)
+            taskId = self.get_task_id(idx, command)
+            if self.config.argument.showTasks:
+                self.config.reporter.item('task command',
+                                          f'{taskId} command: {command}')
+            # a dry run only shows the commands, not creating the Tasks
+            if execute_tasks:
+                task_list.append(self.create_task(taskId, command, input_file,
+                                                  input_size, input_slots))
+        # Add the Tasks to be executed on the Batch Account
+        if execute_tasks:
+            accepted = self.submit_task_collection(task_list)
+            self.config.output.print(f'{accepted} tasks included!')
+            self.config.output.pause(5)
+            return accepted
+        return end_id - ini_id
+
+
+    @staticmethod
+    def get_task_payload_size(task):
+        """
+        Get the size of the Task on the add collection request body.
+
+        :params task: the Task to add.
+        :type task: `azure.batch.models.TaskAddParameter`
+        :rtype: int
+        :return: the size in bytes of the serialized Task.
+        """
+        return len(json.dumps(task.serialize()).encode('utf-8')) + 1
+
+
+    @staticmethod
+    def is_request_body_too_large(error):
+        """
+        Check if the error is the rejection of a request body too large.
+        """
+        code = getattr(getattr(error, 'error', None), 'code', None)
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return code == 'RequestBodyTooLarge' or status == 413
+
+
+    def submit_task_collection_splitting(self, task_list, payload_size):
+        """
+        Add the Tasks to the configured job, splitting the collection in
+        halves (recursively) if the request body is too large for the Batch
+        Service. The maximum payload size is lowered below the rejected size.
+
+        :params task_list: the Tasks to add.
+        :type task_list: list<`azure.batch.models.TaskAddParameter`>
+        :params int payload_size: the serialized size of the Tasks.
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service.
+        """
+        try:
+            return self.submit_task_collection(task_list)
+        except Exception as err:
+            if not self.is_request_body_too_large(err) or len(task_list) < 2:
+                raise
+        self.collection_max_bytes = min(self.collection_max_bytes,
+                                        int(payload_size * 0.9))
+        self.config.output.print(
+            f'* Request body too large ({len(task_list)} tasks, '\
+            f'{payload_size} bytes), splitting it')
+        half = len(task_list) // 2
+        accepted = 0
+        for chunk in [task_list[:half], task_list[half:]]:
+            chunk_size = sum([self.get_task_payload_size(task)
+                              for task in chunk])
+            accepted += self.submit_task_collection_splitting(chunk,
+                                                              chunk_size)
+        return accepted
+
+
+    def create_task_collections_by_payload(self, input_list):
+        """
+        Create the Tasks and add them to the configured job in collections
+        sized by their serialized size, up to the Batch Service limits of
+        Tasks and bytes per request. The number of Tasks per collection is
+        adjusted by the request latency: halved when a request takes longer
+        than addCollectionTargetLatencyInSeconds, and increased when it
+        takes less than half of it.
+
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service.
+        """
+        target_latency = self.config.tasks.addCollectionTargetLatencyInSeconds
+        self.collection_max_bytes = self.config.tasks.addCollectionMaxBytes
+        count_limit = MAX_TASKS_PER_COLLECTION
+        chunk, chunk_size = [], 0
+        total_accepted = 0
+        for (idx, input) in enumerate(input_list + [None]):
+            task, task_size = None, 0
+            if input is not None:
+                (input_file, input_size, input_slots) = input[:3]
+                command = self.get_task_command(input_file)
+                task_id = self.get_task_id(idx, command)
+                if self.config.argument.showTasks:
+                    self.config.reporter.item('task command',
+                                              f'{task_id} command: {command}')
+                task = self.create_task(task_id, command, input_file,
+                                        input_size, input_slots)
+                task_size = self.get_task_payload_size(task)
+                if task_size > self.collection_max_bytes:
+                    raise RuntimeError(f'ERROR: Task {task_id} size '\
+                                       f'({task_size} bytes) exceeds the '\
+                                       f'addCollectionMaxBytes.')
+
+            # submit the chunk when the next Task doesn't fit (or at the end)
+            if chunk and (task is None or len(chunk) >= int(count_limit) or
+                          chunk_size + task_size > self.collection_max_bytes):
+                init = time.time()
+                accepted = self.submit_task_collection_splitting(chunk,
+                                                                 chunk_size)
+                latency = time.time() - init
+                total_accepted += accepted
+                self.config.output.print(
+                    f'{accepted} tasks included ({len(chunk)} tasks, '\
+                    f'{chunk_size} bytes, {latency:.1f} s)')
+                if latency > target_latency:
+                    count_limit = max(1, count_limit / 2)
+                elif latency < target_latency / 2:
+                    count_limit = min(MAX_TASKS_PER_COLLECTION,
+                                      count_limit + 10)
+                chunk, chunk_size = [], 0
+            if task is not None:
+                chunk.append(task)
+                chunk_size += task_size
+        return total_accepted
+
+
+    def create_tasks(self, input_list, execute_tasks, incremental=False):
+        """
+        Add a task for each input file in the collection to the configured job.
+        If the flag filterOutExistingTaskInCurrentJob is True, only add
+        inputs that don't exist in the Tasks from the configured Job.
+
+        :param input_files: A collection of input files. One task
+        will be created for each input file. Each input is a tuple with a
+        string representing the input item, the input size and the input
+        required slots.
+        :type input_list: list<tuple(str, int, int)>
+        :param bool execute_tasks: if True include tasks to be executed,
+        otherwise just create the task list to be showed.
+        :param bool incremental: the inputs are added to the ones already
+        submitted (the watch mode): they are not filtered by the existing
+        Tasks or the journal (the deterministic Task ids make the existing
+        ones a 'TaskExists'), the groups already assigned to a node keep it,
+        the new groups are assigned to the nodes already listed (without
+        waiting for the pool nodes) and the inputs are appended to the
+        prefetch manifest.
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service (or
+        showed).
+        """
+        if execute_tasks:
+            if not self.get_config_job():
+                self.config.output.print(
+                    f"Job [{self.config.job.id}] doesn't exists...")
+                self.config.output.print()
+                return 0
+            self.config.output.print(
+                f'Adding tasks to job [{self.config.job.id}]...')
+
+        if (not incremental and
+            self.config.tasks.inputs.filterOutExistingTaskInCurrentJob):
+            # Filter input list removing existing inputs in current Tasks
+            input_list = self.filter_input_list_by_existing_tasks(input_list)
+        if execute_tasks and self.journal and not incremental:
+            # Filter input list removing inputs acknowledged in the journal
+            acknowledged = self.journal.get_acknowledged_task_ids()
+            input_list = [input for input in input_list
+                          if self.get_task_id(0, self.get_task_command(input[0]))
+                          not in acknowledged]
+            self.config.output.print(
+                f'{len(acknowledged)} tasks already acknowledged in '\
+                f'journal {self.journal.path}')
+        self.config.output.print(f'Adding {len(input_list)} tasks!')
+        if execute_tasks and self.locality:
+            assigned = self.locality_affinity if incremental else {}
+            keys = set([self.locality.get_key(input[0])
+                        for input in input_list])
+            # the nodes are only listed if there are groups to assign; the
+            # micro-batches don't wait for the nodes of a resizing pool (the
+            # groups are added without affinity if there are no nodes yet)
+            affinity_ids = {}
+            if keys - set(assigned) and incremental:
+                affinity_ids = self.get_node_affinity_ids()
+            elif keys - set(assigned):
+                affinity_ids = self.wait_node_affinity_ids()
+            self.node_ids.update(affinity_ids)
+            self.locality_affinity = self.locality.assign_nodes(
+                input_list, list(affinity_ids), assigned)
+            self.config.output.print(
+                f'Locality: {len(self.locality_affinity)} input groups '\
+                f'assigned to {len(set(self.locality_affinity.values()))} '\
+                f'nodes')
+            unassigned = keys - set(self.locality_affinity)
+            if unassigned:
+                self.config.reporter.item(
+                    'no locality', f'Locality: no usable pool nodes, '\
+                    f'{len(unassigned)} input groups added without node '\
+                    f'affinity', 'warning')
+        if execute_tasks and self.config.tasks.inputs.prefetch.include:
+            self.upload_prefetch_manifest(input_list, append=incremental)
+
+        # Set Task id length to include trailing zeros in TaskId
+        # (not needed if the ids are derived from the Task commands)
+        if not self.config.tasks.deterministicTaskIds:
+            # a dry run (just showing the tasks) doesn't query the service
+            existing_tasks_in_job = 0
+            if execute_tasks:
+                existing_tasks_in_job, _ = self.count_job_tasks()
+            total = len(input_list) + existing_tasks_in_job
+            self.start_id = existing_tasks_in_job + 1
+            self.tasks_id_len = f'{len(str(total))}'
+
+        # Add all tasks to the batch, a few at a time.
+        # Each Task with a given input file.
+        # Cannot include too many Tasks at once because of resources limitation.
+        step = self.config.tasks.addCollectionStep
+        accepted = 0
+        if step == 'auto' and execute_tasks:
+            accepted = self.create_task_collections_by_payload(input_list)
+            step = 0
+        elif step == 'auto':
+            step = MAX_TASKS_PER_COLLECTION
+        added_tasks = 0
+        total_tasks = len(input_list) if step else 0
+        while (added_tasks < total_tasks):
+            ini = added_tasks
+            end = ini + step
+            if(end > total_tasks):
+                end = total_tasks
+            accepted += self.create_task_collection(input_list, ini, end,
+                                                    execute_tasks)
+            added_tasks += end-ini
+
+        if execute_tasks:
+            self.config.output.print()
+            self.config.output.print('All tasks created!!')
+            self.config.output.pause(10)
+            self.config.output.print()
+        return accepted
+
+
+    def get_task_peak_memory(self, task_id):
+        """
+        Get the peak memory reported on the Task stderr, when the Task
+        command is configured to measurePeakMemory.
+
+        :params str task_id: the Task id.
+        :rtype: int
+        :return: the peak resident memory in KB or None if not reported.
+        """
+        try:
+            data = b''.join(self.batch_service_client.file.get_from_task(
+                self.config.job.id, task_id, 'stderr.txt'))
+        except batchmodels.BatchErrorException:
+            return None
+        for line in reversed(data.decode('utf-8', 'replace').splitlines()):
+            if line.startswith(PEAK_MEMORY_MARKER):
+                return int(line.split()[1])
+        return None
+
+
+    def wait_job_tasks_completion(self, timeout=None):
+        """
+        Wait for all tasks in the configured job to reach the Completed state,
+        printing progress information.
+
+        :params float timeout: maximum time to wait, in seconds (no limit if
+        None).
+        :rtype: `azure.batch.models.TaskCounts`
+        :return: the Task counts of the completed job.
+        """
+        init = time.time()
+        deadline = init + timeout if timeout else None
+        total_tasks, completed_tasks = self.count_job_tasks()
+        progress = ''
+        monitor = CompletionMonitor(self)
+
+        # the Task counts are updated with delay after a submission
+        while (completed_tasks < total_tasks or
+               (total_tasks == 0 and time.time() - init < TASK_COUNTS_DELAY)):
+            if deadline and time.time() > deadline:
+                raise RuntimeError(f'ERROR: Tasks did not complete within '\
+                                   f'timeout period of {timeout} s.')
+            time.sleep(2)
+            monitor.poll()
+            total_tasks, completed_tasks = self.count_job_tasks()
+            # Print progress
+            progress = '.' if (len(progress) > 4) else progress+'.'
+            self.config.output.print(
+                f'Progress {completed_tasks:03d}/{total_tasks:03d} ' \
+                f'{progress: <10}', end='\r')
+        self.config.output.print()
+        self.config.output.print()
+        self.config.output.print("All tasks reached the 'Completed' state")
+        self.config.output.print()
+        monitor.finish()
+        return self.get_job_task_counts()
+
+
+    def list_resources(self, state=None, job_prefix=None, task_prefix=None,
+                       output_format='table', output=None, limit=None):
+        """
+        List Batch resources: the Pools, the Jobs and their Tasks, filtered
+        by the Task state and the Job and Task id prefixes.
+
+        :params str state: the Task state.
+        :params str job_prefix: the Job id prefix.
+        :params str task_prefix: the Task id prefix.
+        :params str output_format: 'table', 'jsonl' or 'csv'.
+        :params str output: file to write the listing (default stdout).
+        :params int limit: maximum number of listed Tasks.
+        """
+        lister = ResourceLister(self, state, job_prefix, task_prefix)
+        lister.run(output_format, output, limit)
+
+
+    def delete_resources(self, configured_only=False):
+        """
+        Delete Batch resources. Terminate and delete Tasks, Jobs and Pools.
+
+        :params bool configured_only: delete only the configured job and
+        pool, otherwise all the jobs and pools of the Batch account.
+        :rtype: `types.SimpleNamespace`
+        :return: the ids of the deleted jobs and pools.
+        """
+        def list_ids(operations, configured_id):
+            return [resource.id for resource in operations.list()
+                    if not configured_only or resource.id == configured_id]
+
+        # Set the expiration timeout with configured timeout
+        timeout_expiration = datetime.datetime.now() + datetime.timedelta(
+            minutes=self.config.cleanup.timeoutInMinutes)
+        deleted = SimpleNamespace(jobs=[], pools=[])
+        client = self.batch_service_client
+        (job_id, pool_id) = (self.config.job.id, self.config.pool.id)
+
+        # Get all jobs and mark for deletion
+        for resource_id in list_ids(client.job, job_id):
+            client.job.delete(resource_id)
+            deleted.jobs.append(resource_id)
+            self.config.output.print(f'Deleting Job: {resource_id}')
+        self.config.output.pause(2)
+        self.config.output.print()
+
+        # Get all pools and mark for deletion
+        for resource_id in list_ids(client.pool, pool_id):
+            client.pool.delete(resource_id)
+            deleted.pools.append(resource_id)
+            self.config.output.print(f'Deleting Pool: {resource_id}')
+        self.config.output.pause(2)
+        self.config.output.print()
+
+        # While haven't finish, the cleanup process keeps printing
+        # progress information
+        dot = ''
+        timeout = self.config.cleanup.timeoutInMinutes
+        while(len(list_ids(client.job, job_id)) > 0 or
+              len(list_ids(client.pool, pool_id)) > 0):
+            time.sleep(2)
+            dot = '.' if (len(dot) > 4) else dot+'.'
+            self.config.output.print(
+                f'Cleaning up resources{dot: <10}', end='\r')
+            # if reach the timeout expiration time raise an exception
+            if(datetime.datetime.now() > timeout_expiration):
+                raise RuntimeError(f'ERROR: Cleanup did not finish within '\
+                                   f'timeout period of {timeout} min.')
+        self.config.output.print()
+        self.config.output.print('Cleanup completed!')
+        return deleted
+
+
+    def print_batch_exception(self, batch_exception):
+        """
+        Print the contents of the specified Batch exception.
+
+        :param batch_exception: the occurring exception.
+        :type batch_exception: `azure.batch.models.BatchErrorException`
+        """
+        self.config.output.print('-------------------------------------------')
+        self.config.output.print('Exception encountered:')
+        if (batch_exception.error and
+            batch_exception.error.message and
+            batch_exception.error.message.value):
+            self.config.output.print(batch_exception.error.message.value)
+            if batch_exception.error.values:
+                self.config.output.print()
+                for mesg in batch_exception.error.values:
+                    self.config.output.print('{mesg.key}:\t{mesg.value}')
+        self.config.output.print('-------------------------------------------')
+
+
+class ConfigurationReader():
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2022/02/03
+
+    Class to read the configuration file and the corresponding storage
+    containers and the input list.
+    """
+    config = None
+
+    def __init__(self, json_file, output=None):
+        """
+        Create the Configuration utility
+
+        :params str json_file: string containing the json file data.
+        :params output: the output of the session (the terminal if None).
+        :type output: `SessionOutput`
+        """
+        self.output = output or SessionOutput()
+        self.load_config(json_file)
+
+
+    def get_config(self):
+        """
+        Get the configuration attributes
+
+        :rtype: `azure_batch.config_reader.ConfigurationReader.config`
+        :return: configuration object with json attributes as object attributes.
+        """
+        return self.config
+
+
+    def load_config(self, json_file):
+        """
+        Load the configuration from the specified json file and returns the
+        corresponding configuration object.
+
+        :params str json_file: string containing the json file data.
+        :rtype: `azure_batch.config_reader.Configuration.config`
+        :return: configuration object with json attributes as object attributes.
+        """
+        self.config = None
+        # read the JSON file
+        with json_file as data:
+            # parse data into an object with attributes
+            # corresponding to the dict keys
+            hook = lambda d: SimpleNamespace(**d)
+            self.config = json.load(data, object_hook=hook)
+        self.config.output = self.output
+
+        # set default values
+        if not hasattr(self.config, 'reporting'):
+            self.config.reporting = SimpleNamespace()
+        reporting = self.config.reporting
+        if not hasattr(reporting, 'level'):
+            reporting.level = 'info'
+        if reporting.level not in Reporter.LEVELS:
+            raise ValueError(f"The reporting level must be one of "\
+                             f"{', '.join(Reporter.LEVELS)}!")
+        if not hasattr(reporting, 'samplesPerCategory'):
+            reporting.samplesPerCategory = 20
+        if not hasattr(reporting, 'sampleIntervalInSeconds'):
+            reporting.sampleIntervalInSeconds = 5
+        if not hasattr(reporting, 'detailPath'):
+            reporting.detailPath = None
+        self.config.reporter = Reporter(reporting, self.config.output)
+        if not hasattr(self.config.batch, 'accounts'):
+            self.config.batch.accounts = []
+        if not hasattr(self.config.batch, 'governor'):
+            self.config.batch.governor = SimpleNamespace()
+        governor = self.config.batch.governor
+        if not hasattr(governor, 'maxRetries'):
+            governor.maxRetries = 8
+        if not hasattr(governor, 'baseDelayInSeconds'):
+            governor.baseDelayInSeconds = 1
+        if not hasattr(governor, 'maxDelayInSeconds'):
+            governor.maxDelayInSeconds = 60
+        for account in self.config.batch.accounts:
+            for key in ['accountName', 'accountKey', 'accountUrl']:
+                if not hasattr(account, key):
+                    raise ValueError(f"Batch accounts require the {key}!")
+        if not hasattr(self.config.tasks.inputs, 'taskSlotFormula'):
+            self.config.tasks.inputs.taskSlotFormula = []
+        if not hasattr(self.config.tasks, 'addCollectionStep'):
+            self.config.tasks.addCollectionStep = 'auto'
+        step = self.config.tasks.addCollectionStep
+        if (step != 'auto' and (not isinstance(step, int) or
+                                not 0 < step <= MAX_TASKS_PER_COLLECTION)):
+            raise ValueError(f"addCollectionStep must be 'auto' or a number "\
+                             f"from 1 to {MAX_TASKS_PER_COLLECTION}!")
+        if not hasattr(self.config.tasks, 'addCollectionMaxBytes'):
+            # the Batch Service limit is 1 MB, including the request envelope
+            self.config.tasks.addCollectionMaxBytes = 900000
+        if not hasattr(self.config.tasks, 'addCollectionTargetLatencyInSeconds'):
+            self.config.tasks.addCollectionTargetLatencyInSeconds = 10
+        if not hasattr(self.config.tasks, 'commandSuffix'):
+            self.config.tasks.commandSuffix = ""
+        if not hasattr(self.config.tasks.inputs, 'filterOutExistingTaskInCurrentJob'):
+            self.config.tasks.inputs.filterOutExistingTaskInCurrentJob = False
+        if not hasattr(self.config.tasks.resources, 'scriptsUploadMode'):
+            self.config.tasks.resources.scriptsUploadMode = 'task'
+        if self.config.tasks.resources.scriptsUploadMode not in ('task', 'node'):
+            raise ValueError("scriptsUploadMode must be 'task' or 'node'!")
+        if not hasattr(self.config.tasks.resources, 'releaseStagedScripts'):
+            self.config.tasks.resources.releaseStagedScripts = False
+        if not hasattr(self.config.tasks, 'measurePeakMemory'):
+            self.config.tasks.measurePeakMemory = False
+        if not hasattr(self.config.tasks, 'calibration'):
+            self.config.tasks.calibration = SimpleNamespace()
+        calibration = self.config.tasks.calibration
+        if not hasattr(calibration, 'memoryPerNodeInGB'):
+            calibration.memoryPerNodeInGB = 0
+        if not hasattr(calibration, 'safetyFactor'):
+            calibration.safetyFactor = 1.2
+        if not hasattr(calibration, 'sampleSize'):
+            calibration.sampleSize = 100
+        if not hasattr(calibration, 'minSamples'):
+            calibration.minSamples = 5
+        if not hasattr(calibration, 'maxRounds'):
+            calibration.maxRounds = 10
+        if not hasattr(calibration, 'intervalInSeconds'):
+            calibration.intervalInSeconds = 300
+        if not hasattr(calibration, 'logFile'):
+            calibration.logFile = f'act_calibration_{self.config.job.id}.jsonl'
+        if not hasattr(self.config.tasks, 'speculation'):
+            self.config.tasks.speculation = SimpleNamespace(include=False)
+        speculation = self.config.tasks.speculation
+        if not hasattr(speculation, 'factor'):
+            speculation.factor = 3
+        if not hasattr(speculation, 'minPeers'):
+            speculation.minPeers = 10
+        if not hasattr(speculation, 'maxPeers'):
+            speculation.maxPeers = 1000
+        if not hasattr(speculation, 'minElapsedInMinutes'):
+            speculation.minElapsedInMinutes = 5
+        if not hasattr(speculation, 'maxSpeculativeTasks'):
+            speculation.maxSpeculativeTasks = 10
+        if not hasattr(speculation, 'intervalInSeconds'):
+            speculation.intervalInSeconds = 60
+        if not hasattr(self.config.pool, 'preemption'):
+            self.config.pool.preemption = SimpleNamespace(include=False)
+        preemption = self.config.pool.preemption
+        if preemption.include and self.config.batch.accounts:
+            raise ValueError("Preemption is not supported with multiple "\
+                             "batch accounts!")
+        if not hasattr(preemption, 'dedicatedNodeCount'):
+            preemption.dedicatedNodeCount = 1
+        if not hasattr(preemption, 'longInputMinSize'):
+            preemption.longInputMinSize = float('inf')
+        if not hasattr(preemption, 'coresPerNode'):
+            preemption.coresPerNode = self.config.pool.taskSlotsPerNode
+        if not hasattr(preemption, 'intervalInSeconds'):
+            preemption.intervalInSeconds = 60
+        if not hasattr(preemption, 'historyFile'):
+            preemption.historyFile = f'act_preemption_{self.config.job.id}.json'
+        if not hasattr(self.config, 'advisor'):
+            self.config.advisor = SimpleNamespace(candidates=[])
+        advisor = self.config.advisor
+        if not hasattr(advisor, 'strata'):
+            advisor.strata = 4
+        if not hasattr(advisor, 'samplesPerStratum'):
+            advisor.samplesPerStratum = 2
+        if not hasattr(advisor, 'nodeCount'):
+            advisor.nodeCount = 1
+        if not hasattr(advisor, 'traceFile'):
+            advisor.traceFile = f'act_advisor_{self.config.job.id}.jsonl'
+        if not hasattr(advisor, 'trialTimeoutInMinutes'):
+            advisor.trialTimeoutInMinutes = 120
+        if not hasattr(self.config.pool, 'monitor'):
+            self.config.pool.monitor = SimpleNamespace(include=False)
+        monitor = self.config.pool.monitor
+        if not hasattr(monitor, 'timeoutInMinutes'):
+            monitor.timeoutInMinutes = 30
+        if not hasattr(monitor, 'pollIntervalInSeconds'):
+            monitor.pollIntervalInSeconds = 10
+        if not hasattr(monitor, 'failedNodePolicy'):
+            monitor.failedNodePolicy = 'report'
+        if monitor.failedNodePolicy not in ('reboot', 'remove', 'report'):
+            raise ValueError("failedNodePolicy must be 'reboot', 'remove' "\
+                             "or 'report'!")
+        if not hasattr(monitor, 'maxRebootAttempts'):
+            monitor.maxRebootAttempts = 1
+        if not hasattr(self.config.tasks.outputs, 'packing'):
+            self.config.tasks.outputs.packing = SimpleNamespace(include=False)
+        packing = self.config.tasks.outputs.packing
+        if not hasattr(packing, 'compression'):
+            packing.compression = 'gzip'
+        if packing.compression not in PACKING_SUFFIX:
+            raise ValueError("packing compression must be 'gzip' or 'zstd'!")
+        if not hasattr(packing, 'bundle'):
+            packing.bundle = False
+        nodeStorage = self.config.pool.nodeStorageContainers
+        if not hasattr(nodeStorage, 'containers'):
+            nodeStorage.containers = []
+        for node_container in nodeStorage.containers:
+            profile = getattr(node_container, 'profile', None)
+            if profile and profile not in BLOBFUSE_PROFILES:
+                raise ValueError(f"Mount profile must be one of "\
+                                 f"{', '.join(BLOBFUSE_PROFILES)}!")
+        if not hasattr(nodeStorage, 'benchmark'):
+            nodeStorage.benchmark = SimpleNamespace(include=False)
+        if not hasattr(nodeStorage.benchmark, 'sizeInMB'):
+            nodeStorage.benchmark.sizeInMB = 64
+        if not hasattr(nodeStorage.benchmark, 'randomReads'):
+            nodeStorage.benchmark.randomReads = 256
+        if not hasattr(nodeStorage.benchmark, 'blobPath'):
+            nodeStorage.benchmark.blobPath = 'act/benchmark/'
+        if not hasattr(nodeStorage.benchmark, 'scratchPath'):
+            nodeStorage.benchmark.scratchPath = '.act_benchmark/'
+        if not hasattr(nodeStorage.benchmark, 'samplePath'):
+            nodeStorage.benchmark.samplePath = ''
+        if not hasattr(nodeStorage.benchmark, 'maxSampleFiles'):
+            nodeStorage.benchmark.maxSampleFiles = 16
+        storage = self.config.storage
+        if not hasattr(storage.scripts, 'localPath'):
+            storage.scripts.localPath = 'scripts/'
+        if not hasattr(storage.input, 'localPath'):
+            storage.input.localPath = storage.input.path
+        inputs = self.config.tasks.inputs
+        if not hasattr(inputs, 'incremental'):
+            inputs.incremental = SimpleNamespace(include=False)
+        if inputs.incremental.include and not inputs.areBlobsInInputStorage:
+            raise ValueError("Incremental recomputation requires "\
+                             "areBlobsInInputStorage!")
+        if not hasattr(inputs.incremental, 'stampPath'):
+            inputs.incremental.stampPath = \
+                f'{self.config.storage.output.path}act_stamps/'
+        # stamp of each input to be processed, set with the input list
+        self.config.input_stamps = {}
+        if not hasattr(inputs, 'watch'):
+            inputs.watch = SimpleNamespace()
+        if not hasattr(inputs.watch, 'intervalInSeconds'):
+            inputs.watch.intervalInSeconds = 5
+        if not hasattr(inputs.watch, 'batchSize'):
+            inputs.watch.batchSize = 100
+        if not hasattr(inputs.watch, 'settleInSeconds'):
+            inputs.watch.settleInSeconds = 10
+        if not hasattr(inputs.watch, 'statePath'):
+            inputs.watch.statePath = f'act_watch_{self.config.job.id}.json'
+        if not hasattr(inputs.watch, 'eventsPath'):
+            inputs.watch.eventsPath = None
+        if not hasattr(self.config.tasks.inputs, 'locality'):
+            self.config.tasks.inputs.locality = SimpleNamespace(include=False)
+        if not hasattr(self.config.tasks.inputs.locality, 'keyPattern'):
+            # the file name prefix before the first '_' or '.' (the sample id)
+            self.config.tasks.inputs.locality.keyPattern = r'([^/_.]+)[^/]*$'
+        if not hasattr(self.config.tasks.inputs.locality, 'nodeWaitInSeconds'):
+            self.config.tasks.inputs.locality.nodeWaitInSeconds = 600
+        if not hasattr(self.config.tasks.inputs, 'prefetch'):
+            self.config.tasks.inputs.prefetch = SimpleNamespace(include=False)
+        prefetch = self.config.tasks.inputs.prefetch
+        if not hasattr(prefetch, 'cachePath'):
+            prefetch.cachePath = '$AZ_BATCH_NODE_SHARED_DIR/act_prefetch'
+        if not hasattr(prefetch, 'cacheSizeInGB'):
+            prefetch.cacheSizeInGB = 20
+        if not hasattr(prefetch, 'lookahead'):
+            prefetch.lookahead = 8
+        if not hasattr(prefetch, 'blobPath'):
+            prefetch.blobPath = 'act/prefetch/'
+        # the agents prefetch the inputs assigned to their nodes
+        if prefetch.include and not self.config.tasks.inputs.locality.include:
+            raise ValueError("The input prefetch requires the locality "\
+                             "(tasks.inputs.locality)!")
+        logs = self.config.tasks.logs
+        if not hasattr(logs, 'destinationPath'):
+            logs.destinationPath = ''
+        if not hasattr(logs, 'harvest'):
+            logs.harvest = SimpleNamespace()
+        if not hasattr(logs.harvest, 'phasePattern'):
+            logs.harvest.phasePattern = r'Executing (?P<phase>\S+) routine'
+        if not hasattr(logs.harvest, 'extractors'):
+            # the timings and sizes printed by the example scripts
+            number = r'(?P<value>[\d.]+) ?'
+            logs.harvest.extractors = SimpleNamespace(
+                runtime=rf'Routine execution time: {number}(?P<unit>min|s)\b',
+                total=rf'Total elapsed time: {number}(?P<unit>min|s)\b',
+                inputSize=rf'Input size: {number}(?P<unit>[KMG]B)\b',
+                outputSize=rf'Output size: {number}(?P<unit>[KMG]B)\b')
+        if not hasattr(logs.harvest, 'totalMetric'):
+            logs.harvest.totalMetric = 'total'
+        if not hasattr(self.config.tasks, 'mirror'):
+            self.config.tasks.mirror = SimpleNamespace(include=False)
+        if not hasattr(self.config.tasks.mirror, 'path'):
+            self.config.tasks.mirror.path = 'act_tasks.db'
+        if not hasattr(self.config.tasks.mirror, 'reconcileIntervalInSeconds'):
+            self.config.tasks.mirror.reconcileIntervalInSeconds = 600
+        if not hasattr(self.config.tasks, 'deterministicTaskIds'):
+            self.config.tasks.deterministicTaskIds = False
+        if not hasattr(self.config.tasks, 'journal'):
+            self.config.tasks.journal = SimpleNamespace(include=False)
+        if self.config.tasks.journal.include:
+            if not self.config.tasks.deterministicTaskIds:
+                raise ValueError("The tasks journal requires "\
+                                 "deterministicTaskIds!")
+            if not hasattr(self.config.tasks.journal, 'path'):
+                self.config.tasks.journal.path = \
+                    f'act_journal_{self.config.job.id}.jsonl'
+
+        # update the configuration with new attributes for storage sas url
+        i = self.config.storage.input
+        o = self.config.storage.output
+        s = self.config.storage.scripts
+        self.config.input_container_url = self.get_sas_url(i.container)
+        self.config.output_container_url = self.get_sas_url(o.container)
+        self.config.scripts_container_url = self.get_sas_url(s.container)
+        # set the url of the mount I/O benchmark script
+        if nodeStorage.benchmark.include:
+            self.config.io_benchmark_url = self.get_sas_url(
+                f'{s.container}/{nodeStorage.benchmark.blobPath}'\
+                f'{IO_BENCHMARK_SCRIPT}')
+        # set the urls of the prefetch agent and its inputs manifest
+        if self.config.tasks.inputs.prefetch.include:
+            blob_path = f'{s.container}/{prefetch.blobPath}'
+            self.config.prefetch_agent_url = self.get_sas_url(
+                f'{blob_path}{PREFETCH_AGENT_SCRIPT}')
+            self.config.prefetch_manifest_name = \
+                f'{prefetch.blobPath}{self.config.job.id}.tsv'
+            self.config.prefetch_manifest_url = self.get_sas_url(
+                f'{s.container}/{self.config.prefetch_manifest_name}')
+
+        # creates calculteTaskSlots function
+        self.calculateTaskSlots = self.create_function_calculate_task_slots()
+
+        return self.config
+
+
+    def set_show_arguments(self, show, show_inputs, show_outputs,
+                           show_scripts, show_tasks):
+        """
+        Load the show attributes from the arguments and set these attributes
+        in the configuration object.
+
+        :params bool show: parameter specifying to show all elements.
+        :params bool show_inputs: parameter specifying to show inputs.
+        :params bool show_outputs: parameter specifying to show outputs.
+        :params bool show_scripts: parameter specifying to show scripts.
+        :params bool show_tasks: parameter specifying to show tasks.
+        """
+        self.config.argument = SimpleNamespace()
+        self.config.argument.showInputs = show or show_inputs
+        self.config.argument.showOutputs = show or show_outputs
+        self.config.argument.showScripts = show or show_scripts
+        self.config.argument.showTasks = show or show_tasks
+
+
+    def get_sas_url(self, fullpath):
+        """
+        Create a shared access signature URL granting access for the container
+        path with the given string.
+
+        :params str fullpath: full container path name to map.
+        :rtype: str
+        :return: URL with permission to access the container path files.
+        """
+        return 'https://{}.{}/{}{}'.format(
+            self.config.storage.accountName,
+            self.config.storage.accountDomain,
+            f'{fullpath}',
+            self.config.storage.accountSASToken
+            )
+
+
+    def create_function_calculate_task_slots(self):
+        """
+        Create the user defined function, from the taskSlotFormula in the
+        configuration file, to calculate the required slot count for
+        each task, according to the input name and input size.
+        The default value is 1.
+
+        The statements must be in Python code, but the user can use only a
+        limited set of built in functions.
+
+        :rtype: <function>
+        :return: the user defined function to calculate task required slot
+        """
+        # get the statements from the configured taskSlotFormula
+        statements = '\n'.join([ '    ' + line for line in
+                                self.config.tasks.inputs.taskSlotFormula])
+
+        # if statements contain the string 'self' or 'config' raise an exception
+        if('self' in statements or 'config' in statements):
+            raise ValueError("Can't use 'self' or 'config' in taskSlotFormula!")
+
+        # replaces the symbol '$' with a call to a configured attribute
+        statements = statements.replace('$','config.')
+
+        # the template that will be compiled with the configured formulas
+        template = ["def calculateTaskRequiredSlots(input_name, input_size):",
+                    "    requiredSlots = 1",
+                    "{}",
+                    "    return requiredSlots"]
+        code = '\n'.join(template).format(statements)
+
+        # allowed builtin functions that can be used in the formulas
+        safe_list = {'abs':abs, 'all':all, 'any':any, 'bin':bin, 'bool':bool,
+                     'chr':chr, 'filter':filter, 'format':format, 'float':float,
+                     'hash':hash, 'int':int, 'len':len, 'max':max, 'min':min,
+                     'ord':ord, 'range':range, 'reversed':reversed, 'str':str,
+                     'round':round, 'sorted':sorted, 'sum':sum}
+
+        my_global_scope = {}
+        my_global_scope['__builtins__'] = safe_list
+        # include a copy of the configured attributes in the used scope
+        my_global_scope['config'] = copy.deepcopy(self.config)
+
+        local_scope = {}
+        # compile the code with the specified scope
+        exec(code, my_global_scope, local_scope)
+
+        # returns the created function
+        return local_scope['calculateTaskRequiredSlots']
+
+
+    def order_input_list(self, input_list):
+        """
+        Order the input list with the configured specifications.
+
+        :param input_files: A collection of input files. Each input is a tuple
+        with a string representing the input item, the input size and the input
+        required slots.
+        :type input_list: list<tuple(str, int, int)>
+        """
+        sort_attr = {"name":0, "size":1, "slots":2}
+        sort_rev = {"asc":False, "desc":True}
+        config_order = None
+        config_reverse = False
+        try:
+            # try to get the order configured attributes, if they don't exist
+            # use the default values, defined previously
+            config_order = self.config.tasks.inputs.order.by
+            config_reverse = sort_rev[self.config.tasks.inputs.order.type]
+        except:
+            pass
+
+        self.config.output.print(
+            f'order:{config_order}, reverse:{config_reverse}')
+        if config_order == "random":
+            # Shuffle the input list to randomize the execution of input files
+            random.shuffle(input_list)
+            self.config.output.print("shuffled!")
+
+        if config_order in sort_attr:
+            config_attr = sort_attr[config_order]
+            # sorts the input list with the configured attributes
+            input_list.sort(key=lambda x:x[config_attr], reverse=config_reverse)
+            self.config.output.print("sorted!")
+
+        if self.config.tasks.inputs.locality.include:
+            # keeps the inputs sharing the locality key together
+            input_list[:] = LocalityPlanner(self.config).group_inputs(
+                input_list)
+            self.config.output.print("grouped!")
+
+
+    def load_inputs(self, input_manifest=None):
+        """
+        Load the list of inputs accordingly with the current configuration
+        and set the config.inputs attribute.
+
+        :params input_manifest: Input items to be added.
+        :type input_manifest: `InputManifest`
+        :rtype: list<tuple(str, int, int)>
+        :return: list of input items.
+        """
+        # show scripts
+        if self.config.argument.showScripts:
+            self.config.output.print('Script files:')
+            scr_container = ContainerClients.get(
+                container_url=self.config.scripts_container_url)
+            scr_prefix = f'{self.config.storage.scripts.blobPrefix}'
+            for blob in scr_container.list_blobs(name_starts_with=scr_prefix):
+                self.config.output.print(f'{blob.name},{blob.size}')
+            self.config.output.print()
+
+        # get inputs
+        if input_manifest is None:
+            input_manifest = InputManifest()
+        input_list = []
+        if self.config.tasks.inputs.areBlobsInInputStorage:
+            input_list = self.get_input_list_from_storage(input_manifest)
+        else:
+            input_list = self.get_input_list_locally(input_manifest)
+
+        self.config.output.print('Inputs:')
+        # order input list
+        self.order_input_list(input_list)
+
+        # show inputs
+        if self.config.argument.showInputs:
+            for input in input_list:
+                self.config.reporter.item(
+                    'input', f'{input[0]},{input[1]},{input[2]}')
+        self.config.output.print(f'Input list ({len(input_list)})')
+        self.config.output.print()
+
+        self.config.inputs = input_list
+        return self.config.inputs
+
+
+    def get_input_list_locally(self, input_manifest):
+        """
+        Get the list of input items from the given manifest.
+
+        :params input_manifest: Input items to be added.
+        :type input_manifest: `InputManifest`
+        :rtype: list<tuple(str, int, int)>
+        :return: list of input items.
+        """
+        input_list = []
+        for (item_name, item_size, item_slot) in input_manifest.records():
+            if item_slot is None:
+                # calculate task slots required for this input blob size
+                item_slot = self.calculateTaskSlots(item_name, item_size)
+                if (item_slot > self.config.pool.taskSlotsPerNode):
+                    self.config.reporter.item(
+                        'too big input', f'File "{item_name}" is too big '\
+                        f'(requires {item_slot} slots)! Cannot be executed '\
+                        f'with current configuration.', 'warning')
+                    continue
+
+            input_list.append((item_name, item_size, item_slot))
+        return input_list
+
+
+    def get_output_extensions(self):
+        """
+        Get the extensions of the output blobs, the configured
+        outputFileExtension and, if the outputs are packed, the extension
+        followed by the packing suffix (longest extensions first).
+
+        :rtype: list<str>
+        :return: the output blob extensions.
+        """
+        out_extension = self.config.tasks.inputs.outputFileExtension
+        out_extensions = [out_extension]
+        packing = self.config.tasks.outputs.packing
+        if packing.include:
+            suffix = PACKING_SUFFIX[packing.compression]
+            out_extensions.insert(0, f'{out_extension}{suffix}')
+            out_extensions.insert(0, f'{out_extension}.tar{suffix}')
+        return out_extensions
+
+
+    def get_input_list_from_storage(self, input_manifest):
+        """
+        Get the list of input files for the tasks from the storage.
+        If input_manifest is not empty, blobs are added only if they are in
+        the manifest and exist in the Input Storage.
+        If the flag filterOutExistingBlobInOutputStorage is True, only add
+        blobs that don't exist in the Output Storage Container.
+
+        :params input_manifest: Blobs to be added. If empty, all blobs from the
+        configured Input Storage Container are added.
+        :type input_manifest: `InputManifest`
+        :rtype input_list: list<tuple(str, int, int)>
+        :return: list of input items.
+        """
+        # stamps of the inputs up to date (incremental recomputation)
+        incremental = self.config.tasks.inputs.incremental.include
+        if incremental:
+            scripts_hash = self.get_scripts_hash()
+            output_stamps = self.get_output_stamps()
+        output_dict = {}
+        if (self.config.tasks.inputs.filterOutExistingBlobInOutputStorage or
+            self.config.argument.showOutputs):
+            if self.config.argument.showOutputs:
+                self.config.output.print('Output files:')
+            # Create the output Blob Container Client to see if the output blobs
+            # already exists on our output container.
+            out_container = ContainerClients.get(
+                container_url=self.config.output_container_url)
+            out_prefix = f'{self.config.storage.output.path}'\
+                         f'{self.config.storage.output.blobPrefix}'
+            out_path_len = len(self.config.storage.output.path)
+            out_extensions = self.get_output_extensions()
+            for blob in out_container.list_blobs(name_starts_with=out_prefix):
+                for out_extension in out_extensions:
+                    if blob.name.endswith(out_extension):
+                        # removes prefix and extension
+                        name = blob.name[out_path_len:-len(out_extension)]
+                        output_dict[name] = blob
+                        #print outputs
+                        if self.config.argument.showOutputs:
+                            self.config.reporter.item(
+                                'output', f'{blob.name[out_path_len:]},'\
+                                f'{blob.size}')
+                        break
+            self.config.output.print(f'Output list ({len(output_dict)})')
+            self.config.output.print()
+
+        # create the input Blob Container Client to get blobs from our container
+        input_container = ContainerClients.get(
+            container_url=self.config.input_container_url)
+
+        # Define prefix to get blobs
+        input_prefix = f'{self.config.storage.input.path}'\
+                       f'{self.config.storage.input.blobPrefix}'
+        input_path_len = len(self.config.storage.input.path)
+        input_extension = self.config.tasks.inputs.inputFileExtension
+        input_extension_len = len(input_extension)
+
+        # get all blobs in the input container whose name starts with prefix
+        input_list = []
+        for blob in input_container.list_blobs(name_starts_with=input_prefix):
+            # if blobs doesn't ends with the expected extension don't add it
+            if not blob.name.endswith(input_extension):
+                continue
+            # add all listed input blobs if input_manifest is empty otherwise
+            # only add if the blob is in the input_manifest
+            if (len(input_manifest) > 0 and blob.name not in input_manifest):
+                continue
+            # if incremental, only add the inputs without a matching stamp
+            if incremental:
+                output_name = blob.name[input_path_len:-input_extension_len]
+                stamp = self.get_input_stamp(blob, scripts_hash)
+                if stamp in output_stamps.get(output_name, ()):
+                    self.config.reporter.item(
+                        'up to date output', f'Output is up to date: '\
+                        f'{blob.name}')
+                    continue
+                self.config.input_stamps[blob.name] = stamp
+            # if True checks blob's existence in output container
+            elif self.config.tasks.inputs.filterOutExistingBlobInOutputStorage:
+                output_name = blob.name[input_path_len:-input_extension_len]
+                # if blob exists in output container don't add to input list
+                if output_name in output_dict:
+                    self.config.reporter.item(
+                        'existing output', f'File already exists in output '\
+                        f'container: {blob.name}')
+                    continue
+
+            # calculate task slots required for this input blob size
+            required_slots = self.calculateTaskSlots(blob.name, blob.size)
+            if (required_slots > self.config.pool.taskSlotsPerNode):
+                self.config.reporter.item(
+                    'too big input', f'File "{blob.name}" is too big '\
+                    f'(requires {required_slots} slots)! Cannot be executed '\
+                    f'with current configuration.', 'warning')
+                continue
+            input_list.append((blob.name, blob.size, required_slots))
+        self.config.output.print()
+
+        return input_list
+
+
+    def get_scripts_hash(self):
+        """
+        Get the hash of the scripts under the configured scripts prefix,
+        from their names and contents (MD5, or etag if not available).
+
+        :rtype: str
+        """
+        scr_container = ContainerClients.get(
+            container_url=self.config.scripts_container_url)
+        scr_prefix = f'{self.config.storage.scripts.blobPrefix}'
+        digest = hashlib.sha256()
+        for blob in sorted(scr_container.list_blobs(
+                name_starts_with=scr_prefix), key=lambda blob:blob.name):
+            digest.update(f'{blob.name}\0{self.get_blob_version(blob)}\0'
+                          .encode('utf-8'))
+        return digest.hexdigest()
+
+
+    @staticmethod
+    def get_blob_version(blob):
+        """
+        Get the content MD5 of the blob, or its etag if not available.
+        """
+        content_settings = getattr(blob, 'content_settings', None)
+        md5 = getattr(content_settings, 'content_md5', None)
+        if md5:
+            return bytes(md5).hex()
+        return blob.etag.strip('"')
+
+
+    def get_input_stamp(self, blob, scripts_hash):
+        """
+        Get the stamp of the input blob processing: a hash of the input name
+        and content, the scripts and the configured command.
+
+        :params blob: the input blob.
+        :type blob: `azure.storage.blob.BlobProperties`
+        :params str scripts_hash: the hash of the scripts.
+        :rtype: str
+        """
+        tasks = self.config.tasks
+        key = '\0'.join([blob.name, self.get_blob_version(blob), scripts_hash,
+                         tasks.command, tasks.commandSuffix])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+    def get_output_stamps(self):
+        """
+        Get the stamps of the outputs, from the names of the stamp blobs
+        uploaded by the successful Tasks (<output name>.<stamp>.json).
+
+        :rtype: dict<str:set<str>>
+        :return: the stamps of each output name.
+        """
+        out_container = ContainerClients.get(
+            container_url=self.config.output_container_url)
+        stamp_path = self.config.tasks.inputs.incremental.stampPath
+        stamps = {}
+        for blob in out_container.list_blobs(name_starts_with=stamp_path):
+            (name, _, stamp) = blob.name[len(stamp_path):-len('.json')]\
+                .rpartition('.')
+            stamps.setdefault(name, set()).add(stamp)
+        self.config.output.print(
+            f'Output stamps ({sum([len(s) for s in stamps.values()])})')
+        return stamps
+
+
+    def delete_config_input_blobs(self):
+        """
+        Delete all blobs with the configured input specifications.
+        """
+        # create the input Blob Container Client to get blobs from our container
+        input_container = ContainerClients.get(
+            container_url=self.config.input_container_url)
+
+        # Define prefix to get blobs
+        input_prefix = f'{self.config.storage.input.path}'\
+                       f'{self.config.storage.input.blobPrefix}'
+
+        # get all blobs in the input container whose name starts with prefix
+        for blob in input_container.list_blobs(name_starts_with=input_prefix):
+            # delete all specified blobs
+            input_container.delete_blob(blob, delete_snapshots='include')
+
+
+class SizingAdvisor:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Advisor to choose the pool vmSize and taskSlotsPerNode. A stratified
+    sample of the inputs (by size quantile) is executed on short-lived trial
+    pools of each candidate configuration, recording the Tasks runtime and
+    peak memory in a trace file. The configurations are ranked from the
+    trace by throughput per core-hour and projected full job cost, so the
+    ranking can be recomputed offline from recorded traces.
+    """
+    def __init__(self, config):
+        """
+        Sizing advisor constructor.
+
+        :params config: the configuration object.
+        """
+        self.config = config
+        self.advisor = config.advisor
+
+
+    @staticmethod
+    def stratified_sample(input_list, strata, per_stratum):
+        """
+        Get a sample of the inputs stratified by size quantile. Each sampled
+        input has the weight of the inputs it represents in its stratum.
+
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :params int strata: number of size quantiles.
+        :params int per_stratum: number of inputs sampled in each quantile.
+        :rtype: list<tuple(tuple(str, int, int), int, float)>
+        :return: the sampled inputs with their stratum and weight.
+        """
+        ordered = sorted(input_list, key=lambda x:x[1])
+        sample = []
+        for stratum in range(strata):
+            ini = len(ordered) * stratum // strata
+            end = len(ordered) * (stratum + 1) // strata
+            population = ordered[ini:end]
+            count = min(per_stratum, len(population))
+            for idx in range(count):
+                # evenly spaced inputs within the quantile
+                item = population[(2*idx + 1) * len(population) // (2*count)]
+                sample.append((item, stratum, len(population) / count))
+        return sample
+
+
+    @staticmethod
+    def rank(traces, node_count=1):
+        """
+        Rank the configurations recorded in the traces by throughput per
+        core-hour. The full job node-hours are projected from the sampled
+        runtimes weighted by the inputs they represent, considering
+        taskSlotsPerNode Tasks running concurrently on each node.
+
+        :params traces: the trace records of the trial Tasks.
+        :type traces: list<dict>
+        :params int node_count: number of nodes to project the job duration.
+        :rtype: list<`types.SimpleNamespace`>
+        :return: the configurations, best first.
+        """
+        configurations = {}
+        for trace in traces:
+            key = (trace['vmSize'], trace['taskSlotsPerNode'])
+            configurations.setdefault(key, []).append(trace)
+
+        ranking = []
+        for ((vm_size, slots), records) in configurations.items():
+            first = records[0]
+            failed = len([r for r in records if r['exitCode'] != 0])
+            inputs = sum([r['weight'] for r in records])
+            task_seconds = sum([r['runtime'] * r['weight'] for r in records])
+            node_hours = task_seconds / slots / 3600
+            core_hours = node_hours * first['cores']
+            peaks = [r['peakMemoryKB'] for r in records if r['peakMemoryKB']]
+            peak_memory = max(peaks) / 1024**2 if peaks else None
+            fits_memory = (peak_memory is None or
+                           peak_memory * slots <= first['memoryInGB'])
+            ranking.append(SimpleNamespace(
+                vmSize=vm_size, taskSlotsPerNode=slots, samples=len(records),
+                failed=failed, peakMemoryInGB=peak_memory,
+                fitsMemory=fits_memory, nodeHours=node_hours,
+                coreHours=core_hours,
+                throughputPerCoreHour=inputs / core_hours if core_hours else 0,
+                projectedCost=node_hours * first['pricePerHour'],
+                projectedHours=node_hours / node_count
+                )
+            )
+        # failed or memory oversubscribed configurations go to the end
+        ranking.sort(key=lambda x:(x.failed > 0 or not x.fitsMemory,
+                                   -x.throughputPerCoreHour, x.projectedCost))
+        return ranking
+
+
+    def read_traces(self):
+        """
+        Read the recorded trace file.
+
+        :rtype: list<dict>
+        :return: the trace records.
+        """
+        with open(self.advisor.traceFile, 'r') as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+
+    def run_trials(self, input_list):
+        """
+        Execute the stratified sample on a trial pool for each candidate
+        vmSize and taskSlotsPerNode, appending the Tasks runtime and peak
+        memory to the trace file. Each trial pool and job is deleted after
+        its execution, even when it fails or exceeds the trial timeout.
+
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        """
+        sample = self.stratified_sample(input_list, self.advisor.strata,
+                                        self.advisor.samplesPerStratum)
+        self.config.output.print(
+            f'Advisor sample: {len(sample)} of {len(input_list)} inputs')
+        trial = 0
+        for candidate in self.advisor.candidates:
+            for slots in candidate.taskSlotsPerNode:
+                trial += 1
+                trial_config = copy.deepcopy(self.config)
+                trial_config.pool.id = f'{self.config.pool.id}-trial{trial}'
+                trial_config.pool.vmSize = candidate.vmSize
+                trial_config.pool.taskSlotsPerNode = slots
+                trial_config.pool.dedicatedNodeCount = self.advisor.nodeCount
+                trial_config.pool.lowPriorityNodeCount = 0
+                trial_config.pool.nodeAutoScale.include = False
+                trial_config.job.id = f'{self.config.job.id}-trial{trial}'
+                trial_config.tasks.inputs.filterOutExistingTaskInCurrentJob = False
+                trial_config.tasks.journal.include = False
+                trial_config.tasks.measurePeakMemory = True
+                self.config.output.print(
+                    f'Trial {trial}: {candidate.vmSize} with {slots} slots')
+
+                trial_batch = AzureBatchUtils(trial_config)
+                try:
+                    trial_batch.create_pool()
+                    trial_batch.create_job()
+                    # one slot per Task, the density is set by the trial pool
+                    trial_batch.create_tasks([(item[0], item[1], 1)
+                                              for (item, _, _) in sample],
+                                             True)
+                    trial_batch.wait_job_tasks_completion(
+                        self.advisor.trialTimeoutInMinutes * 60)
+                    self.record_trial(trial_batch, candidate, slots, sample)
+                finally:
+                    self.delete_trial(trial_batch)
+
+
+    @staticmethod
+    def delete_trial(trial_batch):
+        """
+        Delete the trial job and pool, reporting the ones that could not be
+        deleted (e.g. not created).
+        """
+        client = trial_batch.batch_service_client
+        for (operations, resource_id) in \
+            [(client.job, trial_batch.config.job.id),
+             (client.pool, trial_batch.config.pool.id)]:
+            try:
+                operations.delete(resource_id)
+            except batchmodels.BatchErrorException as err:
+                trial_batch.print_batch_exception(err)
+
+
+    def record_trial(self, trial_batch, candidate, slots, sample):
+        """
+        Append the trial Tasks runtime and peak memory to the trace file.
+        """
+        weights = {item[0]:(stratum, weight) for (item, stratum, weight)
+                   in sample}
+        client = trial_batch.batch_service_client
+        with open(self.advisor.traceFile, 'a') as file:
+            for task in client.task.list(job_id=trial_batch.config.job.id):
+                info = task.execution_info
+                if not (info and info.start_time and info.end_time):
+                    continue
+                input_name = task.command_line
+                for name in weights:
+                    if f"'{name}'" in task.command_line:
+                        input_name = name
+                (stratum, weight) = weights.get(input_name, (None, 1))
+                record = {
+                    'vmSize':candidate.vmSize, 'cores':candidate.cores,
+                    'memoryInGB':candidate.memoryInGB,
+                    'pricePerHour':candidate.pricePerHour,
+                    'taskSlotsPerNode':slots, 'input':input_name,
+                    'stratum':stratum, 'weight':weight,
+                    'runtime':(info.end_time - info.start_time).total_seconds(),
+                    'peakMemoryKB':trial_batch.get_task_peak_memory(task.id),
+                    'exitCode':info.exit_code
+                    }
+                file.write(json.dumps(record) + '\n')
+
+
+    def print_ranking(self, ranking):
+        """
+        Print the ranked configurations.
+        """
+        self.config.output.print(
+            'Rank  vmSize                slots  samples  failed  peakGB  '\
+            'tput/core-h  core-hours  cost      hours')
+        for (idx, item) in enumerate(ranking):
+            peak = f'{item.peakMemoryInGB:.2f}' if item.peakMemoryInGB else '-'
+            note = '' if item.fitsMemory else '  (memory oversubscribed)'
+            self.config.output.print(
+                f'{idx+1:<5} {item.vmSize:<21} {item.taskSlotsPerNode:<6} '\
+                f'{item.samples:<8} {item.failed:<7} {peak:<7} '\
+                f'{item.throughputPerCoreHour:<12.2f} '\
+                f'{item.coreHours:<11.2f} {item.projectedCost:<9.2f} '\
+                f'{item.projectedHours:.2f}{note}')
+        self.config.output.print()
+
+
+class SlotCalibrator:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Calibration loop of the Tasks required slots. Samples the resource usage
+    of the running and completed Tasks (CPU from the Batch Task statistics
+    and peak memory reported on the Tasks stderr when measurePeakMemory is
+    set), fits a slot model by input size and replaces the active Tasks whose
+    required slots differ from the model.
+    The replacement Task id is derived from the original id and the new slot
+    count, so an interrupted calibration can be repeated safely: the
+    replacement is added (TaskExists is accepted) before the original is
+    deleted, and if the original started running meanwhile the replacement
+    is deleted instead. Each adjustment is logged on the calibration log.
+    """
+    def __init__(self, azure_batch):
+        """
+        Slot calibrator constructor.
+
+        :params azure_batch: the Batch utility of the configured job.
+        :type azure_batch: `AzureBatchUtils`
+        """
+        self.azure_batch = azure_batch
+        self.config = azure_batch.config
+        self.calibration = self.config.tasks.calibration
+        self.client = azure_batch.batch_service_client
+
+
+    @staticmethod
+    def get_task_input(task):
+        """
+        Get the input name and size from the Task environment.
+
+        :rtype: tuple(str, int)
+        :return: the input name and size or (None, None) if not set.
+        """
+        environment = {setting.name:setting.value for setting
+                       in (task.environment_settings or [])}
+        if 'ACT_INPUT' not in environment:
+            return (None, None)
+        return (environment['ACT_INPUT'],
+                int(environment.get('ACT_INPUT_SIZE', 0)))
+
+
+    @staticmethod
+    def get_task_stamp(task):
+        """
+        Get the input stamp from the Task environment.
+
+        :rtype: str
+        :return: the input stamp or None if not set.
+        """
+        for setting in (task.environment_settings or []):
+            if setting.name == 'ACT_STAMP':
+                return setting.value
+        return None
+
+
+    def sample_tasks(self):
+        """
+        Sample the resource usage of the running and completed Tasks.
+
+        :rtype: list<tuple(int, float, int)>
+        :return: input size, CPU cores used and peak memory (KB or None).
+        """
+        samples = []
+        options = batchmodels.TaskListOptions(
+            filter="state eq 'completed' or state eq 'running'",
+            expand='stats')
+        for task in self.client.task.list(job_id=self.config.job.id,
+                                          task_list_options=options):
+            if len(samples) >= self.calibration.sampleSize:
+                break
+            (_, input_size) = self.get_task_input(task)
+            info = task.execution_info
+            if input_size is None or (info and info.exit_code):
+                continue
+            cores = None
+            if task.stats and task.stats.wall_clock_time.total_seconds() > 0:
+                cpu = task.stats.user_cpu_time + task.stats.kernel_cpu_time
+                cores = cpu.total_seconds() / \
+                        task.stats.wall_clock_time.total_seconds()
+            peak_memory = None
+            if task.state == batchmodels.TaskState.completed:
+                peak_memory = self.azure_batch.get_task_peak_memory(task.id)
+            if cores is not None or peak_memory is not None:
+                samples.append((input_size, cores, peak_memory))
+        return samples
+
+
+    @staticmethod
+    def fit(samples):
+        """
+        Fit the slot model from the samples: peak memory as a linear function
+        of the input size (least squares) and the maximum CPU cores used.
+
+        :params samples: input size, CPU cores used and peak memory (KB).
+        :type samples: list<tuple(int, float, int)>
+        :rtype: `types.SimpleNamespace`
+        :return: the model, memory intercept and slope (KB) and cores.
+        """
+        points = [(size, memory) for (size, _, memory) in samples
+                  if memory is not None]
+        intercept, slope = 0, 0
+        if points:
+            mean_size = sum([p[0] for p in points]) / len(points)
+            mean_memory = sum([p[1] for p in points]) / len(points)
+            variance = sum([(p[0] - mean_size)**2 for p in points])
+            if variance > 0:
+                slope = sum([(p[0] - mean_size) * (p[1] - mean_memory)
+                             for p in points]) / variance
+                intercept = mean_memory - slope * mean_size
+            else:
+                intercept = max([p[1] for p in points])
+        cores = [c for (_, c, _) in samples if c is not None]
+        return SimpleNamespace(memoryIntercept=intercept, memorySlope=slope,
+                               cores=max(cores) if cores else 0,
+                               samples=len(samples))
+
+
+    @staticmethod
+    def predict_slots(model, input_size, memory_per_slot, max_slots,
+                      safety_factor=1.2):
+        """
+        Predict the required slots of an input with the slot model.
+
+        :params model: the fitted slot model.
+        :params int input_size: the input size.
+        :params float memory_per_slot: node memory per slot in GB.
+        :params int max_slots: the pool taskSlotsPerNode.
+        :params float safety_factor: multiplier of the predicted usage.
+        :rtype: int
+        :return: the required slots, between 1 and max_slots.
+        """
+        memory = (model.memoryIntercept + model.memorySlope * input_size)
+        memory = memory * safety_factor / 1024**2
+        slots = max(math.ceil(memory / memory_per_slot),
+                    math.ceil(model.cores * safety_factor), 1)
+        return min(slots, max_slots)
+
+
+    def log(self, record):
+        """
+        Append a record to the calibration log and print it.
+        """
+        record['time'] = datetime.datetime.now().isoformat()
+        with open(self.calibration.logFile, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+        self.config.output.print(
+            ' '.join([f'{k}={v}' for (k, v) in record.items()]))
+
+
+    def adjust_active_tasks(self, model):
+        """
+        Replace the active Tasks whose required slots differ from the model.
+
+        :params model: the fitted slot model.
+        :rtype: int
+        :return: the number of replaced Tasks.
+        """
+        memory_per_slot = self.calibration.memoryPerNodeInGB / \
+                          self.config.pool.taskSlotsPerNode
+        replacements = []
+        options = batchmodels.TaskListOptions(
+            filter="state eq 'active'",
+            select='id,commandLine,requiredSlots,environmentSettings,'\
+                   'affinityInfo')
+        for task in self.client.task.list(job_id=self.config.job.id,
+                                          task_list_options=options):
+            (input_file, input_size) = self.get_task_input(task)
+            if input_file is None:
+                continue
+            slots = self.predict_slots(model, input_size, memory_per_slot,
+                                       self.config.pool.taskSlotsPerNode,
+                                       self.calibration.safetyFactor)
+            if slots == task.required_slots:
+                continue
+            new_id = f"{re.sub(r'-s[0-9]+$', '', task.id)}-s{slots}"
+            self.log({'event':'adjust', 'task':task.id, 'replacement':new_id,
+                      'input':input_file, 'size':input_size,
+                      'from':task.required_slots, 'to':slots})
+            # the copied command still writes the stamp of the original
+            new_task = self.azure_batch.create_task(
+                new_id, task.command_line, input_file, input_size, slots,
+                stamp=self.get_task_stamp(task))
+            # the replacement keeps the node affinity of the original
+            new_task.affinity_info = task.affinity_info
+            replacements.append((task.id, new_task))
+
+        replaced = 0
+        step = self.config.tasks.addCollectionStep
+        if step == 'auto':
+            step = MAX_TASKS_PER_COLLECTION
+        for ini in range(0, len(replacements), step):
+            chunk = replacements[ini:ini+step]
+            result = self.client.task.add_collection(
+                self.config.job.id, [new_task for (_, new_task) in chunk])
+            added = set([r.task_id for r in result.value if
+                         r.status == batchmodels.TaskAddStatus.success or
+                         (r.error and r.error.code == 'TaskExists')])
+            for (old_id, new_task) in chunk:
+                if new_task.id in added:
+                    replaced += self.cancel_original(old_id, new_task.id)
+        return replaced
+
+
+    def cancel_original(self, old_id, new_id):
+        """
+        Delete the original Task after its replacement was added. If the
+        original already left the active state, the replacement is deleted.
+
+        :rtype: int
+        :return: 1 if the original was replaced, 0 otherwise.
+        """
+        job_id = self.config.job.id
+        try:
+            task = self.client.task.get(job_id, old_id)
+        except batchmodels.BatchErrorException:
+            # the original was already deleted by a previous calibration
+            return 1
+        if task.state == batchmodels.TaskState.active:
+            self.client.task.delete(job_id, old_id)
+            self.log({'event':'replaced', 'task':old_id, 'replacement':new_id})
+            return 1
+        self.client.task.delete(job_id, new_id)
+        self.log({'event':'kept', 'task':old_id, 'replacement':new_id,
+                  'state':task.state})
+        return 0
+
+
+    def run(self):
+        """
+        Run the calibration rounds until there are no active Tasks or the
+        configured maxRounds is reached.
+        """
+        for idx in range(self.calibration.maxRounds):
+            samples = self.sample_tasks()
+            if len(samples) < self.calibration.minSamples:
+                self.config.output.print(
+                    f'Calibration round {idx+1}: {len(samples)} samples,'\
+                    f' waiting for {self.calibration.minSamples}...')
+            else:
+                model = self.fit(samples)
+                self.log({'event':'model', **vars(model)})
+                replaced = self.adjust_active_tasks(model)
+                self.config.output.print(
+                    f'Calibration round {idx+1}: replaced {replaced} '\
+                    f'tasks')
+            if self.azure_batch.get_job_task_counts().active == 0:
+                break
+            time.sleep(self.calibration.intervalInSeconds)
+        self.config.output.print()
+
+
+class StragglerDetector:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Detects the straggler Tasks of the configured job and re-executes them
+    speculatively. A running Task is a straggler when its elapsed time
+    exceeds the configured factor of the runtime expected for its input
+    size, estimated from the successful Tasks of the same job.
+    The speculative clone (id with the '-spec' suffix) prefers an idle node
+    through its affinity (Batch has no node exclusion) and exits with code
+    SPECULATIVE_SAME_NODE_EXIT, to be retried, if it is scheduled on the
+    straggler node; a clone that exhausts its retries on the straggler node
+    is deleted, so it isn't reactivated as a failed Task.
+    The clone keeps the input stamp of the original, uploaded on success.
+    When one of the copies succeeds the other is stopped, so only the
+    winner outputs are uploaded (outputs are uploaded on Task success):
+    a losing clone is deleted, while a losing original is
+    terminated, keeping its id and command on the job, so the dedup of a
+    resubmitted input (by command or deterministic Task id) still finds it.
+    The terminated original is counted as failed by the Batch Service, but
+    it is not reactivated. The pairs are identified by the Task ids, so the
+    detector keeps no state between checks.
+    """
+    SUFFIX = '-spec'
+    SPECULATIVE_SAME_NODE_EXIT = 75
+
+    def __init__(self, azure_batch):
+        """
+        Straggler detector constructor.
+
+        :params azure_batch: the Batch utility of the configured job.
+        :type azure_batch: `AzureBatchUtils`
+        """
+        self.azure_batch = azure_batch
+        self.config = azure_batch.config
+        self.speculation = self.config.tasks.speculation
+        self.client = azure_batch.batch_service_client
 
-            # Create the Task with specified id, command,
-            # resource files (inputs) and output files
-            task_list.append(batchmodels.TaskAddParameter(
-                id=taskId,
-                command_line=command,
-                required_slots=input_slots,
-                constraints=batchmodels.TaskConstraints(
-                    retention_time=datetime.timedelta(
-                        minutes=self.config.tasks.retentionTimeInMinutes
-                        ),
-                    max_task_retry_count=self.config.tasks.retryCount,
-                    ),
-                resource_files=resource_files,
-                output_files=output_files
-                )
-            )
-        # Add the Tasks to be executed on the Batch Account
-        if execute_tasks:
-            self.batch_service_client.task.add_collection(
-                self.config.job.id, task_list)
-            print(f'{len(task_list)} tasks included!')
-            time.sleep(5)
+
+    @staticmethod
+    def expected_runtime(peers, input_size):
+        """
+        Get the runtime expected for the input size from the peers: the
+        median runtime per input size unit or, if the sizes are unknown, the
+        median runtime.
+
+        :params peers: input size and runtime (seconds) of successful Tasks.
+        :type peers: list<tuple(int, float)>
+        :params int input_size: the input size.
+        :rtype: float
+        :return: the expected runtime in seconds.
+        """
+        rates = sorted([runtime / size for (size, runtime) in peers if size])
+        if rates and input_size:
+            return rates[len(rates) // 2] * input_size
+        runtimes = sorted([runtime for (_, runtime) in peers])
+        return runtimes[len(runtimes) // 2]
 
 
-    def create_tasks(self, input_list, execute_tasks):
+    def list_tasks(self, state, select):
         """
-        Add a task for each input file in the collection to the configured job.
-        If the flag filterOutExistingTaskInCurrentJob is True, only add
-        inputs that don't exist in the Tasks from the configured Job.
+        List the Tasks of the configured job on the given state.
+        """
+        options = batchmodels.TaskListOptions(filter=f"state eq '{state}'",
+                                              select=select)
+        return self.client.task.list(job_id=self.config.job.id,
+                                     task_list_options=options)
 
-        :param input_files: A collection of input files. One task
-        will be created for each input file. Each input is a tuple with a
-        string representing the input item, the input size and the input
-        required slots.
-        :type input_list: list<tuple(str, int, int)>
-        :param bool execute_tasks: if True include tasks to be executed,
-        otherwise just create the task list to be showed.
+
+    def check(self):
         """
-        if execute_tasks:
-            if not self.get_config_job():
-                print(f"Job [{self.config.job.id}] doesn't exists...")
-                print()
-                return
-            print(f'Adding tasks to job [{self.config.job.id}]...')
+        Resolve the finished speculative pairs and clone the new stragglers.
+        """
+        select = 'id,executionInfo,environmentSettings'
+        peers = []
+        completed = set()
+        succeeded = set()
+        guarded = set()
+        for task in self.list_tasks('completed', select):
+            completed.add(task.id)
+            info = task.execution_info
+            if self.is_guarded_clone(task):
+                guarded.add(task.id)
+            if info.exit_code != 0:
+                continue
+            succeeded.add(task.id)
+            if len(peers) < self.speculation.maxPeers:
+                (_, input_size) = SlotCalibrator.get_task_input(task)
+                runtime = (info.end_time - info.start_time).total_seconds()
+                peers.append((input_size or 0, runtime))
+        select = 'id,commandLine,requiredSlots,executionInfo,nodeInfo,'\
+                 'environmentSettings'
+        running = list(self.list_tasks('running', select))
+        running_ids = set([task.id for task in running])
+        active_ids = set([task.id for task in self.list_tasks('active', 'id')])
+        all_ids = completed | running_ids | active_ids
+
+        # Stop the losers of the pairs with a successful copy, terminating
+        # the originals (kept for the dedup) and deleting the clones
+        for clone_id in [t for t in all_ids if t.endswith(self.SUFFIX)]:
+            original_id = clone_id[:-len(self.SUFFIX)]
+            if (clone_id in succeeded and
+                original_id in running_ids | active_ids):
+                self.client.task.terminate(self.config.job.id, original_id)
+                self.config.output.print(
+                    f'* Speculation: {clone_id} won, terminated '\
+                    f'{original_id}')
+            elif original_id in succeeded and clone_id not in succeeded:
+                self.client.task.delete(self.config.job.id, clone_id)
+                all_ids.discard(clone_id)
+                self.config.output.print(
+                    f'* Speculation: {original_id} won, deleted {clone_id}')
+            elif clone_id in guarded:
+                # kept on the straggler node after all the retries, the clone
+                # is deleted (not cloned again on this check)
+                self.client.task.delete(self.config.job.id, clone_id)
+                self.config.output.print(
+                    f'* Speculation: {clone_id} only reached the straggler '\
+                    f'node, deleted')
+
+        if len(peers) < self.speculation.minPeers:
+            return
+        speculative = len([t for t in running_ids | active_ids
+                           if t.endswith(self.SUFFIX)])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for task in running:
+            if speculative >= self.speculation.maxSpeculativeTasks:
+                break
+            clone_id = f'{task.id}{self.SUFFIX}'
+            if task.id.endswith(self.SUFFIX) or clone_id in all_ids:
+                continue
+            (input_file, input_size) = SlotCalibrator.get_task_input(task)
+            if input_file is None:
+                continue
+            elapsed = (now - task.execution_info.start_time).total_seconds()
+            expected = self.expected_runtime(peers, input_size)
+            if (elapsed < self.speculation.minElapsedInMinutes * 60 or
+                elapsed < self.speculation.factor * expected):
+                continue
+            self.config.output.print(
+                f'* Straggler {task.id}: {elapsed:.0f} s elapsed, '\
+                f'{expected:.0f} s expected, cloning as {clone_id}')
+            self.add_clone(task, clone_id, input_file, input_size)
+            speculative += 1
 
-        if self.config.tasks.inputs.filterOutExistingTaskInCurrentJob:
-            # Filter input list removing existing inputs in current Tasks
-            input_list = self.filter_input_list_by_existing_tasks(input_list)
-        print(f'Adding {len(input_list)} tasks!')
 
-        # Set Task id length to include trailing zeros in TaskId
-        existing_tasks_in_job, _ = self.count_job_tasks()
-        total = len(input_list) + existing_tasks_in_job
-        self.start_id = existing_tasks_in_job + 1
-        self.tasks_id_len = f'{len(str(total))}'
+    def is_guarded_clone(self, task):
+        """
+        Check if the Task is a speculative clone that exhausted its retries
+        on the straggler node.
 
-        # Add all tasks to the batch, a few at a time.
-        # Each Task with a given input file.
-        # Cannot include too many Tasks at once because of resources limitation.
-        added_tasks = 0
-        total_tasks = len(input_list)
-        while (added_tasks < total_tasks):
-            ini = added_tasks
-            end = ini + self.config.tasks.addCollectionStep
-            if(end > total_tasks):
-                end = total_tasks
-            self.create_task_collection(input_list, ini, end, execute_tasks)
-            added_tasks += end-ini
+        :params task: the Task, with its executionInfo.
+        :type task: `azure.batch.models.CloudTask`
+        :rtype: bool
+        """
+        info = task.execution_info
+        return (task.id.endswith(self.SUFFIX) and info is not None and
+                info.exit_code == self.SPECULATIVE_SAME_NODE_EXIT)
 
-        if execute_tasks:
-            print()
-            print('All tasks created!!')
-            time.sleep(10)
-            print()
+
+    def is_won_by_clone(self, task_id):
+        """
+        Check if the Task was terminated because its speculative clone
+        succeeded.
+
+        :params str task_id: the id of the original Task.
+        :rtype: bool
+        """
+        options = batchmodels.TaskGetOptions(select='executionInfo')
+        try:
+            clone = self.client.task.get(self.config.job.id,
+                                         f'{task_id}{self.SUFFIX}',
+                                         task_get_options=options)
+        except batchmodels.BatchErrorException:
+            # the Task has no clone
+            return False
+        info = clone.execution_info
+        return info is not None and info.exit_code == 0
 
 
-    def wait_job_tasks_completion(self):
+    def add_clone(self, task, clone_id, input_file, input_size):
         """
-        Wait for all tasks in the configured job to reach the Completed state,
-        printing progress information.
+        Add the speculative clone of a straggler Task, preferring another
+        node of the pool and refusing to run on the straggler node.
         """
-        time.sleep(30)
-        total_tasks, completed_tasks = self.count_job_tasks()
-        progress = ''
+        node_id = task.node_info.node_id if task.node_info else ''
+        guard = f'if [ "$AZ_BATCH_NODE_ID" = {shlex.quote(node_id)} ]; then '\
+                f'exit {self.SPECULATIVE_SAME_NODE_EXIT}; fi; '
+        # the command of the original writes the stamp, uploaded by the clone
+        clone = self.azure_batch.create_task(
+            clone_id, f'/bin/bash -c {shlex.quote(guard + task.command_line)}',
+            input_file, input_size, task.required_slots,
+            stamp=SlotCalibrator.get_task_stamp(task))
+        # retried by the Batch Service if it exits on the straggler node
+        clone.constraints.max_task_retry_count = \
+            max(self.config.tasks.retryCount, 3)
+        for node in self.client.compute_node.list(self.config.pool.id):
+            if (node.id != node_id and
+                node.state == batchmodels.ComputeNodeState.idle):
+                clone.affinity_info = batchmodels.AffinityInformation(
+                    affinity_id=node.affinity_id)
+                break
+        try:
+            self.client.task.add(self.config.job.id, clone)
+        except batchmodels.BatchErrorException as err:
+            self.azure_batch.print_batch_exception(err)
 
-        while (completed_tasks < total_tasks):
-            time.sleep(2)
-            total_tasks, completed_tasks = self.count_job_tasks()
-            # Print progress
-            progress = '.' if (len(dot) > 4) else progress+'.'
-            print(f'Progress {completed_tasks:03d}/{total_tasks:03d} ' \
-                  f'{progress: <10}', end='\r')
-        print()
-        print()
-        print("All tasks reached the 'Completed' state")
-        print()
 
+class PreemptionTracker:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Tracks the Tasks of the configured job requeued by the preemption of
+    low-priority nodes. The running Tasks are observed periodically; when
+    the requeueCount of a Task increases, the time it ran before being
+    requeued is accounted as wasted core-hours. Completed Tasks requeued
+    between observations are estimated as half of their final runtime for
+    each requeue. The preempted inputs and the wasted time are kept in the
+    preemption history file, shared by the following executions.
+    """
+    def __init__(self, azure_batch):
+        """
+        Preemption tracker constructor.
 
-    def list_resources(self):
+        :params azure_batch: the Batch utility of the configured job.
+        :type azure_batch: `AzureBatchUtils`
         """
-        List Batch resources. Prints all Pools, Jobs and Tasks.
+        self.azure_batch = azure_batch
+        self.config = azure_batch.config
+        self.preemption = self.config.pool.preemption
+        self.client = azure_batch.batch_service_client
+        self.cores_per_slot = self.preemption.coresPerNode / \
+                              self.config.pool.taskSlotsPerNode
+        self.history = self.read_history(self.preemption.historyFile)
+
+
+    @staticmethod
+    def read_history(path):
         """
-        # Get all pools
-        for pool in self.batch_service_client.pool.list():
-            print(f'Pool: {pool.id}')
-        print()
-        # Get all jobs
-        for job in self.batch_service_client.job.list():
-            print(f'Job: {job.id}')
-            for task in self.batch_service_client.task.list(job_id=job.id):
-                print(f'   {task.id} command: {task.command_line}')
-            print()
-        print()
+        Read the preemption history file.
+
+        :rtype: dict
+        :return: the observed Tasks, preempted inputs and wasted core-hours.
+        """
+        history = {'tasks':{}, 'preemptedInputs':[], 'observedCoreHours':0,
+                   'estimatedCoreHours':0}
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                history.update(json.load(file))
+        return history
 
 
-    def delete_resources(self):
+    def write_history(self):
         """
-        Delete Batch resources. Terminate and delete Tasks, Jobs and Pools.
+        Write the preemption history file.
         """
-        # Set the expiration timeout with configured timeout
-        timeout_expiration = datetime.datetime.now() + datetime.timedelta(
-            minutes=self.config.cleanup.timeoutInMinutes)
+        with open(self.preemption.historyFile, 'w') as file:
+            json.dump(self.history, file)
 
-        # Get all jobs and mark for deletion
-        for job in self.batch_service_client.job.list():
-            self.batch_service_client.job.delete(job.id)
-            print(f'Deleting Job: {job.id}')
-        time.sleep(2)
-        print()
 
-        # Get all pools and mark for deletion
-        for pool in self.batch_service_client.pool.list():
-            self.batch_service_client.pool.delete(pool.id)
-            print(f'Deleting Pool: {pool.id}')
-        time.sleep(2)
-        print()
+    def add_preempted_input(self, task):
+        """
+        Add the Task input to the preempted inputs.
+        """
+        (input_file, _) = SlotCalibrator.get_task_input(task)
+        if input_file and input_file not in self.history['preemptedInputs']:
+            self.history['preemptedInputs'].append(input_file)
 
-        # While haven't finish, the cleanup process keeps printing
-        # progress information
-        dot = ''
-        timeout = self.config.cleanup.timeoutInMinutes
-        while(len(list(self.batch_service_client.job.list())) > 0 or
-              len(list(self.batch_service_client.pool.list())) > 0):
-            time.sleep(2)
-            dot = '.' if (len(dot) > 4) else dot+'.'
-            print(f'Cleaning up resources{dot: <10}', end='\r')
-            # if reach the timeout expiration time raise an exception
-            if(datetime.datetime.now() > timeout_expiration):
-                raise RuntimeError(f'ERROR: Cleanup did not finish within '\
-                                   f'timeout period of {timeout} min.')
-        print()
-        print('Cleanup completed!')
+
+    @staticmethod
+    def get_requeue_time(task, start):
+        """
+        Get the end of the attempt preempted before the Task was requeued:
+        the time the Task entered the active state (its current or previous
+        state), or else the start of its current attempt.
+
+        :params start: the start of the preempted attempt.
+        :type start: `datetime.datetime`
+        :rtype: `datetime.datetime`
+        :return: the end of the preempted attempt (None if unknown).
+        """
+        state = getattr(task.state, 'value', task.state)
+        previous = getattr(task.previous_state, 'value', task.previous_state)
+        if state == 'active' and task.state_transition_time:
+            return task.state_transition_time
+        if previous == 'active' and task.previous_state_transition_time:
+            return task.previous_state_transition_time
+        if task.execution_info.start_time and \
+           task.execution_info.start_time > start:
+            return task.execution_info.start_time
+        return None
 
 
-    def print_batch_exception(self, batch_exception):
+    def update(self):
         """
-        Print the contents of the specified Batch exception.
+        Observe the running and completed Tasks, accounting the wasted
+        core-hours of the Tasks requeued since the last observation.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        observed = self.history['tasks']
+        options = batchmodels.TaskListOptions(
+            filter="state eq 'running' or executionInfo/requeueCount gt 0",
+            select='id,state,requiredSlots,executionInfo,environmentSettings,'\
+                   'stateTransitionTime,previousState,'\
+                   'previousStateTransitionTime')
+        for task in self.client.task.list(job_id=self.config.job.id,
+                                          task_list_options=options):
+            info = task.execution_info
+            if not info:
+                continue
+            cores = (task.required_slots or 1) * self.cores_per_slot
+            previous = observed.get(task.id)
+            requeues = info.requeue_count or 0
+            if previous and requeues > previous['requeueCount']:
+                # it ran from the observed start until it was requeued
+                start = datetime.datetime.fromisoformat(previous['startTime'])
+                end = min(now, self.get_requeue_time(task, start) or now)
+                hours = max(0, (end - start).total_seconds()) / 3600
+                self.history['observedCoreHours'] += hours * cores
+                self.add_preempted_input(task)
+                self.config.output.print(
+                    f'* Preempted {task.id}: {hours:.2f} h wasted')
+            elif (not previous and requeues > 0 and
+                  task.state == batchmodels.TaskState.completed):
+                # requeued without being observed running
+                runtime = (info.end_time - info.start_time).total_seconds()
+                hours = requeues * runtime / 2 / 3600
+                self.history['estimatedCoreHours'] += hours * cores
+                self.add_preempted_input(task)
+            if task.state == batchmodels.TaskState.completed:
+                observed[task.id] = {'requeueCount':requeues,
+                                     'startTime':now.isoformat(),
+                                     'completed':True}
+            elif info.start_time:
+                observed[task.id] = {'requeueCount':requeues,
+                                     'startTime':info.start_time.isoformat()}
+        self.write_history()
+
+
+    def report(self):
+        """
+        Print the preemption report of the configured job.
+        """
+        observed = self.history['observedCoreHours']
+        estimated = self.history['estimatedCoreHours']
+        self.config.output.print(
+            f'Preemption report of job [{self.config.job.id}]:')
+        self.config.output.print(
+            f'  Preempted inputs: {len(self.history["preemptedInputs"])}')
+        self.config.output.print(
+            f'  Wasted core-hours: {observed+estimated:.2f} '\
+            f'(observed {observed:.2f}, estimated {estimated:.2f})')
+        self.config.output.print()
+
+
+class CompletionMonitor:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
 
-        :param batch_exception: the occurring exception.
-        :type batch_exception: `azure.batch.models.BatchErrorException`
+    Runs the hooks of the wait for the Tasks completion on a Batch account:
+    the straggler checks and the preemption tracking on their configured
+    intervals and, when the Tasks complete, a last straggler check and the
+    preemption and locality reports. The wait of the account fan-out runs a
+    monitor per account, so both waits run the same hooks.
+    """
+    def __init__(self, azure_batch):
         """
-        print('-------------------------------------------')
-        print('Exception encountered:')
-        if (batch_exception.error and
-            batch_exception.error.message and
-            batch_exception.error.message.value):
-            print(batch_exception.error.message.value)
-            if batch_exception.error.values:
-                print()
-                for mesg in batch_exception.error.values:
-                    print('{mesg.key}:\t{mesg.value}')
-        print('-------------------------------------------')
+        Completion monitor constructor.
+
+        :params azure_batch: the Batch utility of the configured job.
+        :type azure_batch: `AzureBatchUtils`
+        """
+        self.azure_batch = azure_batch
+        self.config = azure_batch.config
+        # Re-execute the straggler Tasks speculatively, if configured
+        self.detector = None
+        if self.config.tasks.speculation.include:
+            self.detector = StragglerDetector(azure_batch)
+        # Track the Tasks requeued by preemption, if configured
+        self.tracker = None
+        if self.config.pool.preemption.include:
+            self.tracker = PreemptionTracker(azure_batch)
+        self.last_check = self.last_update = time.time()
+
+
+    def poll(self):
+        """
+        Run the hooks whose interval has elapsed.
+        """
+        if self.detector and (time.time() - self.last_check >
+                              self.config.tasks.speculation.intervalInSeconds):
+            self.detector.check()
+            self.last_check = time.time()
+        if self.tracker and (time.time() - self.last_update >
+                             self.config.pool.preemption.intervalInSeconds):
+            self.tracker.update()
+            self.last_update = time.time()
 
 
-class ConfigurationReader():
+    def has_reports(self):
+        """
+        Check if the hooks print a report when the Tasks complete.
+
+        :rtype: bool
+        """
+        return bool(self.tracker or self.azure_batch.locality)
+
+
+    def finish(self):
+        """
+        Run the hooks of the completed Tasks.
+        """
+        if self.detector:
+            # delete the clones kept on the straggler node after the last check
+            self.detector.check()
+        if self.tracker:
+            self.tracker.update()
+            self.tracker.report()
+        if self.azure_batch.locality:
+            self.azure_batch.report_locality()
+
+
+class PreemptionScheduler:
     """
     Author: Pablo Viana
     Version: 1.0
-    Created: 2022/02/03
+    Created: 2026/10/19
 
-    Class to read the configuration file and the corresponding storage
-    containers and the input list.
+    Sends the long running inputs to dedicated capacity: a dedicated-only
+    pool and job (with the '-dedicated' suffix on the configured ids),
+    while the other inputs use the configured pool with low-priority nodes.
+    Long running inputs are those with size of at least longInputMinSize
+    and the inputs preempted in previous executions.
     """
-    config = None
+    SUFFIX = '-dedicated'
 
-    def __init__(self, json_file):
+    def __init__(self, config):
         """
-        Create the Configuration utility
+        Preemption scheduler constructor.
 
-        :params str json_file: string containing the json file data.
+        :params config: the configuration object.
         """
-        self.load_config(json_file)
+        self.config = config
+        self.preemption = config.pool.preemption
+        dedicated = copy.deepcopy(config)
+        dedicated.pool.id = f'{config.pool.id}{self.SUFFIX}'
+        dedicated.pool.dedicatedNodeCount = self.preemption.dedicatedNodeCount
+        dedicated.pool.lowPriorityNodeCount = 0
+        dedicated.pool.nodeAutoScale.include = False
+        dedicated.pool.preemption.include = False
+        dedicated.job.id = f'{config.job.id}{self.SUFFIX}'
+        # the input stamps are set by load_inputs, after this copy
+        dedicated.input_stamps = config.input_stamps
+        if dedicated.tasks.journal.include:
+            dedicated.tasks.journal.path = \
+                f'{dedicated.tasks.journal.path}{self.SUFFIX}'
+        self.dedicated_batch = AzureBatchUtils(dedicated)
+
+
+    def split_inputs(self, input_list):
+        """
+        Split the inputs into the ones to run on low-priority nodes and the
+        long running ones to run on dedicated nodes.
 
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :rtype: tuple(list, list)
+        :return: the low-priority and the dedicated input lists.
+        """
+        # the history of each account, if the job is fanned out
+        paths = [self.preemption.historyFile] + [
+            f'{self.preemption.historyFile}-{account.accountName}' for account
+            in [self.config.batch] + self.config.batch.accounts]
+        preempted = set()
+        for path in paths:
+            preempted.update(
+                PreemptionTracker.read_history(path)['preemptedInputs'])
+        low_priority, dedicated = [], []
+        for input in input_list:
+            if (input[1] >= self.preemption.longInputMinSize or
+                input[0] in preempted):
+                dedicated.append(input)
+            else:
+                low_priority.append(input)
+        self.config.output.print(
+            f'Preemption: {len(dedicated)} long running inputs on '\
+            f'dedicated nodes, {len(low_priority)} on the pool')
+        return (low_priority, dedicated)
 
-    def get_config(self):
+
+class AccountFanOut:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Fans the configured Pool, Job and Tasks out to several Batch accounts,
+    so the throughput is not capped by the core quota of a single account.
+    The accounts are the configured batch account (with the optional
+    batch.weight) and the extra accounts of batch.accounts. Each entry of
+    batch.accounts has the account credentials, an optional weight and
+    optional pool settings (node counts, vmSize, storage mounts) merged into
+    the configured pool. The inputs are partitioned with
+    weighted rendezvous hashing, so each input is always sent to the same
+    account (keeping the dedup and the journal effective on resubmissions),
+    with the weights defaulting to the account pool capacity in slots.
+    The commands run concurrently on all accounts and the counts are
+    aggregated.
+    """
+    CREDENTIALS = ['accountName', 'accountKey', 'accountUrl']
+
+    def __init__(self, config):
         """
-        Get the configuration attributes
+        Account fan-out constructor.
 
-        :rtype: `azure_batch.config_reader.ConfigurationReader.config`
-        :return: configuration object with json attributes as object attributes.
+        :params config: the configuration object.
         """
-        return self.config
+        self.config = config
+        self.accounts = []
+        primary = SimpleNamespace(**{key:getattr(config.batch, key)
+                                     for key in self.CREDENTIALS})
+        if hasattr(config.batch, 'weight'):
+            primary.weight = config.batch.weight
+        # the configured account may also be listed as an extra account
+        extra = [account for account in config.batch.accounts
+                 if account.accountUrl != primary.accountUrl]
+        for account in [primary] + extra:
+            account_config = copy.deepcopy(config)
+            account_config.batch = SimpleNamespace(
+                accounts=[], governor=config.batch.governor, **{
+                key:getattr(account, key) for key in self.CREDENTIALS})
+            if hasattr(account, 'pool'):
+                self.merge(account_config.pool, account.pool)
+            # the local files and the shared blobs are kept per account
+            suffix = f'-{account.accountName}'
+            tasks = account_config.tasks
+            if tasks.journal.include:
+                tasks.journal.path = f'{tasks.journal.path}{suffix}'
+            tasks.mirror.path = f'{tasks.mirror.path}{suffix}'
+            preemption = account_config.pool.preemption
+            preemption.historyFile = f'{preemption.historyFile}{suffix}'
+            if tasks.inputs.prefetch.include:
+                name = account_config.prefetch_manifest_name
+                account_config.prefetch_manifest_name = \
+                    f'{name[:-len(".tsv")]}{suffix}.tsv'
+                account_config.prefetch_manifest_url = \
+                    account_config.prefetch_manifest_url.replace(
+                        f'/{name}', f'/{account_config.prefetch_manifest_name}')
+            pool = account_config.pool
+            weight = getattr(account, 'weight', (pool.dedicatedNodeCount +
+                                                 pool.lowPriorityNodeCount) *
+                             pool.taskSlotsPerNode)
+            if weight <= 0:
+                raise ValueError(f'The batch account {account.accountName} '\
+                                 f'weight must be positive!')
+            self.accounts.append(SimpleNamespace(
+                name=account.accountName, weight=weight,
+                batch=AzureBatchUtils(account_config)))
+
+
+    @staticmethod
+    def merge(target, overrides):
+        """
+        Merge the overrides attributes into the target, recursively.
 
+        :params target: the object to be updated.
+        :type target: `types.SimpleNamespace`
+        :params overrides: the attributes to be set.
+        :type overrides: `types.SimpleNamespace`
+        """
+        for (key, value) in vars(overrides).items():
+            current = getattr(target, key, None)
+            if (isinstance(value, SimpleNamespace) and
+                isinstance(current, SimpleNamespace)):
+                AccountFanOut.merge(current, value)
+            else:
+                setattr(target, key, copy.deepcopy(value))
 
-    def load_config(self, json_file):
+
+    @staticmethod
+    def partition(input_list, accounts):
         """
-        Load the configuration from the specified json file and returns the
-        corresponding configuration object.
+        Partition the inputs with weighted rendezvous hashing: each input is
+        sent to the account with the highest weighted score, so the share of
+        each account is proportional to its weight and the assignment of an
+        input doesn't depend on the other inputs.
 
-        :params str json_file: string containing the json file data.
-        :rtype: `azure_batch.config_reader.Configuration.config`
-        :return: configuration object with json attributes as object attributes.
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :params accounts: the accounts names and weights.
+        :type accounts: list<tuple(str, float)>
+        :rtype: list<list<tuple(str, int, int)>>
+        :return: the input list of each account.
         """
-        self.config = None
-        # read the JSON file
-        with json_file as data:
-            # parse data into an object with attributes
-            # corresponding to the dict keys
-            hook = lambda d: SimpleNamespace(**d)
-            self.config = json.load(data, object_hook=hook)
+        partitions = [[] for _ in accounts]
+        for input in input_list:
+            best, best_score = 0, None
+            for (idx, (name, weight)) in enumerate(accounts):
+                digest = hashlib.sha256(f'{name}\0{input[0]}'.encode('utf-8'))
+                # uniform in (0, 1)
+                point = (int(digest.hexdigest()[:13], 16) + 1) / (16**13 + 1)
+                score = -weight / math.log(point)
+                if best_score is None or score > best_score:
+                    best, best_score = idx, score
+            partitions[best].append(input)
+        return partitions
+
+
+    def run_all(self, method, *args):
+        """
+        Run the AzureBatchUtils method on all accounts concurrently.
 
-        # set default values
-        if not hasattr(self.config.tasks.inputs, 'taskSlotFormula'):
-            self.config.tasks.inputs.taskSlotFormula = []
-        if not hasattr(self.config.tasks, 'commandSuffix'):
-            self.config.tasks.commandSuffix = ""
-        if not hasattr(self.config.tasks.inputs, 'filterOutExistingTaskInCurrentJob'):
-            self.config.tasks.inputs.filterOutExistingTaskInCurrentJob = False
+        :params str method: the method name.
+        :rtype: list
+        :return: the result of each account.
+        """
+        with concurrent.futures.ThreadPoolExecutor(len(self.accounts)) as \
+                executor:
+            futures = [executor.submit(getattr(account.batch, method), *args)
+                       for account in self.accounts]
+            return [future.result() for future in futures]
+
+
+    def create_pool(self):
+        """
+        Create the configured pool on all accounts.
+        """
+        self.run_all('create_pool')
+
+
+    def create_job(self):
+        """
+        Create the configured job on all accounts.
+        """
+        self.run_all('create_job')
+
+
+    def monitor_pool_allocation(self):
+        """
+        Monitor the pool allocation on all accounts.
+        """
+        return self.run_all('monitor_pool_allocation')
+
+
+    def enable_job_tasks(self):
+        """
+        Enable the configured job on all accounts.
+        """
+        self.run_all('enable_job_tasks')
+
+
+    def disable_job_tasks(self):
+        """
+        Disable the configured job on all accounts.
+        """
+        self.run_all('disable_job_tasks')
+
+
+    def reactivate_job_failed_tasks(self):
+        """
+        Reactivate the failed Tasks on all accounts.
+        """
+        return sum(self.run_all('reactivate_job_failed_tasks'))
+
+
+    def delete_resources(self, configured_only=False):
+        """
+        Delete the Batch resources of all accounts.
+
+        :params bool configured_only: delete only the configured job and
+        pool, otherwise all the jobs and pools of the Batch accounts.
+        :rtype: `types.SimpleNamespace`
+        :return: the ids of the deleted jobs and pools.
+        """
+        deleted = SimpleNamespace(jobs=[], pools=[])
+        for account_deleted in self.run_all('delete_resources',
+                                            configured_only):
+            deleted.jobs += account_deleted.jobs
+            deleted.pools += account_deleted.pools
+        return deleted
+
+
+    def print_batch_exception(self, batch_exception):
+        """
+        Print the contents of the specified Batch exception.
+        """
+        self.accounts[0].batch.print_batch_exception(batch_exception)
+
+
+    def create_tasks(self, input_list, execute_tasks, incremental=False):
+        """
+        Partition the inputs and create the Tasks on each account, showing
+        them sequentially or submitting them concurrently.
+
+        :params input_list: the inputs, tuples with name, size and slots.
+        :type input_list: list<tuple(str, int, int)>
+        :params bool execute_tasks: submit the Tasks to the accounts.
+        :params bool incremental: the inputs are added to the ones already
+        submitted (the watch mode).
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service on all
+        accounts (or showed).
+        """
+        partitions = self.partition(input_list, [(account.name, account.weight)
+                                                 for account in self.accounts])
+        # the input stamps are set after the accounts configuration copies
+        for account in self.accounts:
+            account.batch.config.input_stamps = self.config.input_stamps
+        self.config.output.print('Batch accounts partition:')
+        for (account, partition) in zip(self.accounts, partitions):
+            self.config.output.print(
+                f'  {account.name} (weight {account.weight}): '\
+                f'{len(partition)} inputs')
+        self.config.output.print()
+        if not execute_tasks:
+            added = 0
+            for (account, partition) in zip(self.accounts, partitions):
+                self.config.output.print(f'Batch account: {account.name}')
+                added += account.batch.create_tasks(partition, execute_tasks,
+                                                    incremental)
+            return added
+        with concurrent.futures.ThreadPoolExecutor(len(self.accounts)) as \
+                executor:
+            futures = [executor.submit(account.batch.create_tasks, partition,
+                                       execute_tasks, incremental)
+                       for (account, partition) in zip(self.accounts,
+                                                       partitions)]
+            return sum([future.result() for future in futures])
+
+
+    def filter_input_list_by_existing_tasks(self, input_list):
+        """
+        Filter the input list, removing the inputs that are already set on an
+        existing Task of the account they are partitioned to.
+
+        :params input_list: the original input list
+        :type input_list: list<tuple(str, int, int)>
+        :rtype: list<tuple(str, int, int)>
+        :return: The filtered input list.
+        """
+        partitions = self.partition(input_list, [(account.name, account.weight)
+                                                 for account in self.accounts])
+        with concurrent.futures.ThreadPoolExecutor(len(self.accounts)) as \
+                executor:
+            futures = [executor.submit(
+                           account.batch.filter_input_list_by_existing_tasks,
+                           partition)
+                       for (account, partition) in zip(self.accounts,
+                                                       partitions)]
+            kept = set([input[0] for future in futures
+                        for input in future.result()])
+        return [input for input in input_list if input[0] in kept]
+
+
+    def get_job_task_counts(self, use_mirror=False):
+        """
+        Aggregate the Task counts of the configured job on all accounts.
+
+        :params bool use_mirror: count from the local Task mirrors, if
+        configured.
+        :rtype: `types.SimpleNamespace`
+        :return: active, running, completed, succeeded, failed and total.
+        """
+        counts = SimpleNamespace(active=0, running=0, completed=0,
+                                 succeeded=0, failed=0, total=0)
+        for account_counts in self.run_all('get_job_task_counts', use_mirror):
+            for key in vars(counts):
+                setattr(counts, key, getattr(counts, key) +
+                        getattr(account_counts, key))
+        return counts
+
+
+    def list_resources(self, *args):
+        """
+        List the Batch resources of each account.
+        """
+        for account in self.accounts:
+            self.config.output.print(f'Batch account: {account.name}')
+            account.batch.list_resources(*args)
+            self.config.output.print()
 
-        # update the configuration with new attributes for storage sas url
-        i = self.config.storage.input
-        o = self.config.storage.output
-        s = self.config.storage.scripts
-        self.config.input_container_url = self.get_sas_url(i.container)
-        self.config.output_container_url = self.get_sas_url(o.container)
-        self.config.scripts_container_url = self.get_sas_url(s.container)
 
-        # creates calculteTaskSlots function
-        self.calculateTaskSlots = self.create_function_calculate_task_slots()
+    def sync_task_mirror(self):
+        """
+        Refresh the local Task mirror of each account.
+        """
+        self.run_all('sync_task_mirror')
 
-        return self.config
 
+    def report_io_benchmark(self):
+        """
+        Print the mount I/O benchmark reports of each account.
+        """
+        for account in self.accounts:
+            self.config.output.print(f'Batch account: {account.name}')
+            account.batch.report_io_benchmark()
 
-    def set_show_arguments(self, show, show_inputs, show_outputs,
-                           show_scripts, show_tasks):
+
+    def wait_job_tasks_completion(self, timeout=None):
         """
-        Load the show attributes from the arguments and set these attributes
-        in the configuration object.
+        Wait for all tasks of the configured job, on all accounts, to reach
+        the Completed state, printing the aggregated progress.
 
-        :params bool show: parameter specifying to show all elements.
-        :params bool show_inputs: parameter specifying to show inputs.
-        :params bool show_outputs: parameter specifying to show outputs.
-        :params bool show_scripts: parameter specifying to show scripts.
-        :params bool show_tasks: parameter specifying to show tasks.
+        :params float timeout: maximum time to wait, in seconds (no limit if
+        None).
+        :rtype: `types.SimpleNamespace`
+        :return: the aggregated Task counts of the completed job.
         """
-        self.config.argument = SimpleNamespace()
-        self.config.argument.showInputs = show or show_inputs
-        self.config.argument.showOutputs = show or show_outputs
-        self.config.argument.showScripts = show or show_scripts
-        self.config.argument.showTasks = show or show_tasks
+        init = time.time()
+        deadline = init + timeout if timeout else None
+        monitors = [CompletionMonitor(account.batch)
+                    for account in self.accounts]
+        progress = ''
+        while True:
+            counts = self.run_all('count_job_tasks')
+            total_tasks = sum([count[0] for count in counts])
+            completed_tasks = sum([count[1] for count in counts])
+            accounts = ' '.join([f'[{account.name} {count[1]}/{count[0]}]'
+                                 for (account, count) in zip(self.accounts,
+                                                             counts)])
+            progress = '.' if (len(progress) > 4) else progress+'.'
+            self.config.output.print(
+                f'Progress {completed_tasks:03d}/{total_tasks:03d} '\
+                f'{accounts} {progress: <10}', end='\r')
+            # the Task counts are updated with delay after a submission
+            if completed_tasks >= total_tasks and (
+                    total_tasks > 0 or time.time() - init >= TASK_COUNTS_DELAY):
+                break
+            if deadline and time.time() > deadline:
+                raise RuntimeError(f'ERROR: Tasks did not complete within '\
+                                   f'timeout period of {timeout} s.')
+            time.sleep(2)
+            for monitor in monitors:
+                monitor.poll()
+        self.config.output.print()
+        self.config.output.print()
+        self.config.output.print(
+            "All tasks reached the 'Completed' state on all accounts")
+        self.config.output.print()
+        for (account, monitor) in zip(self.accounts, monitors):
+            if monitor.has_reports():
+                self.config.output.print(f'Batch account: {account.name}')
+            monitor.finish()
+        return self.get_job_task_counts()
+
+
+class InputWatcher:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Watches the input container and submits a Task for each new input blob
+    to the configured job, in micro-batches of tasks.inputs.watch.batchSize,
+    without relisting the job Tasks. The new blobs are the ones modified
+    after the watermark (the last modified time of the last submitted blob),
+    or, if tasks.inputs.watch.eventsPath is set, the BlobCreated events
+    appended to that JSON lines file (a local stand-in of an Event Grid
+    subscription or a storage queue), consumed from the last offset. The
+    watermark is persisted after each micro-batch whose Tasks were all
+    accepted (a rejected Task stops the watch before it), and the Task ids
+    are derived from the Task commands, so a restart after a failure
+    submits the inputs of the last micro-batch again, as already existing
+    Tasks. The long running inputs are sent to the dedicated job, if
+    preemption is configured.
+    """
+    def __init__(self, batch, reader, scheduler=None):
+        """
+        Input watcher constructor.
+
+        :params batch: the Batch utils of the configured account (or
+        accounts).
+        :type batch: `AzureBatchUtils` or `AccountFanOut`
+        :params reader: the configuration reader.
+        :type reader: `ConfigurationReader`
+        :params scheduler: the scheduler of the long running inputs.
+        :type scheduler: `PreemptionScheduler`
+        """
+        self.batch = batch
+        self.scheduler = scheduler
+        self.reader = reader
+        self.config = reader.get_config()
+        self.watch = self.config.tasks.inputs.watch
+        if not self.config.tasks.inputs.areBlobsInInputStorage:
+            raise ValueError("The watch mode requires areBlobsInInputStorage!")
+        if not self.config.tasks.deterministicTaskIds:
+            raise ValueError("The watch mode requires deterministicTaskIds!")
+        self.container = ContainerClients.get(
+            container_url=self.config.input_container_url)
+        self.scripts_hash = None
+        if self.config.tasks.inputs.incremental.include:
+            self.scripts_hash = self.reader.get_scripts_hash()
+        self.state = self.read_state()
 
 
-    def get_sas_url(self, fullpath):
+    def read_state(self):
         """
-        Create a shared access signature URL granting access for the container
-        path with the given string.
+        Read the persisted watermark, starting from the beginning if it
+        doesn't exist or if it belongs to another job.
 
-        :params str fullpath: full container path name to map.
-        :rtype: str
-        :return: URL with permission to access the container path files.
+        :rtype: dict
+        :return: the watermark time, the names of the blobs with that time
+        and the events file offset.
         """
-        return 'https://{}.{}/{}{}'.format(
-            self.config.storage.accountName,
-            self.config.storage.accountDomain,
-            f'{fullpath}',
-            self.config.storage.accountSASToken
-            )
+        state = {'jobId':self.config.job.id, 'watermark':None, 'names':[],
+                 'offset':0}
+        if os.path.exists(self.watch.statePath):
+            with open(self.watch.statePath, 'r') as file:
+                saved = json.load(file)
+            if saved.get('jobId') == self.config.job.id:
+                state.update(saved)
+        return state
 
 
-    def create_function_calculate_task_slots(self):
+    def save_state(self):
         """
-        Create the user defined function, from the taskSlotFormula in the
-        configuration file, to calculate the required slot count for
-        each task, according to the input name and input size.
-        The default value is 1.
+        Persist the watermark, replacing the state file atomically.
+        """
+        partial = f'{self.watch.statePath}.part'
+        with open(partial, 'w') as file:
+            json.dump(self.state, file)
+        os.replace(partial, self.watch.statePath)
 
-        The statements must be in Python code, but the user can use only a
-        limited set of built in functions.
 
-        :rtype: <function>
-        :return: the user defined function to calculate task required slot
+    def is_new(self, blob, watermark):
         """
-        # get the statements from the configured taskSlotFormula
-        statements = '\n'.join([ '    ' + line for line in
-                                self.config.tasks.inputs.taskSlotFormula])
+        Check if the blob was modified after the watermark (the blobs with
+        the watermark time are new if they were not submitted yet).
 
-        # if statements contain the string 'self' or 'config' raise an exception
-        if('self' in statements or 'config' in statements):
-            raise ValueError("Can't use 'self' or 'config' in taskSlotFormula!")
+        :params watermark: the watermark time (None if no blob was submitted).
+        :type watermark: `datetime.datetime`
+        """
+        if watermark is None:
+            return True
+        if blob.last_modified == watermark:
+            return blob.name not in self.state['names']
+        return blob.last_modified > watermark
 
-        # replaces the symbol '$' with a call to a configured attribute
-        statements = statements.replace('$','config.')
 
-        # the template that will be compiled with the configured formulas
-        template = ["def calculateTaskRequiredSlots(input_name, input_size):",
-                    "    requiredSlots = 1",
-                    "{}",
-                    "    return requiredSlots"]
-        code = '\n'.join(template).format(statements)
+    def list_new_blobs(self):
+        """
+        List the input blobs modified after the watermark, up to the settle
+        time (the blobs modified in the last seconds are left to the next
+        poll, as blobs with an earlier time may not be listed yet).
 
-        # allowed builtin functions that can be used in the formulas
-        safe_list = {'abs':abs, 'all':all, 'any':any, 'bin':bin, 'bool':bool,
-                     'chr':chr, 'filter':filter, 'format':format, 'float':float,
-                     'hash':hash, 'int':int, 'len':len, 'max':max, 'min':min,
-                     'ord':ord, 'range':range, 'reversed':reversed, 'str':str,
-                     'round':round, 'sorted':sorted, 'sum':sum}
+        :rtype: list<tuple(`azure.storage.blob.BlobProperties`, int)>
+        :return: the new blobs in modified time order (the events offset is
+        not used).
+        """
+        prefix = f'{self.config.storage.input.path}'\
+                 f'{self.config.storage.input.blobPrefix}'
+        settled = datetime.datetime.now(datetime.timezone.utc) - \
+            datetime.timedelta(seconds=self.watch.settleInSeconds)
+        watermark = self.state['watermark']
+        if watermark is not None:
+            watermark = datetime.datetime.fromisoformat(watermark)
+        blobs = [blob for blob in self.container.list_blobs(
+                     name_starts_with=prefix)
+                 if blob.last_modified <= settled and
+                 self.is_new(blob, watermark)]
+        blobs.sort(key=lambda blob:(blob.last_modified, blob.name))
+        return [(blob, None) for blob in blobs]
+
+
+    def read_events(self):
+        """
+        Read the BlobCreated events appended after the last offset. Each line
+        is an Event Grid event (with the blob path in its subject) or an
+        object with the blob name and size.
 
-        my_global_scope = {}
-        my_global_scope['__builtins__'] = safe_list
-        # include a copy of the configured attributes in the used scope
-        my_global_scope['config'] = copy.deepcopy(self.config)
+        :rtype: list<tuple(`types.SimpleNamespace`, int)>
+        :return: the new blobs (name and size) and the offset after each one.
+        """
+        blobs = []
+        if not os.path.exists(self.watch.eventsPath):
+            return blobs
+        with open(self.watch.eventsPath, 'rb') as file:
+            file.seek(self.state['offset'])
+            for line in file:
+                # a line still being written is read on the next poll
+                if not line.endswith(b'\n'):
+                    break
+                offset = file.tell()
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if 'subject' in event:
+                    if event.get('eventType', '').endswith('BlobDeleted'):
+                        continue
+                    name = event['subject'].partition('/blobs/')[2]
+                    size = event.get('data', {}).get('contentLength', 0)
+                else:
+                    (name, size) = (event['name'], event.get('size', 0))
+                blobs.append((SimpleNamespace(name=name, size=size), offset))
+        return blobs
 
-        local_scope = {}
-        # compile the code with the specified scope
-        exec(code, my_global_scope, local_scope)
 
-        # returns the created function
-        return local_scope['calculateTaskRequiredSlots']
+    def get_input(self, blob):
+        """
+        Get the input of a new blob, setting its stamp if incremental.
+
+        :rtype: tuple(str, int, int)
+        :return: the input name, size and slots, or None if the blob is not
+        an input.
+        """
+        prefix = f'{self.config.storage.input.path}'\
+                 f'{self.config.storage.input.blobPrefix}'
+        if (not blob.name.startswith(prefix) or
+            not blob.name.endswith(
+                self.config.tasks.inputs.inputFileExtension)):
+            return None
+        required_slots = self.reader.calculateTaskSlots(blob.name, blob.size)
+        if (required_slots > self.config.pool.taskSlotsPerNode):
+            self.config.reporter.item(
+                'too big input', f'File "{blob.name}" is too big (requires '\
+                f'{required_slots} slots)! Cannot be executed with current '\
+                f'configuration.', 'warning')
+            return None
+        if self.scripts_hash:
+            if not hasattr(blob, 'etag'):
+                # the events don't have the blob content version
+                blob = self.container.get_blob_client(
+                    blob.name).get_blob_properties()
+            self.config.input_stamps[blob.name] = self.reader.get_input_stamp(
+                blob, self.scripts_hash)
+        return (blob.name, blob.size, required_slots)
+
+
+    def advance(self, blob, offset):
+        """
+        Move the watermark past the blob.
+        """
+        if offset is not None:
+            self.state['offset'] = offset
+            return
+        modified = blob.last_modified.isoformat()
+        if modified != self.state['watermark']:
+            self.state['watermark'] = modified
+            self.state['names'] = []
+        self.state['names'].append(blob.name)
 
 
-    def order_input_list(self, input_list):
+    def submit(self, input_list):
         """
-        Order the input list with the configured specifications.
+        Submit the Tasks of a micro-batch, the long running inputs to the
+        dedicated job (if preemption is configured).
 
-        :param input_files: A collection of input files. Each input is a tuple
-        with a string representing the input item, the input size and the input
-        required slots.
+        :params input_list: the inputs, tuples with name, size and slots.
         :type input_list: list<tuple(str, int, int)>
+        :rtype: int
+        :return: the number of Tasks accepted by the Batch Service.
         """
-        sort_attr = {"name":0, "size":1, "slots":2}
-        sort_rev = {"asc":False, "desc":True}
-        config_order = None
-        config_reverse = False
+        accepted = 0
+        if self.scheduler:
+            (input_list, dedicated_list) = \
+                self.scheduler.split_inputs(input_list)
+            if dedicated_list:
+                accepted += self.scheduler.dedicated_batch.create_tasks(
+                    dedicated_list, True, incremental=True)
+        if input_list:
+            accepted += self.batch.create_tasks(input_list, True,
+                                                incremental=True)
+        return accepted
+
+
+    def poll(self):
+        """
+        Submit the Tasks of the new blobs, in micro-batches, persisting the
+        watermark after each one. The watermark is not moved past a
+        micro-batch with rejected Tasks, which are submitted again on the
+        next run.
+
+        :rtype: int
+        :return: the number of submitted Tasks.
+        """
+        if self.watch.eventsPath:
+            blobs = self.read_events()
+        else:
+            blobs = self.list_new_blobs()
+        submitted = 0
+        pending, inputs = [], []
+        for (idx, (blob, offset)) in enumerate(blobs):
+            pending.append((blob, offset))
+            input = self.get_input(blob)
+            if input:
+                inputs.append(input)
+            if len(inputs) < self.watch.batchSize and idx < len(blobs) - 1:
+                continue
+            if inputs:
+                accepted = self.submit(inputs)
+                if accepted < len(inputs):
+                    raise RuntimeError(f'ERROR: {len(inputs)-accepted} of '\
+                                       f'{len(inputs)} Tasks were rejected, '\
+                                       f'the watermark was kept before them.')
+                submitted += accepted
+            for (pending_blob, pending_offset) in pending:
+                self.advance(pending_blob, pending_offset)
+            self.save_state()
+            pending, inputs = [], []
+        self.config.reporter.summary('Watch poll')
+        return submitted
+
+
+    def run(self, max_polls=None):
+        """
+        Watch the input container until interrupted (or max_polls).
+
+        :params int max_polls: number of polls (no limit if None).
+        :rtype: int
+        :return: the number of submitted Tasks.
+        """
+        source = self.watch.eventsPath or self.config.input_container_url\
+            .partition('?')[0]
+        self.config.output.print(f'Watching {source} for new inputs of Job '\
+                                 f'[{self.config.job.id}] (Ctrl+C to stop)...')
+        submitted, polls = 0, 0
+        # the micro-batches are submitted without the terminal pauses
+        (output, pauses) = (self.config.output, self.config.output.pauses)
+        output.pauses = False
         try:
-            # try to get the order configured attributes, if they don't exist
-            # use the default values, defined previously
-            config_order = self.config.tasks.inputs.order.by
-            config_reverse = sort_rev[self.config.tasks.inputs.order.type]
-        except:
-            pass
+            while max_polls is None or polls < max_polls:
+                init = time.time()
+                count = self.poll()
+                polls += 1
+                if count:
+                    submitted += count
+                    self.config.output.print(
+                        f'{time.strftime("%Y-%m-%d %H:%M:%S")} Submitted '\
+                        f'{count} Tasks ({submitted} since start)')
+                if max_polls is None or polls < max_polls:
+                    time.sleep(max(0, self.watch.intervalInSeconds -
+                                   (time.time() - init)))
+        except KeyboardInterrupt:
+            self.config.output.print('Watch stopped.')
+        finally:
+            output.pauses = pauses
+        self.config.output.print(f'Watermark saved on {self.watch.statePath}')
+        self.config.output.print()
+        return submitted
+
+
+class ActSession:
+    """
+    Author: Pablo Viana
+    Version: 1.0
+    Created: 2026/10/19
+
+    Python API of ACT, to drive the executions from another program without
+    spawning a process for each run. A session holds the configuration, the
+    Batch utils of the configured account (or accounts) and the loaded
+    inputs, while the Batch and storage clients are shared by all the
+    sessions of the process, so a parameter sweep reuses their connections.
+    The operations return structured results: the messages are sent to the
+    log function (or discarded) and there are no pauses between the steps.
+    The command line runs its steps on an interactive session, which prints
+    the messages and pauses as before.
+
+    Example:
+        session = ActSession('config.json', log=logging.info)
+        result = session.submit()
+        counts = session.wait(timeout=3600)
+        session.teardown()
+    """
+    def __init__(self, config, log=None, interactive=False):
+        """
+        Session constructor, loading and validating the configuration.
 
-        print(f'order:{config_order}, reverse:{config_reverse}')
-        if config_order == "random":
-            # Shuffle the input list to randomize the execution of input files
-            random.shuffle(input_list)
-            print("shuffled!")
+        :params config: the configuration, as a JSON file path, an open JSON
+        file or a dict with the JSON attributes.
+        :params log: function receiving each message (discarded if None).
+        :params bool interactive: print the messages on the terminal, pausing
+        between the steps (the command line).
+        """
+        # the session output is set on its configuration (config.output)
+        output = SessionOutput()
+        if not interactive:
+            output = SessionOutput(log or (lambda message: None), False)
+        if isinstance(config, dict):
+            config = io.StringIO(json.dumps(config))
+        elif isinstance(config, str):
+            config = open(config, 'r')
+        self.reader = ConfigurationReader(config, output)
+        self.reader.set_show_arguments(False, False, False, False, False)
+        self.config = self.reader.get_config()
+        # Fan out to the configured accounts
+        if self.config.batch.accounts:
+            self.batch = AccountFanOut(self.config)
+        else:
+            self.batch = AzureBatchUtils(self.config)
+        # Create the dedicated capacity for the long running inputs
+        self.scheduler = None
+        if self.config.pool.preemption.include:
+            self.scheduler = PreemptionScheduler(self.config)
+        # the inputs loaded by list_inputs
+        self.inputs = None
 
-        if config_order in sort_attr:
-            config_attr = sort_attr[config_order]
-            # sorts the input list with the configured attributes
-            input_list.sort(key=lambda x:x[config_attr], reverse=config_reverse)
-            print("sorted!")
 
+    def create_resources(self):
+        """
+        Create the configured pool and job (and the dedicated ones), if they
+        don't exist.
 
-    def load_inputs(self, input_dict={}):
+        :rtype: `types.SimpleNamespace`
+        :return: the pool and job ids.
         """
-        Load the list of inputs accordingly with the current configuration
-        and set the config.inputs attribute.
+        self.batch.create_pool()
+        self.batch.create_job()
+        if self.scheduler:
+            self.scheduler.dedicated_batch.create_pool()
+            self.scheduler.dedicated_batch.create_job()
+        return SimpleNamespace(pool_id=self.config.pool.id,
+                               job_id=self.config.job.id)
+
 
-        :params input_dict: Input items to be added.
-        :type input_dict: Dictionary<str:tuple(str, int, int)>
+    def list_inputs(self, input_manifest=None):
+        """
+        Load the configured inputs, keeping them for the next add_tasks.
+
+        :params input_manifest: the inputs to be added (all the configured
+        inputs if None).
+        :type input_manifest: `InputManifest`
         :rtype: list<tuple(str, int, int)>
-        :return: list of input items.
+        :return: the inputs, tuples with name, size and slots.
         """
-        # show scripts
-        if self.config.argument.showScripts:
-            print('Script files:')
-            scr_container = blobstorage.ContainerClient.from_container_url(
-                container_url=self.config.scripts_container_url)
-            scr_prefix = f'{self.config.storage.scripts.blobPrefix}'
-            for blob in scr_container.list_blobs(name_starts_with=scr_prefix):
-                print(f'{blob.name},{blob.size}')
-            print()
+        self.inputs = self.reader.load_inputs(input_manifest)
+        self.config.reporter.summary('Input listing')
+        return self.inputs
 
-        # get inputs
-        input_list = []
-        if self.config.tasks.inputs.areBlobsInInputStorage:
-            input_list = self.get_input_list_from_storage(input_dict)
-        else:
-            input_list = self.get_input_list_locally(input_dict)
 
-        print('Inputs:')
-        # order input list
-        self.order_input_list(input_list)
+    def add_tasks(self, input_list=None, execute=True):
+        """
+        Add a Task for each input to the configured job (and the long running
+        inputs to the dedicated job).
 
-        # show inputs
-        if self.config.argument.showInputs:
-            for input in input_list:
-                print(f'{input[0]},{input[1]},{input[2]}')
-        print(f'Input list ({len(input_list)})')
-        print()
+        :params input_list: the inputs, tuples with name, size and slots
+        (the loaded inputs if None).
+        :type input_list: list<tuple(str, int, int)>
+        :params bool execute: submit the Tasks, otherwise only show them.
+        :rtype: int
+        :return: the number of Tasks accepted (or showed).
+        """
+        if input_list is None:
+            input_list = self.inputs
+        if input_list is None:
+            input_list = self.list_inputs()
+        added = 0
+        if self.scheduler:
+            (input_list, dedicated_list) = \
+                self.scheduler.split_inputs(input_list)
+            if self.config.tasks.inputs.filterOutExistingTaskInCurrentJob:
+                # an input moved between the jobs has a Task on the other job
+                input_list = self.scheduler.dedicated_batch\
+                    .filter_input_list_by_existing_tasks(input_list)
+                dedicated_list = \
+                    self.batch.filter_input_list_by_existing_tasks(
+                        dedicated_list)
+            added += self.scheduler.dedicated_batch.create_tasks(
+                dedicated_list, execute)
+        added += self.batch.create_tasks(input_list, execute)
+        self.config.reporter.summary('Task creation')
+        return added
+
+
+    def submit(self, input_manifest=None):
+        """
+        Create the pool and job and add a Task for each configured input.
 
-        self.config.inputs = input_list
-        return self.config.inputs
+        :params input_manifest: the inputs to be added (all the configured
+        inputs if None).
+        :type input_manifest: `InputManifest`
+        :rtype: `types.SimpleNamespace`
+        :return: the pool and job ids and the number of inputs and Tasks.
+        """
+        result = self.create_resources()
+        result.inputs = len(self.list_inputs(input_manifest))
+        result.tasks = self.add_tasks()
+        return result
 
 
-    def get_input_list_locally(self, input_dict={}):
+    def count(self):
         """
-        Get the list of input items from the given dictionary.
+        Count the Tasks of the configured job (and the dedicated job) by
+        their states.
 
-        :params input_dict: Input items to be added.
-        :type input_dict: Dictionary<str:tuple(str, int, int)>
-        :rtype: list<tuple(str, int, int)>
-        :return: list of input items.
+        :rtype: `types.SimpleNamespace`
+        :return: active, running, completed, succeeded, failed and total.
         """
-        input_list = []
-        for item_name in input_dict:
-            if not item_name.startswith('#'):
-                item = input_dict[item_name]
-                item_size,item_slot = 0,1
-                if len(item) > 1:
-                    item_size = int(item[1])
-                if len(item) > 2:
-                    item_slot = item[2]
-                else:
-                    # calculate task slots required for this input blob size
-                    item_slot = self.calculateTaskSlots(item_name, item_size)
-                    if (item_slot > self.config.pool.taskSlotsPerNode):
-                        print(f'File "{item_name}" is too big (requires '\
-                              f'{item_slot} slots)! Cannot be executed '\
-                              f'with current configuration.')
-                        continue
-
-                input_list.append((item_name, item_size, item_slot))
-        return input_list
+        keys = ['active', 'running', 'completed', 'succeeded', 'failed',
+                'total']
+        job_counts = [self.batch.get_job_task_counts(use_mirror=True)]
+        if self.scheduler:
+            job_counts.append(
+                self.scheduler.dedicated_batch.get_job_task_counts(
+                    use_mirror=True))
+        return SimpleNamespace(**{key:sum([getattr(counts, key) for counts
+                                           in job_counts]) for key in keys})
+
+
+    def wait(self, timeout=None):
+        """
+        Wait for the Tasks of the configured job (and the dedicated job) to
+        complete.
+
+        :params float timeout: maximum time to wait on each job, in seconds
+        (no limit if None).
+        :rtype: `types.SimpleNamespace`
+        :return: the Task counts of the configured job and the dedicated
+        job.
+        """
+        self.batch.wait_job_tasks_completion(timeout)
+        if self.scheduler:
+            self.scheduler.dedicated_batch.wait_job_tasks_completion(
+                timeout)
+        return self.count()
 
 
-    def get_input_list_from_storage(self, input_dict={}):
+    def watch(self, max_polls=None):
         """
-        Get the list of input files for the tasks from the storage.
-        If input_dict is provided, blobs are added only if they are in the
-        dictionary and exist in the Input Storage.
-        If the flag filterOutExistingBlobInOutputStorage is True, only add
-        blobs that don't exist in the Output Storage Container.
+        Create the pool and job, if they don't exist, and submit a Task for
+        each new input blob until interrupted (or max_polls).
 
-        :params input_dict: Blobs to be added. If empty, all blobs from the
-        configured Input Storage Container are added.
-        :type input_dict: Dictionary<str:tuple(str, int, int)>
-        :rtype input_list: list<tuple(str, int, int)>
-        :return: list of input items.
+        :params int max_polls: number of polls of the input container (no
+        limit if None).
+        :rtype: int
+        :return: the number of submitted Tasks.
         """
-        output_dict = {}
-        if (self.config.tasks.inputs.filterOutExistingBlobInOutputStorage or
-            self.config.argument.showOutputs):
-            if self.config.argument.showOutputs:
-                print('Output files:')
-            # Create the output Blob Container Client to see if the output blobs
-            # already exists on our output container.
-            out_container = blobstorage.ContainerClient.from_container_url(
-                container_url=self.config.output_container_url)
-            out_prefix = f'{self.config.storage.output.path}'\
-                         f'{self.config.storage.output.blobPrefix}'
-            out_path_len = len(self.config.storage.output.path)
-            out_extension = self.config.tasks.inputs.outputFileExtension
-            out_extension_len = len(out_extension)
-            for blob in out_container.list_blobs(name_starts_with=out_prefix):
-                if blob.name.endswith(out_extension):
-                    # removes prefix and extension
-                    name = blob.name[out_path_len:-out_extension_len]
-                    output_dict[name] = blob
-                    #print outputs
-                    if self.config.argument.showOutputs:
-                        print(f'{blob.name[out_path_len:]},{blob.size}')
-            print(f'Output list ({len(output_dict)})')
-            print()
+        self.create_resources()
+        return InputWatcher(self.batch, self.reader,
+                            self.scheduler).run(max_polls)
 
-        # create the input Blob Container Client to get blobs from our container
-        input_container = blobstorage.ContainerClient.from_container_url(
-            container_url=self.config.input_container_url)
 
-        # Define prefix to get blobs
-        input_prefix = f'{self.config.storage.input.path}'\
-                       f'{self.config.storage.input.blobPrefix}'
-        input_path_len = len(self.config.storage.input.path)
-        input_extension = self.config.tasks.inputs.inputFileExtension
-        input_extension_len = len(input_extension)
+    def reactivate(self):
+        """
+        Reactivate the failed Tasks of the configured job (and the dedicated
+        job).
 
-        # get all blobs in the input container whose name starts with prefix
-        input_list = []
-        for blob in input_container.list_blobs(name_starts_with=input_prefix):
-            # if blobs doesn't ends with the expected extension don't add it
-            if not blob.name.endswith(input_extension):
-                continue
-            # add all listed input blobs if input_dict is empty otherwise
-            # only add if the blob is in the input_dict
-            if (len(input_dict) > 0 and blob.name not in input_dict):
-                continue
-            # if True checks blob's existence in output container
-            if self.config.tasks.inputs.filterOutExistingBlobInOutputStorage:
-                output_name = blob.name[input_path_len:-input_extension_len]
-                # if blob exists in output container don't add to input list
-                if output_name in output_dict:
-                    print(f'File already exists in output container: '\
-                          f'{blob.name}')
-                    continue
+        :rtype: int
+        :return: the number of reactivated Tasks.
+        """
+        reactivated = self.batch.reactivate_job_failed_tasks()
+        if self.scheduler:
+            reactivated += \
+                self.scheduler.dedicated_batch.reactivate_job_failed_tasks()
+        return reactivated
 
-            # calculate task slots required for this input blob size
-            required_slots = self.calculateTaskSlots(blob.name, blob.size)
-            if (required_slots > self.config.pool.taskSlotsPerNode):
-                print(f'File "{blob.name}" is too big (requires '\
-                      f'{required_slots} slots)! Cannot be executed '\
-                      f'with current configuration.')
-                continue
-            input_list.append((blob.name, blob.size, required_slots))
-        print()
 
-        return input_list
+    def enable(self):
+        """
+        Enable the configured job and its Tasks.
+        """
+        self.batch.enable_job_tasks()
 
 
-    def delete_config_input_blobs(self):
+    def disable(self):
         """
-        Delete all blobs with the configured input specifications.
+        Disable the configured job, requeueing its running Tasks.
         """
-        # create the input Blob Container Client to get blobs from our container
-        input_container = blobstorage.ContainerClient.from_container_url(
-            container_url=self.config.input_container_url)
+        self.batch.disable_job_tasks()
 
-        # Define prefix to get blobs
-        input_prefix = f'{self.config.storage.input.path}'\
-                       f'{self.config.storage.input.blobPrefix}'
 
-        # get all blobs in the input container whose name starts with prefix
-        for blob in input_container.list_blobs(name_starts_with=input_prefix):
-            # delete all specified blobs
-            input_container.delete_blob(blob, delete_snapshots='include')
+    def teardown(self):
+        """
+        Delete the configured job and pool (and the dedicated ones) of the
+        Batch account (or accounts). The other jobs and pools of the
+        accounts are kept.
+
+        :rtype: `types.SimpleNamespace`
+        :return: the ids of the deleted jobs and pools.
+        """
+        deleted = self.batch.delete_resources(configured_only=True)
+        if self.scheduler:
+            dedicated = self.scheduler.dedicated_batch.delete_resources(
+                configured_only=True)
+            deleted.jobs += dedicated.jobs
+            deleted.pools += dedicated.pools
+        return deleted
 
 
 class InputHandler:
@@ -1025,8 +6292,14 @@ class InputHandler:
                                          ' the Microsoft Azure cloud'\
                                          ' environment.',
                                          usage= 'python3 %(prog)s  [-j JSON]'\
-                                         ' [-i INPUT] [-xslcedrwfyvh] [-sI]'\
-                                         ' [-sO] [-sS] [-sT] [-dI]')
+                                         ' [-i INPUT] [-xstlcedrmakwfyuvh]'\
+                                         ' [-sI] [-sO] [-sS] [-sT] [-dI] [-aR]'\
+                                         ' [-oI FILE] [--sync] [-lS STATE]'\
+                                         ' [-lJ PREFIX] [-lT PREFIX]'\
+                                         ' [-lF FORMAT] [-lO FILE] [-lN N]'\
+                                         ' [-bR] [-gL FILE] [-gT PREFIX]'\
+                                         ' [--watch] [--log-level LEVEL]'\
+                                         ' [--detail FILE]')
         # Optional arguments
         parser.add_argument('-j', '--json', metavar='JSON', help='use the'\
                             ' specified JSON file as the configuration file.'\
@@ -1053,8 +6326,14 @@ class InputHandler:
                             ' input size, and (3) the required computing slots'\
                             ' for this input, only the first parameter is'\
                             ' required, the other parameters are optional with'\
-                            ' default value 0 and 1, respectively.',
-                            type=argparse.FileType('r'))
+                            ' default value 0 and 1, respectively. Files with'\
+                            ' .tsv extension are tab separated, .gz and .zst'\
+                            ' files are decompressed, and .parquet, .arrow or'\
+                            ' .feather files have these three columns.')
+        parser.add_argument('-oI', '--save-inputs', metavar='FILE',
+                            help='save the input list (input string, size and'\
+                            ' required slots) on FILE, in the format given by'\
+                            ' its extension, to be used again with -i.')
         parser.add_argument('-s', '--show', help='show the debug information'\
                             ' about the current execution: inputs, outputs,'\
                             ' scripts and Tasks’ commands.', action='store_true')
@@ -1068,13 +6347,55 @@ class InputHandler:
                             action='store_true')
         parser.add_argument('-sT', '--show-tasks', help='show the Tasks’'\
                             ' commandLine for each Task.', action='store_true')
+        parser.add_argument('-u', '--upload', help='upload the local scripts'\
+                            ' and inputs directories to the configured'\
+                            ' containers, skipping the unchanged files. With'\
+                            ' -x, the upload runs while the Pool is created.',
+                            action='store_true')
         parser.add_argument('-dI', '--delete-inputs', help='delete the'\
                             ' corresponding blobs from configured input.',
                             action='store_true')
+        parser.add_argument('-t', '--check', help='check the configuration'\
+                            ' file, loading and validating it, and exit.',
+                            action='store_true')
         parser.add_argument('-l', '--list', help='list Tasks by their states.',
                             action='store_true')
+        parser.add_argument('-lS', '--list-state', metavar='STATE',
+                            help='list only the Tasks on STATE.',
+                            choices=['active', 'preparing', 'running',
+                                     'completed'])
+        parser.add_argument('-lJ', '--list-job-prefix', metavar='PREFIX',
+                            help='list only the Jobs with id starting with'\
+                            ' PREFIX.')
+        parser.add_argument('-lT', '--list-task-prefix', metavar='PREFIX',
+                            help='list only the Tasks with id starting with'\
+                            ' PREFIX.')
+        parser.add_argument('-lF', '--list-format', metavar='FORMAT',
+                            help='list in the FORMAT: table (default), jsonl'\
+                            ' or csv.', choices=['table', 'jsonl', 'csv'])
+        parser.add_argument('-lO', '--list-output', metavar='FILE',
+                            help='write the list on FILE.')
+        parser.add_argument('-lN', '--list-limit', metavar='N', type=int,
+                            help='list at most N Tasks.')
+        parser.add_argument('-gL', '--harvest-logs', metavar='FILE',
+                            help='download the uploaded Tasks logs'\
+                            ' concurrently, extract their phase timings with'\
+                            ' the configured extractors into FILE (JSON lines,'\
+                            ' or a table if FILE ends with .csv) and summarize'\
+                            ' where the Tasks time goes.')
+        parser.add_argument('-gT', '--harvest-task-prefix', metavar='PREFIX',
+                            help='harvest only the logs of the Tasks with id'\
+                            ' starting with PREFIX.')
+        parser.add_argument('--watch', help='watch the input container,'\
+                            ' submitting a Task for each new input blob to'\
+                            ' the configured Job in micro-batches, until'\
+                            ' interrupted. The watermark is persisted, so the'\
+                            ' watch can be restarted.', action='store_true')
         parser.add_argument('-c', '--count', help='count Tasks by their states.',
                             action='store_true')
+        parser.add_argument('--sync', help='refresh the local mirror of the'\
+                            ' configured Job Tasks with the Tasks changed'\
+                            ' since the last sync.', action='store_true')
         parser.add_argument('-d', '--disable', help='disable the current Job'\
                             ' and all associated Tasks, returning the Tasks'\
                             ' that are running to the end of the execution'\
@@ -1087,6 +6408,27 @@ class InputHandler:
                             action='store_true')
         parser.add_argument('-r', '--reactivate', help='reactivate all failed' \
                             ' Tasks to re-queue them.', action='store_true')
+        parser.add_argument('-m', '--monitor', help='monitor the allocation of'\
+                            ' the Pool nodes, reporting the time to the first'\
+                            ' idle node and to the full capacity, and handling'\
+                            ' the nodes with failed start task.',
+                            action='store_true')
+        parser.add_argument('-a', '--advise', help='run the inputs sample on'\
+                            ' trial Pools of the advisor candidates vmSize and'\
+                            ' taskSlotsPerNode, recording the Tasks runtime and'\
+                            ' peak memory on the advisor trace file, and rank'\
+                            ' the configurations.', action='store_true')
+        parser.add_argument('-aR', '--advise-rank', help='rank the advisor'\
+                            ' configurations from the recorded trace file,'\
+                            ' without running trials.', action='store_true')
+        parser.add_argument('-bR', '--benchmark-report', help='show the mount'\
+                            ' I/O benchmark reports of the configured Pool'\
+                            ' nodes.', action='store_true')
+        parser.add_argument('-k', '--calibrate', help='calibrate the Tasks'\
+                            ' required slots from the resource usage of the'\
+                            ' running and completed Tasks, replacing the active'\
+                            ' Tasks with corrected required slots.',
+                            action='store_true')
         parser.add_argument('-w', '--wait', help='wait all tasks to complete'\
                             ' while showing the current progress.',
                             action='store_true')
@@ -1098,6 +6440,15 @@ class InputHandler:
                             ' to confirm deletion without requiring user'\
                             ' confirmation.', action='store_true')
         # Print version
+        parser.add_argument('--log-level', metavar='LEVEL', help='report the'\
+                            ' per item messages (inputs, outputs, Tasks'\
+                            ' commands, skipped items) from LEVEL: debug'\
+                            ' (all the items), info (a sample of each'\
+                            ' category, the default), warning or error.',
+                            choices=list(Reporter.LEVELS))
+        parser.add_argument('--detail', metavar='FILE', help='write all the'\
+                            ' per item messages on FILE, as JSON lines'\
+                            ' (compressed if FILE ends with .gz or .zst).')
         parser.add_argument('-v', '--version', help='show ACT version number'\
                             ' and exit.', action='version',
                             version='Azure Custom Tasks - Act v1.0')
@@ -1115,7 +6466,7 @@ class InputHandler:
 
         allValues = list()
         for key in args.__dict__:
-            if not key == "json":
+            if key not in ("json", "log_level", "detail"):
                 allValues.append(args.__dict__[key])
 
         if (args.exec or not any(allValues)):
@@ -1186,60 +6537,107 @@ class AzureCustomTasks:
         # Parse the arguments
         ihandler = InputHandler()
         args = ihandler.getArguments()
-        # Get customized configurations
-        config = ConfigurationReader(args.json)
+        # Get customized configurations, creating the Batch Utils class (and
+        # the dedicated capacity for the long running inputs)
+        session = ActSession(args.json, interactive=True)
+        config = session.reader
         config.set_show_arguments(args.show, args.show_inputs, args.show_outputs,
                                   args.show_scripts, args.show_tasks)
-        # Create Batch Utils class
-        azure_batch = AzureBatchUtils(config.get_config())
+        if (args.check):
+            print(f'Configuration file {args.json.name} is valid.')
+            print()
+            return
+        reporter = config.get_config().reporter
+        if (args.log_level):
+            reporter.level = Reporter.LEVELS[args.log_level]
+        if (args.detail):
+            reporter.detail_path = args.detail
+        azure_batch = session.batch
         ############################################################################
         try:
             if (args.reactivate):
                 print("Reactivating Failed Tasks:")
-                sum = azure_batch.reactivate_job_failed_tasks()
+                sum = session.reactivate()
                 print(f"Reactivated {sum} Tasks.")
                 print()
 
             if (args.enable):
                 print("Enabling Job and Tasks:")
-                azure_batch.enable_job_tasks()
+                session.enable()
                 print()
 
             if (args.disable):
                 print("Disabling Job and Tasks:")
-                azure_batch.disable_job_tasks()
+                session.disable()
                 print()
 
+            # Upload the local scripts and inputs, while creating the pool
+            upload = None
+            if (args.upload):
+                executor = concurrent.futures.ThreadPoolExecutor(1)
+                upload = executor.submit(StorageSync(config.get_config()).run)
+                executor.shutdown(wait=False)
+                if not args.execute:
+                    upload.result()
+
             if (args.execute):
                 # Create the pool that will contain the compute nodes that
-                # will execute the tasks.
-                azure_batch.create_pool()
-                # Create the job that will run the tasks.
-                azure_batch.create_job()
+                # will execute the tasks and the job that will run the tasks.
+                session.create_resources()
+
+            if upload:
+                # the inputs are listed after they are uploaded
+                upload.result()
 
             if (args.delete_inputs):
                 # delete blobs configured as inputs
                 config.delete_config_input_blobs()
 
-            input_dict = {}
+            input_manifest = InputManifest()
             if (args.input):
-                # Get inputs from the file
-                with args.input as file:
-                    for line in file:
-                        line = line.strip().split(',')
-                        input_dict[line[0]] = line
+                # Get inputs from the manifest file
+                input_manifest = InputManifest.read(args.input)
 
-            if (args.execute or args.show_any):
+            if (args.execute or args.show_any or args.save_inputs):
                 # set input list with configured parameters
-                input_list = config.load_inputs(input_dict)
+                input_list = session.list_inputs(input_manifest)
+                if (args.save_inputs):
+                    InputManifest.write(args.save_inputs, input_list)
+                    print(f'Input list saved on {args.save_inputs}')
+                    print()
                 # Creates the tasks to be executed or showed
-                azure_batch.create_tasks(input_list, args.execute)
+                if (args.execute or args.show_any):
+                    session.add_tasks(input_list, args.execute)
+
+            if (args.watch):
+                session.watch()
+
+            if (args.advise or args.advise_rank):
+                advisor = SizingAdvisor(config.get_config())
+                if (args.advise):
+                    advisor.run_trials(config.load_inputs(input_manifest))
+                pool = config.get_config().pool
+                advisor.print_ranking(advisor.rank(advisor.read_traces(),
+                    pool.dedicatedNodeCount + pool.lowPriorityNodeCount))
+
+            if (args.sync):
+                azure_batch.sync_task_mirror()
+                print()
 
             if (args.list):
-                azure_batch.list_resources()
+                azure_batch.list_resources(args.list_state,
+                                           args.list_job_prefix,
+                                           args.list_task_prefix,
+                                           args.list_format,
+                                           args.list_output, args.list_limit)
+
+            if (args.harvest_logs):
+                # the logs of all accounts share the destination path
+                LogHarvester(config.get_config()).run(
+                    args.harvest_logs, args.harvest_task_prefix)
 
             if (args.count):
-                task_counts = azure_batch.count_job_tasks()
+                task_counts = session.count()
                 print(f'Total Tasks: {task_counts.total}')
                 print(f'  Active    Tasks: {task_counts.active}')
                 print(f'  Running   Tasks: {task_counts.running}')
@@ -1248,17 +6646,36 @@ class AzureCustomTasks:
                 print(f'    Failed    Tasks: {task_counts.failed}')
                 print()
 
+            if (args.monitor or
+                (args.execute and config.get_config().pool.monitor.include)):
+                azure_batch.monitor_pool_allocation()
+
+            if (args.benchmark_report):
+                azure_batch.report_io_benchmark()
+
+            if (args.calibrate):
+                if not config.get_config().tasks.calibration.memoryPerNodeInGB:
+                    raise ValueError("Calibration requires the "\
+                                     "memoryPerNodeInGB configuration!")
+                if config.get_config().batch.accounts:
+                    raise ValueError("Calibration is not supported with "\
+                                     "multiple batch accounts!")
+                SlotCalibrator(azure_batch).run()
+
             if (args.wait):
-                azure_batch.wait_job_tasks_completion()
+                session.wait()
 
             # Free Batch resources (if the user confirms to do so).
             if (args.free):
                 if (args.yes or
                     ihandler.query_yes_no('Delete batch resources?') == 'yes'):
-                    azure_batch.delete_resources()
+                    session.teardown()
 
-        except batchmodels.BatchErrorException as err:
-            azure_batch.print_batch_exception(err)
+        except Exception as err:
+            # Batch errors only happen if the Batch SDK was already imported
+            if (batchmodels.is_loaded() and
+                isinstance(err, batchmodels.BatchErrorException)):
+                azure_batch.print_batch_exception(err)
             raise
 
         print()
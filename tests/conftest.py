@@ -0,0 +1,48 @@
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import azure_custom_tasks as act
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'examples',
+                           'helloworld')
+
+
+def model(**kwargs):
+    return SimpleNamespace(**kwargs)
+
+
+@pytest.fixture
+def azure_batch(monkeypatch, tmp_path):
+    """
+    Batch utility of the helloworld example, creating the Batch models as
+    namespaces. The tests set its Batch client.
+    """
+    monkeypatch.setattr(act.batchmodels, '_module', SimpleNamespace(
+        TaskAddParameter=model, EnvironmentSetting=model,
+        TaskConstraints=model, OutputFile=model, OutputFileDestination=model,
+        OutputFileBlobContainerDestination=model,
+        OutputFileUploadOptions=model, AffinityInformation=model,
+        TaskListOptions=model, TaskGetOptions=model,
+        ComputeNodeListOptions=model,
+        OutputFileUploadCondition=SimpleNamespace(
+            task_success='taskSuccess', task_completion='taskCompletion'),
+        ComputeNodeState=SimpleNamespace(idle='idle'),
+        TaskAddStatus=SimpleNamespace(success='success'),
+        TaskState=SimpleNamespace(active='active'),
+        BatchErrorException=Exception))
+    with open(os.path.join(EXAMPLE_DIR, 'config.json')) as file:
+        config = json.load(file)
+    config['tasks']['inputs']['inputFileExtension'] = '.txt'
+    config['tasks']['calibration'] = {
+        'memoryPerNodeInGB':4, 'logFile':str(tmp_path / 'calibration.jsonl')}
+    output = act.SessionOutput(lambda message: None, False)
+    reader = act.ConfigurationReader(io.StringIO(json.dumps(config)), output)
+    reader.set_show_arguments(False, False, False, False, False)
+    return act.AzureBatchUtils(reader.get_config())
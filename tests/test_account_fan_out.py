@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import azure_custom_tasks as act
+
+INPUTS = [(f'inputs/{idx}.txt', idx, 1) for idx in range(4000)]
+
+
+def test_partition_shares_follow_the_weights():
+    (first, second) = act.AccountFanOut.partition(INPUTS, [('a', 1),
+                                                           ('b', 3)])
+    assert len(first) + len(second) == len(INPUTS)
+    assert abs(len(second) / len(INPUTS) - 0.75) < 0.03
+    # the order of the inputs is kept on each partition
+    assert first == sorted(first, key=lambda input: input[1])
+
+
+def test_partition_of_an_input_doesnt_depend_on_the_others():
+    accounts = [('a', 1), ('b', 3)]
+    partitions = act.AccountFanOut.partition(INPUTS, accounts)
+    subset = INPUTS[::7]
+    assert act.AccountFanOut.partition(subset, accounts) == [
+        [input for input in partition if input in subset]
+        for partition in partitions]
+
+
+def test_partition_only_moves_inputs_to_a_new_account():
+    (first, second) = act.AccountFanOut.partition(INPUTS, [('a', 1),
+                                                           ('b', 1)])
+    (first_, second_, third) = act.AccountFanOut.partition(
+        INPUTS, [('a', 1), ('b', 1), ('c', 1)])
+    assert set(first_) <= set(first) and set(second_) <= set(second)
+    assert abs(len(third) / len(INPUTS) - 1 / 3) < 0.03
+
+
+def test_wait_runs_the_completion_hooks_of_each_account(monkeypatch):
+    calls = []
+
+    class Monitor:
+        def __init__(self, azure_batch):
+            self.name = azure_batch.name
+
+        def poll(self):
+            calls.append(('poll', self.name))
+
+        def has_reports(self):
+            return True
+
+        def finish(self):
+            calls.append(('finish', self.name))
+
+    polls = {'a':0, 'b':0}
+
+    def make_batch(name):
+        def count_job_tasks():
+            polls[name] += 1
+            return (1, 1 if polls[name] > 1 else 0)
+        counts = SimpleNamespace(active=0, running=0, completed=1,
+                                 succeeded=1, failed=0, total=1)
+        return SimpleNamespace(name=name, count_job_tasks=count_job_tasks,
+                               get_job_task_counts=lambda mirror: counts)
+
+    monkeypatch.setattr(act, 'CompletionMonitor', Monitor)
+    monkeypatch.setattr(act.time, 'sleep', lambda seconds: None)
+    messages = []
+    fan_out = act.AccountFanOut.__new__(act.AccountFanOut)
+    fan_out.config = SimpleNamespace(output=act.SessionOutput(
+        log=messages.append))
+    fan_out.accounts = [SimpleNamespace(name=name, batch=make_batch(name))
+                        for name in ['a', 'b']]
+    assert fan_out.wait_job_tasks_completion().completed == 2
+    assert calls == [('poll', 'a'), ('poll', 'b'), ('finish', 'a'),
+                     ('finish', 'b')]
+    assert 'Batch account: b' in messages
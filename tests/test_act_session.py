@@ -0,0 +1,97 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import azure_custom_tasks as act
+
+EXAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'examples',
+                           'helloworld')
+
+
+class FakeOperations:
+
+    def __init__(self, resources):
+        self.resources = resources
+
+    def list(self, **kwargs):
+        return [SimpleNamespace(id=resource_id)
+                for resource_id in self.resources]
+
+    def delete(self, resource_id):
+        self.resources.remove(resource_id)
+
+
+class FakeJobs(FakeOperations):
+
+    def get_task_counts(self, job_id):
+        return SimpleNamespace(task_counts=SimpleNamespace(
+            active=1, running=2, completed=3, succeeded=2, failed=1))
+
+
+class FakeBatchServiceClient:
+    created = []
+
+    def __init__(self, credentials, batch_url):
+        FakeBatchServiceClient.created.append(batch_url)
+        self.job = FakeJobs(['MyJobHelloWorld', 'other-job'])
+        self.pool = FakeOperations(['PoolHelloWorld', 'other-pool'])
+
+
+@pytest.fixture
+def config(monkeypatch):
+    FakeBatchServiceClient.created = []
+    monkeypatch.setattr(act.AzureBatchUtils, '_batch_clients', {})
+    monkeypatch.setattr(act.batch, '_module', SimpleNamespace(
+        BatchServiceClient=FakeBatchServiceClient))
+    monkeypatch.setattr(act.batch_auth, '_module', SimpleNamespace(
+        SharedKeyCredentials=lambda name, key: None))
+    monkeypatch.setattr(act.batchmodels, '_module', SimpleNamespace(
+        BatchErrorException=Exception))
+    # the session doesn't pause between the steps
+    monkeypatch.setattr(act.time, 'sleep', lambda seconds: pytest.fail(
+        f'paused {seconds} s'))
+    monkeypatch.chdir(EXAMPLE_DIR)
+    with open('config.json') as file:
+        return json.load(file)
+
+
+def test_session_logs_the_messages_without_printing(config, capsys):
+    messages = []
+    session = act.ActSession(config, log=messages.append)
+    inputs = session.list_inputs(act.InputManifest.read('inputs.csv'))
+    assert inputs == [('HELLO WORLD 1', 0, 1), ('HELLO WORLD 2', 0, 1),
+                      ('HELLO WORLD 3', 0, 1)]
+    assert session.add_tasks(execute=False) == 3
+    assert capsys.readouterr().out == ''
+    assert 'Input list (3)' in messages
+
+
+def test_session_discards_the_messages_without_log(config, capsys):
+    session = act.ActSession(config)
+    session.list_inputs(act.InputManifest.read('inputs.csv'))
+    assert capsys.readouterr().out == ''
+
+
+def test_session_returns_structured_counts(config):
+    counts = act.ActSession(config).count()
+    assert vars(counts) == {'active':1, 'running':2, 'completed':3,
+                            'succeeded':2, 'failed':1, 'total':6}
+
+
+def test_sessions_share_the_batch_client(config):
+    act.ActSession(config).count()
+    act.ActSession(config).count()
+    assert len(FakeBatchServiceClient.created) == 1
+
+
+def test_teardown_deletes_only_the_configured_resources(config):
+    session = act.ActSession(config)
+    deleted = session.teardown()
+    assert deleted.jobs == ['MyJobHelloWorld']
+    assert deleted.pools == ['PoolHelloWorld']
+    client = act.AzureBatchUtils._batch_clients[
+        next(iter(act.AzureBatchUtils._batch_clients))]
+    assert client.job.resources == ['other-job']
+    assert client.pool.resources == ['other-pool']
@@ -0,0 +1,102 @@
+import datetime
+import io
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import azure_custom_tasks as act
+
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(__file__), '..', 'examples',
+                              'helloworld', 'config.json')
+NOW = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+
+def blob(name, seconds_ago):
+    return SimpleNamespace(name=f'input/{name}', size=10,
+                           last_modified=NOW - datetime.timedelta(
+                               seconds=seconds_ago))
+
+
+class FakeBatch:
+
+    def __init__(self, rejected_batch=None):
+        self.batches = []
+        self.rejected_batch = rejected_batch
+
+    def create_tasks(self, input_list, execute_tasks, incremental=False):
+        assert execute_tasks and incremental
+        self.batches.append([name for (name, _, _) in input_list])
+        if len(self.batches) == self.rejected_batch:
+            return len(input_list) - 1
+        return len(input_list)
+
+
+@pytest.fixture
+def blobs(monkeypatch):
+    blobs = [blob(f's{idx}.faa', 100 - idx // 3) for idx in range(10)]
+    blobs.append(blob('ignored.txt', 50))
+    container = SimpleNamespace(list_blobs=lambda name_starts_with: [
+        item for item in blobs if item.name.startswith(name_starts_with)])
+    monkeypatch.setattr(act.ContainerClients, '_clients', {})
+    monkeypatch.setattr(act.blobstorage, '_module', SimpleNamespace(
+        ContainerClient=SimpleNamespace(
+            from_container_url=lambda container_url: container)))
+    return blobs
+
+
+@pytest.fixture
+def reader(tmp_path):
+    with open(EXAMPLE_CONFIG) as file:
+        config = json.load(file)
+    config['tasks']['inputs'].update(areBlobsInInputStorage=True,
+                                     inputFileExtension='.faa')
+    config['tasks']['inputs']['watch'] = {
+        'batchSize':4, 'settleInSeconds':5,
+        'statePath':str(tmp_path / 'watch.json')}
+    config['tasks']['deterministicTaskIds'] = True
+    config['storage']['input'].update(path='input/', blobPrefix='')
+    reader = act.ConfigurationReader(
+        io.StringIO(json.dumps(config)),
+        output=act.SessionOutput(log=lambda message: None, pauses=False))
+    reader.set_show_arguments(False, False, False, False, False)
+    return reader
+
+
+def read_state(reader):
+    with open(reader.get_config().tasks.inputs.watch.statePath) as file:
+        return json.load(file)
+
+
+def test_poll_submits_the_new_blobs_in_micro_batches(blobs, reader):
+    batch = FakeBatch()
+    assert act.InputWatcher(batch, reader).run(max_polls=1) == 10
+    assert [len(names) for names in batch.batches] == [4, 4, 2]
+    # the blobs without the input extension also move the watermark
+    state = read_state(reader)
+    assert state['watermark'] == blobs[10].last_modified.isoformat()
+    assert state['names'] == ['input/ignored.txt']
+
+
+def test_poll_resumes_after_the_watermark(blobs, reader):
+    act.InputWatcher(FakeBatch(), reader).run(max_polls=1)
+    # a blob with the watermark time, a newer one and one still settling
+    blobs.append(blob('s10.faa', 50))
+    blobs.append(blob('s11.faa', 40))
+    blobs.append(blob('fresh.faa', 0))
+    batch = FakeBatch()
+    act.InputWatcher(batch, reader).run(max_polls=1)
+    assert batch.batches == [['input/s10.faa', 'input/s11.faa']]
+
+
+def test_poll_keeps_the_watermark_before_rejected_tasks(blobs, reader):
+    batch = FakeBatch(rejected_batch=2)
+    with pytest.raises(RuntimeError):
+        act.InputWatcher(batch, reader).run(max_polls=1)
+    state = read_state(reader)
+    assert state['watermark'] == blobs[3].last_modified.isoformat()
+
+    batch = FakeBatch()
+    act.InputWatcher(batch, reader).run(max_polls=1)
+    assert batch.batches[0][0] == 'input/s4.faa'
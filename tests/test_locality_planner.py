@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+import azure_custom_tasks as act
+
+
+def make_planner(key_pattern=r'([^/_.]+)[^/]*$'):
+    return act.LocalityPlanner(SimpleNamespace(
+        tasks=SimpleNamespace(inputs=SimpleNamespace(locality=SimpleNamespace(
+            keyPattern=key_pattern))),
+        output=act.SessionOutput(lambda message: None, False)))
+
+
+def test_key_is_the_first_group_the_match_or_the_name():
+    assert make_planner().get_key('inputs/S1_R1.fastq') == 'S1'
+    assert make_planner().get_key('inputs/S1.bam') == 'S1'
+    assert make_planner(r'S[0-9]+').get_key('inputs/S12_R2.fastq') == 'S12'
+    assert make_planner(r'^x').get_key('inputs/S1.bam') == 'inputs/S1.bam'
+
+
+def test_groups_are_kept_together_in_the_submission_order():
+    inputs = [('S2_R1', 1, 1), ('S1_R1', 1, 1), ('S2_R2', 1, 1),
+              ('S1_R2', 1, 1)]
+    assert make_planner().group_inputs(inputs) == [
+        ('S2_R1', 1, 1), ('S2_R2', 1, 1), ('S1_R1', 1, 1), ('S1_R2', 1, 1)]
+
+
+def test_largest_groups_go_to_the_least_loaded_node():
+    inputs = [('S1_R1', 50, 1), ('S1_R2', 50, 1), ('S2_R1', 60, 1),
+              ('S3_R1', 30, 1), ('S4_R1', 0, 2)]
+    assert make_planner().assign_nodes(inputs, ['a1', 'a2']) == {
+        'S1':'a1', 'S2':'a2', 'S3':'a2', 'S4':'a2'}
+
+
+def test_assigned_groups_keep_their_node_and_load_it():
+    inputs = [('S1_R3', 100, 1), ('S2_R1', 10, 1), ('S3_R1', 5, 1)]
+    assert make_planner().assign_nodes(inputs, ['a1', 'a2'],
+                                       {'S1':'a1'}) == {
+        'S1':'a1', 'S2':'a2', 'S3':'a2'}
+    # no nodes, the groups are left without affinity
+    assert make_planner().assign_nodes(inputs, [], {'S1':'a1'}) == {
+        'S1':'a1'}
+
+
+def test_micro_batches_dont_wait_for_the_pool_nodes(azure_batch,
+                                                    monkeypatch):
+    azure_batch.config.tasks.inputs.locality.include = True
+    azure_batch.locality = act.LocalityPlanner(azure_batch.config)
+    azure_batch.config.reporter = SimpleNamespace(
+        item=lambda *args: None)
+    monkeypatch.setattr(azure_batch, 'get_config_job', lambda: True)
+    monkeypatch.setattr(azure_batch, 'count_job_tasks', lambda: (0, 0))
+    monkeypatch.setattr(azure_batch, 'wait_node_affinity_ids', lambda:
+                        pytest.fail('waited for the pool nodes'))
+    monkeypatch.setattr(azure_batch, 'get_node_affinity_ids',
+                        lambda: {'a1':'node-1'})
+    monkeypatch.setattr(azure_batch, 'create_task_collection',
+                        lambda input_list, ini, end, execute: end - ini)
+    inputs = [('inputs/S1_R1.txt', 1, 1), ('inputs/S2_R1.txt', 1, 1)]
+    assert azure_batch.create_tasks(inputs, True, incremental=True) == 2
+    assert azure_batch.locality_affinity == {'S1':'a1', 'S2':'a1'}
+    assert azure_batch.node_ids == {'a1':'node-1'}
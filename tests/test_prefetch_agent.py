@@ -0,0 +1,78 @@
+import io
+import os
+
+import act_prefetch_agent as agent
+
+
+class FakeResponse(io.BytesIO):
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.headers = {'Content-Length':str(len(data))}
+
+
+def fake_storage(monkeypatch, blobs, requests):
+    def urlopen(url):
+        requests.append(url)
+        name = url.split('?')[0].rsplit('/', 1)[1]
+        if name not in blobs:
+            raise OSError(f'{name} not found')
+        return FakeResponse(blobs[name])
+
+    monkeypatch.setattr(agent.urllib.request, 'urlopen', urlopen)
+
+
+def stage(cache, name, size, mtime):
+    path = cache.get_file_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(b'x' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_resolve_makes_room_for_a_miss(monkeypatch, tmp_path, capsys):
+    fake_storage(monkeypatch, {'new.txt':b'12345'}, [])
+    cache = agent.PrefetchCache(str(tmp_path), max_bytes=10)
+    cache.save_settings('https://account/inputs?sas')
+    old = stage(cache, 'old.txt', 8, 1)
+    path = agent.PrefetchCache(str(tmp_path)).resolve('new.txt')
+    assert path == cache.get_file_path('new.txt')
+    assert not os.path.exists(old)
+    with open(path, 'rb') as file:
+        assert file.read() == b'12345'
+    # only the path is printed on stdout
+    assert capsys.readouterr().out == ''
+
+
+def test_eviction_keeps_the_inputs_of_the_last_started_tasks(tmp_path):
+    cache = agent.PrefetchCache(str(tmp_path), max_bytes=10,
+                                protect_started=2)
+    (first, second, third) = [stage(cache, name, 3, mtime) for (name, mtime)
+                              in [('a.txt', 1), ('b.txt', 2), ('c.txt', 3)]]
+    for name in ['a.txt', 'b.txt']:
+        # the hit refreshes the usage time of the resolved input
+        assert cache.resolve(name) == cache.get_file_path(name)
+        os.utime(cache.get_file_path(name), (1, 1))
+    assert cache.reserve(4, set())
+    assert [os.path.exists(path) for path in [first, second, third]] == [
+        True, True, False]
+    assert not cache.reserve(5, set())
+
+
+def test_failed_inputs_are_staged_again(monkeypatch, tmp_path):
+    blobs, requests = {'a.txt':b'1'}, []
+    fake_storage(monkeypatch, blobs, requests)
+    cache = agent.PrefetchCache(str(tmp_path))
+    window = [('a.txt', 1), ('b.txt', 1)]
+    attempted = set()
+    agent.stage_inputs(cache, window, 'https://account/inputs?sas',
+                       attempted)
+    assert attempted == {'a.txt'}
+    blobs['b.txt'] = b'2'
+    agent.stage_inputs(cache, window, 'https://account/inputs?sas',
+                       attempted)
+    assert attempted == {'a.txt', 'b.txt'}
+    assert [url.split('?')[0] for url in requests] == [
+        'https://account/inputs/a.txt', 'https://account/inputs/b.txt',
+        'https://account/inputs/b.txt']
@@ -0,0 +1,105 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import azure_custom_tasks as act
+
+
+class ThrottledError(Exception):
+
+    def __init__(self, status_code, retry_after=None):
+        headers = {'Retry-After':retry_after} if retry_after else {}
+        self.response = SimpleNamespace(status_code=status_code,
+                                        headers=headers)
+
+
+def make_governor(**classes):
+    return act.RequestGovernor(SimpleNamespace(
+        maxRetries=3, baseDelayInSeconds=0.01, maxDelayInSeconds=0.05,
+        **{name:SimpleNamespace(**values) for (name, values)
+           in classes.items()}))
+
+
+def test_call_paces_the_requests_after_the_burst():
+    governor = make_governor(submit={'rate':50, 'burst':5})
+    init = time.monotonic()
+    for _ in range(15):
+        governor.call('submit', lambda: None)
+    # 5 from the burst, 10 more at 50 per second
+    assert time.monotonic() - init >= 0.18
+
+
+def test_call_retries_throttled_requests_and_halves_the_limit():
+    governor = make_governor(submit={'rate':1000, 'burst':1000,
+                                     'maxInFlight':8})
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ThrottledError(429, '0.05')
+        return len(calls)
+
+    init = time.monotonic()
+    assert governor.call('submit', flaky, output=act.SessionOutput(
+        log=lambda message: None)) == 2
+    assert time.monotonic() - init >= 0.05
+    state = governor.classes['submit']
+    assert state.throttled == 1
+    assert state.limit < 4
+
+
+def test_call_raises_the_errors_not_throttled():
+    governor = make_governor()
+
+    def missing():
+        raise ThrottledError(404)
+
+    with pytest.raises(ThrottledError):
+        governor.call('read', missing)
+    assert governor.classes['read'].in_flight == 0
+
+
+def test_call_limits_the_requests_in_flight():
+    governor = make_governor(update={'rate':1000, 'burst':1000,
+                                     'maxInFlight':4})
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def work():
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+
+    threads = [threading.Thread(target=lambda: [governor.call('update', work)
+                                                for _ in range(5)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert in_flight[1] <= 4
+
+
+def test_govern_pages_takes_a_token_for_each_page():
+    governor = make_governor(list={'rate':1000, 'burst':1000})
+    pages = []
+
+    class Paged:
+        def advance_page(self):
+            pages.append(1)
+            if len(pages) == 2:
+                raise ThrottledError(503)
+            return [len(pages)]
+
+    paged = governor.govern_pages('list', Paged(),
+                                  output=act.SessionOutput(
+                                      log=lambda message: None))
+    assert paged.advance_page() == [1]
+    assert paged.advance_page() == [3]
+    assert governor.classes['list'].throttled == 1
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import azure_custom_tasks as act
+
+
+class Options:
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def make_lister(monkeypatch, listed):
+    monkeypatch.setattr(act.batchmodels, '_module', SimpleNamespace(
+        TaskListOptions=Options, JobListOptions=Options,
+        PoolListOptions=Options))
+
+    def list_tasks(job_id, task_list_options):
+        for idx in range(5000):
+            listed.append(job_id)
+            yield SimpleNamespace(id=f'{job_id}-{idx}', state='running',
+                                  command_line='cmd', execution_info=None,
+                                  node_info=SimpleNamespace(node_id='node'))
+
+    client = SimpleNamespace(
+        pool=SimpleNamespace(list=lambda pool_list_options: []),
+        job=SimpleNamespace(list=lambda job_list_options: [
+            SimpleNamespace(id=f'job{idx}', state='active', pool_info=None)
+            for idx in range(3)]),
+        task=SimpleNamespace(list=list_tasks))
+    azure_batch = SimpleNamespace(
+        batch_service_client=client, get_task_mirror=lambda: None,
+        config=SimpleNamespace(job=SimpleNamespace(id='other'),
+                               output=act.SessionOutput(
+                                   log=lambda message: None)))
+    return act.ResourceLister(azure_batch, 'running')
+
+
+def test_get_filter_escapes_the_prefix():
+    assert act.ResourceLister.get_filter('running', "a'b") == \
+        "state eq 'running' and startswith(id, 'a''b')"
+
+
+def test_run_stops_the_listing_at_the_limit(monkeypatch, tmp_path):
+    listed = []
+    lister = make_lister(monkeypatch, listed)
+    output = tmp_path / 'tasks.jsonl'
+    lister.run('jsonl', str(output), limit=7)
+    lines = output.read_text().splitlines()
+    assert len([line for line in lines if '"task"' in line]) == 7
+    # the listings stop after the limit, bounded by the rows queue
+    assert len(listed) < 3 * 5000
+
+
+def test_run_lists_all_the_tasks(monkeypatch, tmp_path):
+    listed = []
+    lister = make_lister(monkeypatch, listed)
+    output = tmp_path / 'tasks.csv'
+    lister.run('csv', str(output))
+    assert len(output.read_text().splitlines()) == 1 + 3 + 3 * 5000
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+import azure_custom_tasks as act
+
+
+def trace(vm_size, slots, runtime, weight=1, exit_code=0, peak=None,
+          cores=2, memory=8, price=0.1):
+    return {'vmSize':vm_size, 'cores':cores, 'memoryInGB':memory,
+            'pricePerHour':price, 'taskSlotsPerNode':slots, 'input':'x',
+            'stratum':0, 'weight':weight, 'runtime':runtime,
+            'peakMemoryKB':peak, 'exitCode':exit_code}
+
+
+def test_rank_orders_by_throughput_per_core_hour():
+    traces = [trace('small', 1, 3600), trace('small', 1, 3600),
+              trace('large', 2, 3600, cores=8), trace('large', 2, 3600,
+                                                      cores=8),
+              trace('fast', 1, 1800)]
+    ranking = act.SizingAdvisor.rank(traces)
+    assert [item.vmSize for item in ranking] == ['fast', 'small', 'large']
+    assert ranking[0].coreHours == pytest.approx(1)
+    assert ranking[0].throughputPerCoreHour == pytest.approx(1)
+
+
+def test_rank_moves_failed_and_oversubscribed_to_the_end():
+    traces = [trace('failed', 1, 60, exit_code=1),
+              trace('oversubscribed', 4, 60, peak=4 * 1024**2),
+              trace('slow', 1, 3600)]
+    ranking = act.SizingAdvisor.rank(traces)
+    assert [item.vmSize for item in ranking] == ['slow', 'oversubscribed',
+                                                 'failed']
+    assert not ranking[1].fitsMemory
+    assert ranking[2].failed == 1
+
+
+def test_rank_weights_the_sampled_runtimes():
+    ranking = act.SizingAdvisor.rank([trace('vm', 2, 3600, weight=4)],
+                                     node_count=2)
+    assert ranking[0].nodeHours == pytest.approx(2)
+    assert ranking[0].projectedHours == pytest.approx(1)
+    assert ranking[0].projectedCost == pytest.approx(0.2)
+
+
+class FakeTrialBatch:
+    instances = []
+
+    def __init__(self, config, fail=False):
+        self.config = config
+        self.deleted = []
+        self.timeout = None
+        client = SimpleNamespace(
+            job=SimpleNamespace(delete=lambda i: self.deleted.append(i)),
+            pool=SimpleNamespace(delete=lambda i: self.deleted.append(i)))
+        self.batch_service_client = client
+        FakeTrialBatch.instances.append(self)
+
+    def create_pool(self):
+        pass
+
+    def create_job(self):
+        pass
+
+    def create_tasks(self, input_list, execute_tasks):
+        return len(input_list)
+
+    def wait_job_tasks_completion(self, timeout=None):
+        self.timeout = timeout
+        raise RuntimeError('ERROR: Tasks did not complete within timeout')
+
+
+def test_run_trials_deletes_the_trial_pool_on_failure(monkeypatch):
+    FakeTrialBatch.instances = []
+    monkeypatch.setattr(act, 'AzureBatchUtils', FakeTrialBatch)
+    config = SimpleNamespace(
+        output=act.SessionOutput(pauses=False),
+        pool=SimpleNamespace(id='pool', nodeAutoScale=SimpleNamespace()),
+        job=SimpleNamespace(id='job'),
+        tasks=SimpleNamespace(inputs=SimpleNamespace(),
+                              journal=SimpleNamespace()),
+        advisor=SimpleNamespace(
+            candidates=[SimpleNamespace(vmSize='vm', taskSlotsPerNode=[2])],
+            strata=1, samplesPerStratum=1, nodeCount=1,
+            trialTimeoutInMinutes=5))
+    advisor = act.SizingAdvisor(config)
+    with pytest.raises(RuntimeError):
+        advisor.run_trials([('a', 1, 1), ('b', 2, 1)])
+    (trial,) = FakeTrialBatch.instances
+    assert trial.timeout == 300
+    assert trial.deleted == ['job-trial1', 'pool-trial1']
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import azure_custom_tasks as act
+from conftest import model
+
+
+def test_replacement_keeps_the_input_stamp(azure_batch):
+    task = SimpleNamespace(
+        id='t1', command_line="/bin/bash -c 'run && printf stamp'",
+        required_slots=1, affinity_info=None, environment_settings=[
+            model(name='ACT_INPUT', value='inputs/a.txt'),
+            model(name='ACT_INPUT_SIZE', value='100'),
+            model(name='ACT_STAMP', value='0x8D')])
+    added = []
+    azure_batch._batch_service_client = SimpleNamespace(task=SimpleNamespace(
+        list=lambda job_id, task_list_options: [task],
+        add_collection=lambda job_id, chunk: added.extend(chunk) or
+            SimpleNamespace(value=[SimpleNamespace(
+                task_id=new_task.id, status='success', error=None)
+                for new_task in chunk]),
+        get=lambda job_id, task_id: SimpleNamespace(state='active'),
+        delete=lambda job_id, task_id: None))
+    calibrator = act.SlotCalibrator(azure_batch)
+    # the stamps are not read again when the calibration runs alone
+    assert calibrator.config.input_stamps == {}
+    fitted = SimpleNamespace(memoryIntercept=0, memorySlope=0, cores=2)
+    assert calibrator.adjust_active_tasks(fitted) == 1
+    [replacement] = added
+    assert replacement.id == 't1-s2'
+    assert replacement.command_line == task.command_line
+    assert calibrator.get_task_stamp(replacement) == '0x8D'
+    assert [output.destination.container.path for output in
+            replacement.output_files if output.file_pattern ==
+            act.STAMP_FILE] == ['output/act_stamps/a.0x8D.json']
@@ -0,0 +1,137 @@
+import datetime
+import shlex
+from types import SimpleNamespace
+
+import azure_custom_tasks as act
+from conftest import model
+
+START = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def completed(task_id, exit_code):
+    return SimpleNamespace(
+        id=task_id, environment_settings=[], execution_info=SimpleNamespace(
+            exit_code=exit_code, start_time=START,
+            end_time=START + datetime.timedelta(seconds=60)))
+
+
+class FakeTasks:
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.deleted = []
+        self.terminated = []
+
+    def list(self, job_id, task_list_options):
+        state = task_list_options.filter.split("'")[1]
+        return [task for task in self.tasks.get(state, [])]
+
+    def delete(self, job_id, task_id):
+        self.deleted.append(task_id)
+
+    def terminate(self, job_id, task_id):
+        self.terminated.append(task_id)
+
+
+def make_detector(monkeypatch, tasks):
+    class Options:
+        def __init__(self, filter=None, select=None):
+            self.filter = filter
+
+    monkeypatch.setattr(act.batchmodels, '_module',
+                        SimpleNamespace(TaskListOptions=Options))
+    config = SimpleNamespace(
+        job=SimpleNamespace(id='job'),
+        output=act.SessionOutput(log=lambda message: None),
+        tasks=SimpleNamespace(speculation=SimpleNamespace(
+            maxPeers=10, minPeers=10)))
+    client = SimpleNamespace(task=FakeTasks(tasks))
+    return act.StragglerDetector(SimpleNamespace(
+        config=config, batch_service_client=client))
+
+
+def test_check_terminates_the_original_beaten_by_its_clone(monkeypatch):
+    running = SimpleNamespace(id='t1')
+    detector = make_detector(monkeypatch, {
+        'completed':[completed('t1-spec', 0)], 'running':[running]})
+    detector.check()
+    assert detector.client.task.terminated == ['t1']
+    assert detector.client.task.deleted == []
+
+
+def test_check_deletes_the_clone_beaten_by_its_original(monkeypatch):
+    detector = make_detector(monkeypatch, {
+        'completed':[completed('t1', 0)],
+        'running':[SimpleNamespace(id='t1-spec')]})
+    detector.check()
+    assert detector.client.task.deleted == ['t1-spec']
+    assert detector.client.task.terminated == []
+
+
+def test_check_keeps_the_terminated_original(monkeypatch):
+    detector = make_detector(monkeypatch, {
+        'completed':[completed('t1-spec', 0), completed('t1', None)]})
+    detector.check()
+    assert detector.client.task.terminated == []
+    assert detector.client.task.deleted == []
+
+
+def test_check_deletes_the_clone_kept_on_the_straggler_node(monkeypatch):
+    detector = make_detector(monkeypatch, {
+        'completed':[completed('t1-spec', 75)],
+        'running':[SimpleNamespace(id='t1')]})
+    detector.check()
+    assert detector.client.task.deleted == ['t1-spec']
+    assert detector.client.task.terminated == []
+
+
+def test_clone_keeps_the_input_stamp_and_avoids_the_node(azure_batch):
+    task = SimpleNamespace(
+        id='t1', command_line="/bin/bash -c 'run && printf stamp'",
+        required_slots=1, node_info=SimpleNamespace(node_id='node-1'),
+        environment_settings=[model(name='ACT_INPUT', value='inputs/a.txt'),
+                              model(name='ACT_STAMP', value='0x8D')])
+    added = []
+    azure_batch._batch_service_client = SimpleNamespace(
+        task=SimpleNamespace(add=lambda job_id, clone: added.append(clone)),
+        compute_node=SimpleNamespace(list=lambda pool_id: [
+            SimpleNamespace(id='node-1', state='idle', affinity_id='a1'),
+            SimpleNamespace(id='node-2', state='running', affinity_id='a2'),
+            SimpleNamespace(id='node-3', state='idle', affinity_id='a3')]))
+    act.StragglerDetector(azure_batch).add_clone(task, 't1-spec',
+                                                 'inputs/a.txt', 100)
+    [clone] = added
+    guard = 'if [ "$AZ_BATCH_NODE_ID" = node-1 ]; then exit 75; fi; '
+    assert clone.command_line == \
+        f'/bin/bash -c {shlex.quote(guard + task.command_line)}'
+    assert clone.constraints.max_task_retry_count == 3
+    assert clone.affinity_info.affinity_id == 'a3'
+    assert act.SlotCalibrator.get_task_stamp(clone) == '0x8D'
+    assert [(output.file_pattern, output.destination.container.path)
+            for output in clone.output_files] == [
+        ('../std*', 'logs/helloworld/t1-spec'),
+        (act.STAMP_FILE, 'output/act_stamps/a.0x8D.json')]
+
+
+def test_mirror_doesnt_list_the_beaten_originals_and_kept_clones(
+        monkeypatch, tmp_path):
+    class Options:
+        def __init__(self, filter=None, select=None):
+            self.filter = filter
+
+    monkeypatch.setattr(act.batchmodels, '_module',
+                        SimpleNamespace(TaskListOptions=Options))
+    tasks = []
+    for (task_id, exit_code) in [('t1', None), ('t1-spec', 0), ('t2', 1),
+                                 ('t2-spec', 75)]:
+        task = completed(task_id, exit_code)
+        task.state = 'completed'
+        task.command_line = task_id
+        task.state_transition_time = START
+        task.node_info = None
+        tasks.append(task)
+    client = SimpleNamespace(task=SimpleNamespace(
+        list=lambda job_id, task_list_options: list(tasks)))
+    mirror = act.TaskMirror(str(tmp_path / 'mirror.db'), 'job')
+    mirror.sync(client, SimpleNamespace(creation_time=START))
+    assert [task_id for (task_id, _) in mirror.list_failed_tasks()] == ['t2']
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+
+class RequestBodyTooLarge(Exception):
+    error = SimpleNamespace(code='RequestBodyTooLarge')
+
+
+def test_rejected_collections_are_split_in_half(azure_batch, monkeypatch):
+    requests = []
+
+    def add_collection(job_id, task_list):
+        requests.append([task.id for task in task_list])
+        if len(task_list) > 2:
+            raise RequestBodyTooLarge()
+        return SimpleNamespace(value=[SimpleNamespace(
+            task_id=task.id, error=None,
+            status='failure' if task.id.endswith('3') else 'success')
+            for task in task_list])
+
+    azure_batch._batch_service_client = SimpleNamespace(
+        task=SimpleNamespace(add_collection=add_collection))
+    monkeypatch.setattr(azure_batch, 'get_task_payload_size',
+                        lambda task: 100)
+    azure_batch.config.tasks.addCollectionMaxBytes = 1000
+    azure_batch.config.tasks.deterministicTaskIds = False
+    azure_batch.start_id, azure_batch.tasks_id_len = 1, '1'
+    inputs = [(f'HELLO {idx}', 0, 1) for idx in range(5)]
+    # the Task that failed to be added isn't counted
+    assert azure_batch.create_task_collections_by_payload(inputs) == 4
+    assert requests == [
+        ['Task1', 'Task2', 'Task3', 'Task4', 'Task5'],
+        ['Task1', 'Task2'], ['Task3', 'Task4', 'Task5'],
+        ['Task3'], ['Task4', 'Task5']]
+    # the following collections are kept below the rejected size
+    assert azure_batch.collection_max_bytes == 270
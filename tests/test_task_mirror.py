@@ -0,0 +1,86 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import azure_custom_tasks as act
+
+
+def at(minute):
+    return datetime.datetime(2026, 1, 1, 0, minute,
+                             tzinfo=datetime.timezone.utc)
+
+
+def task(task_id, state, minute, exit_code=None):
+    execution_info = None
+    if state == 'completed':
+        execution_info = SimpleNamespace(exit_code=exit_code)
+    return SimpleNamespace(id=task_id, state=state, command_line=task_id,
+                           state_transition_time=at(minute),
+                           execution_info=execution_info, node_info=None)
+
+
+class FakeTasks:
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.calls = []
+
+    def list(self, job_id, task_list_options):
+        self.calls.append((task_list_options.filter,
+                           task_list_options.select))
+        return list(self.tasks)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    class Options:
+        def __init__(self, filter=None, select=None):
+            self.filter = filter
+            self.select = select
+
+    monkeypatch.setattr(act.batchmodels, '_module',
+                        SimpleNamespace(TaskListOptions=Options))
+    return SimpleNamespace(task=FakeTasks([
+        task('t1', 'completed', 1, 0), task('t2', 'completed', 2, 1),
+        task('t3', 'completed', 3), task('t4', 'active', 0)]))
+
+
+def test_sync_lists_only_the_tasks_changed_after_the_watermark(client,
+                                                                tmp_path):
+    mirror = act.TaskMirror(str(tmp_path / 'mirror.db'), 'job')
+    job = SimpleNamespace(creation_time=at(0))
+    assert mirror.sync(client, job) == 4
+    assert client.task.calls[0][0] is None
+    counts = mirror.count_tasks()
+    assert (counts.total, counts.completed, counts.failed) == (4, 3, 2)
+    assert [task_id for (task_id, _) in mirror.list_failed_tasks()] == \
+        ['t2', 't3']
+
+    client.task.tasks[3] = task('t4', 'running', 5)
+    mirror.sync(client, job)
+    assert client.task.calls[1][0] == \
+        "stateTransitionTime ge datetime'2026-01-01T00:03:00.000000Z'"
+    assert mirror.count_tasks().running == 1
+
+
+def test_sync_removes_the_deleted_tasks_on_reconcile(client, tmp_path):
+    mirror = act.TaskMirror(str(tmp_path / 'mirror.db'), 'job',
+                            reconcile_interval=0)
+    job = SimpleNamespace(creation_time=at(0))
+    mirror.sync(client, job)
+    del client.task.tasks[0]
+    mirror.sync(client, job)
+    assert client.task.calls[-1] == (None, 'id')
+    assert mirror.count_tasks().total == 3
+
+
+def test_sync_resets_a_recreated_job(client, tmp_path):
+    mirror = act.TaskMirror(str(tmp_path / 'mirror.db'), 'job')
+    mirror.sync(client, SimpleNamespace(creation_time=at(0)))
+    client.task.tasks = client.task.tasks[:1]
+    mirror.sync(client, SimpleNamespace(creation_time=at(9)))
+    assert mirror.count_tasks().total == 1
+    assert mirror.sync(client, None) == 0
+    assert mirror.count_tasks().total == 0
+